@@ -1,10 +1,21 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.infrastructure.db.session import AsyncSessionLocal
+from app.infrastructure.db.session import AsyncSessionLocal, AdminSessionLocal
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_admin_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AdminSessionLocal() as session:
+        yield session
+
+
+def get_admin_sessionmaker() -> async_sessionmaker:
+    # Streamed responses run after the request's dependencies have closed,
+    # so they open their own session
+    return AdminSessionLocal
@@ -0,0 +1,53 @@
+import math
+from typing import AsyncGenerator, Callable, Optional
+
+from anyio import Semaphore, move_on_after
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import LANE_IN_FLIGHT, LANE_REJECTIONS
+
+
+class RequestLane:
+    """
+    Router dependency capping the requests of one kind that are in flight.
+
+    A burst of admin requests queues behind the admin lane instead of
+    competing with renders, which have their own admission control
+    (app.core.admission). Requests wait up to LANE_QUEUE_TIMEOUT_SECONDS for
+    a slot and are then rejected with 503.
+    """
+
+    def __init__(self, name: str, concurrency: Callable[[], int]):
+        self.name = name
+        self.concurrency = concurrency
+        self._semaphore: Optional[Semaphore] = None
+
+    @property
+    def semaphore(self) -> Semaphore:
+        # Created on first use, on the running event loop
+        if self._semaphore is None:
+            self._semaphore = Semaphore(self.concurrency())
+        return self._semaphore
+
+    async def __call__(self) -> AsyncGenerator[None, None]:
+        timeout = settings.LANE_QUEUE_TIMEOUT_SECONDS
+        with move_on_after(timeout) as waiting:
+            await self.semaphore.acquire()
+        if waiting.cancelled_caught:
+            LANE_REJECTIONS.labels(lane=self.name).inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Too many concurrent {self.name} requests",
+                headers={"Retry-After": str(max(1, math.ceil(timeout)))},
+            )
+
+        LANE_IN_FLIGHT.labels(lane=self.name).inc()
+        try:
+            yield
+        finally:
+            LANE_IN_FLIGHT.labels(lane=self.name).dec()
+            self.semaphore.release()
+
+
+admin_lane = RequestLane("admin", lambda: settings.ADMIN_LANE_CONCURRENCY)
@@ -0,0 +1,126 @@
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional, Type, TypeVar, Union
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+M = TypeVar("M", bound=BaseModel)
+
+_MISSING = object()
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.split(";", 1)[0].strip().lower() in MSGPACK_TYPES
+
+
+def prefers_msgpack(accept: Optional[str]) -> bool:
+    """
+    True when the Accept header ranks msgpack at least as high as JSON.
+    """
+    if not accept or "msgpack" not in accept:
+        return False
+    quality: Dict[str, float] = {}
+    for item in accept.split(","):
+        media_type, *params = item.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        quality[media_type.strip().lower()] = q
+    msgpack_q = max(quality.get(t, 0.0) for t in MSGPACK_TYPES)
+    json_q = max(quality.get(t, 0.0) for t in ("application/json", "application/*", "*/*"))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def parse_payload(body: bytes, content_type: Optional[str], model: Type[M]) -> M:
+    """
+    Decodes a JSON or msgpack request body into `model`.
+
+    The opaque `data` field is only checked to be an object with string
+    keys: pydantic validates the envelope, but never walks or copies the
+    render data, which is passed to the renderer as decoded.
+
+    Raises:
+        RequestValidationError: With the same error shape FastAPI uses for
+            invalid bodies, so clients see a regular 422.
+    """
+    try:
+        if is_msgpack(content_type):
+            payload = msgpack.unpackb(body, timestamp=3)
+        else:
+            payload = json.loads(body)
+    except (ValueError, msgpack.UnpackException) as e:
+        raise RequestValidationError([{
+            "type": "value_error", "loc": ("body",), "msg": f"Could not decode request body: {e}", "input": None
+        }])
+
+    if not isinstance(payload, dict):
+        raise RequestValidationError([{
+            "type": "model_attributes_type", "loc": ("body",), "msg": "Input should be an object", "input": payload
+        }])
+    data = payload.pop("data", _MISSING)
+    if data is not _MISSING and not (isinstance(data, dict) and all(isinstance(key, str) for key in data)):
+        raise RequestValidationError([{
+            "type": "dict_type", "loc": ("body", "data"), "msg": "Input should be an object with string keys", "input": None
+        }])
+
+    try:
+        parsed = model.model_validate(payload)
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+        ])
+    if data is not _MISSING:
+        parsed.data = data
+    return parsed
+
+
+def request_body(model: Type[M]) -> Callable[[Request], Awaitable[M]]:
+    """
+    Dependency parsing the request body into `model` via `parse_payload`.
+    Pair with `request_body_docs(model)` as the route's openapi_extra.
+    """
+    async def dependency(request: Request) -> M:
+        return parse_payload(await request.body(), request.headers.get("content-type"), model)
+    return dependency
+
+
+def _inline_refs(schema: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _inline_refs(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+        return {key: _inline_refs(value, defs) for key, value in schema.items() if key != "$defs"}
+    if isinstance(schema, list):
+        return [_inline_refs(item, defs) for item in schema]
+    return schema
+
+
+def request_body_docs(model: Type[BaseModel]) -> Dict[str, Any]:
+    schema = model.model_json_schema()
+    schema = _inline_refs(schema, schema.get("$defs", {}))
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": schema},
+        MSGPACK: {"schema": schema},
+    }}}
+
+
+def negotiated(request: Request, model: BaseModel, exclude_unset: bool = False) -> Union[BaseModel, Response]:
+    """
+    Returns the model as msgpack when the client prefers it, or unchanged
+    for FastAPI to serialise as JSON.
+    """
+    if prefers_msgpack(request.headers.get("accept")):
+        return Response(
+            msgpack.packb(model.model_dump(mode="json", exclude_unset=exclude_unset)),
+            media_type=MSGPACK,
+        )
+    return model
@@ -0,0 +1,43 @@
+from typing import List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.loop_monitor import loop_monitor
+from app.core.profiling import profile_store
+from app.core.security import verify_admin_key
+
+router = APIRouter(dependencies=[Depends(verify_admin_key)])
+
+
+@router.get("/")
+async def list_profiles() -> List[dict]:
+    """
+    Lists the retained request profiles, newest first.
+    """
+    return [profile.summary() for profile in profile_store.list()]
+
+
+@router.get("/loop-blocks")
+async def list_loop_blocks() -> List[dict]:
+    """
+    Lists the event loop stalls caught by the blocking detector, newest
+    first, with the stack that held the loop. Empty unless
+    LOOP_BLOCK_DETECTOR is on.
+    """
+    return loop_monitor.recent()
+
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, kind: Literal["cpu", "memory"] = "cpu") -> str:
+    """
+    Returns a profile as folded stacks, ready for flamegraph.pl or
+    speedscope: sample counts for `cpu`, retained bytes for `memory`.
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    folded = profile.folded(kind)
+    if folded is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profile has no {kind} data")
+    return folded
@@ -1,45 +1,289 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.deps import get_db
-from app.domain.templates.schemas import RenderRequest, RenderResponse
+from app.api.v1.negotiation import negotiated, request_body, request_body_docs
+from app.domain.templates.models import RenderPart
+from app.domain.templates.schemas import (
+    RenderRequest, RenderResponse,
+    MultiChannelRenderRequest, MultiChannelRenderResponse, ChannelRenderResult
+)
 from app.domain.templates.services import TemplateService
+from app.core.admission import AdmissionRejected, Ticket, render_admission
+from app.core.capture import redact, traffic_capture
+from app.core.config import settings
 from app.core.security import verify_service_token
-from app.domain.templates.exceptions import InvalidTemplateSyntax
+from app.domain.templates.exceptions import (
+    TemplateException, InvalidTemplateSyntax,
+    MissingTemplateVariables, InvalidTemplateData,
+    RenderBudgetExceeded
+)
 
 router = APIRouter(dependencies=[Depends(verify_service_token)])
 
 
-@router.post("/", response_model=RenderResponse)
+def _http_error(e: TemplateException) -> HTTPException:
+    if isinstance(e, InvalidTemplateData):
+        return HTTPException(status_code=422, detail={"message": e.detail, "errors": e.errors})
+    if isinstance(e, RenderBudgetExceeded):
+        return HTTPException(status_code=422, detail={"message": e.detail, "limit": e.limit})
+    if isinstance(e, MissingTemplateVariables):
+        return HTTPException(status_code=400, detail={"message": e.detail, "missing": e.missing})
+    return HTTPException(status_code=400, detail=str(e))
+
+
+async def _admit(tenant_id: Optional[str]) -> Ticket:
+    try:
+        return await render_admission.acquire(tenant_id)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+
+def _rendered_parts(result: dict) -> dict:
+    return {part.value: result[part.value] for part in RenderPart if part.value in result}
+
+
+@contextmanager
+def _captured(request: RenderRequest) -> Iterator[Optional[dict]]:
+    """
+    Yields the capture entry of a sampled request, or None. The handler
+    adds the outcome to it; status and timing are added on the way out,
+    including for requests ending in an HTTP error.
+    """
+    if not traffic_capture.sampled():
+        yield None
+        return
+
+    data, redacted = redact(request.data, settings.CAPTURE_REDACT_FIELDS)
+    entry = {
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "request": {**request.model_dump(mode="json", exclude={"data"}, exclude_unset=True), "data": data},
+        "redacted": redacted,
+    }
+    start = time.perf_counter()
+    status = 500
+    try:
+        yield entry
+        status = 200
+    except HTTPException as e:
+        status = e.status_code
+        raise
+    finally:
+        entry["status"] = status
+        entry["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        traffic_capture.record(entry)
+
+
+def _output_digests(parts: dict) -> dict:
+    # Rendered output carries the same personal data, so only digests are kept
+    return {part: hashlib.sha256(text.encode("utf-8")).hexdigest() for part, text in parts.items() if text is not None}
+
+
+def _json_seq(record: dict) -> bytes:
+    # RFC 7464: each JSON text is preceded by RS and followed by LF
+    return b"\x1e" + json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _stream_records(header: dict, chunks: Iterator[Tuple[str, str]]) -> Iterator[bytes]:
+    """
+    Coalesces generated chunks into records of about
+    RENDER_STREAM_CHUNK_CHARS so small Jinja output fragments do not each
+    become a record.
+    """
+    yield _json_seq(header)
+
+    current, buffer, size = None, [], 0
+    try:
+        for part, chunk in chunks:
+            if part != current or size >= settings.RENDER_STREAM_CHUNK_CHARS:
+                if buffer:
+                    yield _json_seq({"part": current, "chunk": "".join(buffer)})
+                current, buffer, size = part, [], 0
+            buffer.append(chunk)
+            size += len(chunk)
+        if buffer:
+            yield _json_seq({"part": current, "chunk": "".join(buffer)})
+    except TemplateException as e:
+        # The status line is already sent; report the failure in-band
+        error = _http_error(e)
+        yield _json_seq({"error": {"status": error.status_code, "detail": error.detail}})
+        return
+    yield _json_seq({"done": True})
+
+
+async def _released(records: Iterator[bytes], ticket: Ticket) -> AsyncIterator[bytes]:
+    # Records are generated in the threadpool; the admission slot is held
+    # until the stream ends rather than until the handler returns
+    try:
+        async for record in iterate_in_threadpool(records):
+            yield record
+    finally:
+        ticket.release()
+
+
+# Render endpoints accept JSON or msgpack bodies and answer in msgpack when the
+# Accept header prefers it. Bodies are parsed without validating the opaque data.
+@router.post(
+    "/", response_model=RenderResponse, response_model_exclude_unset=True,
+    openapi_extra=request_body_docs(RenderRequest)
+)
 async def render_template(
-    request: RenderRequest,
+    http_request: Request,
+    request: RenderRequest = Depends(request_body(RenderRequest)),
     db: AsyncSession = Depends(get_db)
 ):
     service = TemplateService(db)
     
     strict = request.options.get("strict", True)
     
+    with _captured(request) as capture:
+        ticket = await _admit(request.tenant_id)
+        try:
+            result = await service.resolve_and_render(
+                key=request.template_key,
+                channel=request.channel,
+                tenant_id=request.tenant_id,
+                language=request.language,
+                data=request.data,
+                strict=strict,
+                parts=request.parts
+            )
+        except (InvalidTemplateData, MissingTemplateVariables, RenderBudgetExceeded, InvalidTemplateSyntax) as e:
+            raise _http_error(e)
+        finally:
+            ticket.release()
+
+        if not result:
+            raise HTTPException(status_code=404, detail="Template not found for these criteria")
+
+        parts = _rendered_parts(result)
+        if capture is not None:
+            capture.update(
+                language_used=result["version"].language,
+                version=result["version"].version,
+                output_sha256=_output_digests(parts),
+            )
+
+    response = RenderResponse(
+        template_key=request.template_key,
+        channel=request.channel,
+        language_used=result["version"].language,
+        version=result["version"].version,
+        **parts
+    )
+    return negotiated(http_request, response, exclude_unset=True)
+
+
+@router.post("/stream", openapi_extra=request_body_docs(RenderRequest))
+async def render_template_stream(
+    request: RenderRequest = Depends(request_body(RenderRequest)),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Renders like POST / but streams the output as it is generated, so large
+    bodies are never held in memory whole.
+
+    The response is a JSON text sequence (application/json-seq): a header
+    record with the resolved version and the parts that follow, then
+    {"part", "chunk"} records in part order whose chunks concatenate to
+    each part, then {"done": true}. Failures during rendering end the
+    stream with an {"error": {"status", "detail"}} record instead.
+    """
+    service = TemplateService(db)
+
+    strict = request.options.get("strict", True)
+
+    ticket = await _admit(request.tenant_id)
     try:
-        result = await service.resolve_and_render(
+        result = await service.resolve_and_stream(
             key=request.template_key,
             channel=request.channel,
             tenant_id=request.tenant_id,
             language=request.language,
             data=request.data,
-            strict=strict
+            strict=strict,
+            parts=request.parts
         )
-    except InvalidTemplateSyntax as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    except (InvalidTemplateData, MissingTemplateVariables, InvalidTemplateSyntax) as e:
+        ticket.release()
+        raise _http_error(e)
+    except BaseException:
+        ticket.release()
+        raise
 
     if not result:
+        ticket.release()
         raise HTTPException(status_code=404, detail="Template not found for these criteria")
 
-    return RenderResponse(
-        template_key=request.template_key,
-        channel=request.channel,
-        language_used=result["version"].language,
-        version=result["version"].version,
-        subject=result["subject"],
-        body_html=result["body_html"],
-        body_text=result["body_text"]
-    )
+    version, chunks = result
+    header = {
+        "template_key": request.template_key,
+        "channel": request.channel.value,
+        "language_used": version.language,
+        "version": version.version,
+        "parts": service.parts_for(request.channel, request.parts),
+    }
+    return StreamingResponse(_released(_stream_records(header, chunks), ticket), media_type="application/json-seq")
+
+
+@router.post(
+    "/channels", response_model=MultiChannelRenderResponse, response_model_exclude_unset=True,
+    openapi_extra=request_body_docs(MultiChannelRenderRequest)
+)
+async def render_template_channels(
+    http_request: Request,
+    request: MultiChannelRenderRequest = Depends(request_body(MultiChannelRenderRequest)),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Renders the same event for several channels in one call.
+    """
+    service = TemplateService(db)
+
+    strict = request.options.get("strict", True)
+    channels = list(dict.fromkeys(request.channels))
+
+    ticket = await _admit(request.tenant_id)
+    try:
+        results = await service.resolve_and_render_channels(
+            key=request.template_key,
+            channels=channels,
+            tenant_id=request.tenant_id,
+            language=request.language,
+            data=request.data,
+            strict=strict,
+            parts=request.parts
+        )
+    finally:
+        ticket.release()
+
+    items = []
+    for channel in channels:
+        result = results[channel]
+        if result is None:
+            items.append(ChannelRenderResult(
+                channel=channel, status=404, error="Template not found for these criteria"
+            ))
+        elif isinstance(result, TemplateException):
+            error = _http_error(result)
+            items.append(ChannelRenderResult(channel=channel, status=error.status_code, error=error.detail))
+        else:
+            items.append(ChannelRenderResult(
+                channel=channel,
+                status=200,
+                language_used=result["version"].language,
+                version=result["version"].version,
+                **_rendered_parts(result)
+            ))
+
+    response = MultiChannelRenderResponse(template_key=request.template_key, results=items)
+    return negotiated(http_request, response, exclude_unset=True)
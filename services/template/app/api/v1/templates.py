@@ -1,26 +1,30 @@
 import uuid
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.api.v1.deps import get_db
+from app.api.v1.deps import get_admin_db, get_admin_sessionmaker
+from app.api.v1.lanes import admin_lane
 from app.domain.templates.models import (
     Template, TemplateCreate,
     TemplateVersion, TemplateVersionCreate,
     ChannelType, TemplateWithVersions
 )
-from app.domain.templates.schemas import PreviewContentRequest, PreviewContentResponse
+from app.domain.templates.schemas import PreviewContentRequest, PreviewContentResponse, PublishVersionRequest
 from app.core.security import verify_admin_key
 from app.domain.templates.services import TemplateService
+from app.domain.templates import bulk
 from app.domain.templates.exceptions import (
     TemplateNotFound, VersionNotFound, 
-    DuplicateTemplateError, InvalidTemplateSyntax
+    DuplicateTemplateError, InvalidTemplateSyntax,
+    RenderBudgetExceeded, RenderCostRegression, InvalidImport, DependencyCycle
 )
 
 # Apply security to all routes in this router
-router = APIRouter(dependencies=[Depends(verify_admin_key)])
+router = APIRouter(dependencies=[Depends(verify_admin_key), Depends(admin_lane)])
 
 
 @router.get("/", response_model=List[Template])
@@ -30,7 +34,7 @@ async def list_templates(
     category: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     return await service.list_templates(tenant_id, channel, category, skip, limit)
@@ -40,7 +44,7 @@ async def list_templates(
 @router.post("/", response_model=Template)
 async def create_template(
     template_in: TemplateCreate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     try:
@@ -55,7 +59,7 @@ async def list_email_templates(
     category: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     return await service.list_templates(tenant_id, ChannelType.EMAIL, category, skip, limit)
@@ -67,7 +71,7 @@ async def list_sms_templates(
     category: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     return await service.list_templates(tenant_id, ChannelType.SMS, category, skip, limit)
@@ -79,17 +83,48 @@ async def list_push_templates(
     category: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     return await service.list_templates(tenant_id, ChannelType.PUSH, category, skip, limit)
 
 
+@router.get("/export")
+async def export_templates(
+    tenant_id: Optional[str] = None,
+    channel: Optional[ChannelType] = None,
+    session_factory: async_sessionmaker = Depends(get_admin_sessionmaker)
+):
+    """
+    Streams templates with all of their versions as NDJSON, one template
+    per line, in the format POST /import takes.
+    """
+    return StreamingResponse(
+        bulk.export_templates(session_factory, tenant_id, channel), media_type="application/x-ndjson"
+    )
+
+
+@router.post("/import")
+async def import_templates(
+    request: Request,
+    tenant_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_admin_db)
+):
+    """
+    Imports an NDJSON export in one transaction, into `tenant_id` if given.
+    Versions are appended after existing ones; any invalid line rejects
+    the whole import.
+    """
+    try:
+        return await bulk.import_templates(db, request.stream(), tenant_id)
+    except InvalidImport as e:
+        raise HTTPException(status_code=422, detail={"message": e.detail, "errors": e.errors})
+
 
 @router.get("/{id}", response_model=TemplateWithVersions)
 async def get_template(
     id: uuid.UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     try:
@@ -101,7 +136,7 @@ async def get_template(
 @router.delete("/{id}")
 async def delete_template(
     id: uuid.UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     try:
@@ -115,7 +150,7 @@ async def delete_template(
 async def create_version(
     id: uuid.UUID,
     version_in: TemplateVersionCreate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     try:
@@ -127,7 +162,7 @@ async def create_version(
 @router.get("/{id}/versions", response_model=List[TemplateVersion])
 async def list_versions(
     id: uuid.UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     try:
@@ -140,29 +175,57 @@ async def list_versions(
 async def publish_version(
     id: uuid.UUID,
     version_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db)
+    publish_in: Optional[PublishVersionRequest] = None,
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
+    sample_data = publish_in.sample_data if publish_in else None
     try:
-        ver = await service.publish_version(id, version_id)
-        return {"status": "published", "version": ver.version}
+        ver = await service.publish_version(id, version_id, sample_data)
+        return {"status": "published", "version": ver.version, "cost_profile": ver.cost_profile}
     except VersionNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except DependencyCycle as e:
+        raise HTTPException(status_code=422, detail={"message": e.detail, "cycle": e.cycle})
+    except RenderBudgetExceeded as e:
+        raise HTTPException(status_code=422, detail={"message": e.detail, "limit": e.limit})
+    except RenderCostRegression as e:
+        raise HTTPException(status_code=400, detail={
+            "message": e.detail, "previous_ms": e.previous_ms, "current_ms": e.current_ms
+        })
     except InvalidTemplateSyntax as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/{id}/versions/{version_id}/profile")
+async def get_version_profile(
+    id: uuid.UUID,
+    version_id: uuid.UUID,
+    db: AsyncSession = Depends(get_admin_db)
+):
+    service = TemplateService(db)
+    try:
+        profile = await service.get_cost_profile(id, version_id)
+    except VersionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Version has not been profiled")
+    return profile
+
+
 @router.post("/{id}/versions/{version_id}/preview")
 async def preview_version(
     id: uuid.UUID,
     version_id: uuid.UUID,
     data: dict,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_admin_db)
 ):
     service = TemplateService(db)
     try:
         return await service.preview_version(id, version_id, data)
     except VersionNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except RenderBudgetExceeded as e:
+        raise HTTPException(status_code=422, detail={"message": e.detail, "limit": e.limit})
 
 
@@ -0,0 +1,103 @@
+"""
+Command line client for the bulk template endpoints, for onboarding a
+tenant or copying templates between environments.
+
+Export streams GET /api/v1/templates/export to a file or stdout; import
+streams a file or stdin to POST /api/v1/templates/import. Neither holds the
+whole export in memory.
+
+Usage (with ADMIN_API_KEY set, or --admin-key):
+    python -m app.cli export --url http://localhost:8000 [--tenant-id acme]
+        [--channel email] [-o acme.ndjson]
+    python -m app.cli import acme.ndjson --url http://staging:8000 [--tenant-id acme-copy]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import BinaryIO, Iterator
+
+import httpx
+
+EXPORT_PATH = "/api/v1/templates/export"
+IMPORT_PATH = "/api/v1/templates/import"
+CHUNK_SIZE = 64 * 1024
+
+
+def _chunks(stream: BinaryIO) -> Iterator[bytes]:
+    while chunk := stream.read(CHUNK_SIZE):
+        yield chunk
+
+
+def export(client: httpx.Client, args: argparse.Namespace) -> int:
+    params = {name: value for name, value in (("tenant_id", args.tenant_id), ("channel", args.channel)) if value}
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    templates = 0
+    try:
+        with client.stream("GET", EXPORT_PATH, params=params) as response:
+            if response.status_code != 200:
+                response.read()
+                print(f"export failed: HTTP {response.status_code} {response.text}", file=sys.stderr)
+                return 1
+            for chunk in response.iter_bytes():
+                out.write(chunk)
+                templates += chunk.count(b"\n")
+    finally:
+        if args.output:
+            out.close()
+    print(f"exported {templates} templates", file=sys.stderr)
+    return 0
+
+
+def import_(client: httpx.Client, args: argparse.Namespace) -> int:
+    params = {"tenant_id": args.tenant_id} if args.tenant_id else {}
+    source = open(args.input, "rb") if args.input != "-" else sys.stdin.buffer
+    try:
+        response = client.post(
+            IMPORT_PATH, params=params, content=_chunks(source), headers={"Content-Type": "application/x-ndjson"}
+        )
+    finally:
+        if args.input != "-":
+            source.close()
+    if response.status_code == 422:
+        detail = response.json()["detail"]
+        print(f"import rejected: {detail['message']}", file=sys.stderr)
+        for error in detail["errors"]:
+            print(f"  line {error['line']}: {json.dumps(error['errors'])}", file=sys.stderr)
+        return 1
+    if response.status_code != 200:
+        print(f"import failed: HTTP {response.status_code} {response.text}", file=sys.stderr)
+        return 1
+    counts = response.json()
+    print(f"created {counts['templates_created']} and updated {counts['templates_updated']} templates, "
+          f"imported {counts['versions']} versions", file=sys.stderr)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="base URL of the template service")
+    # Read from the environment directly: the client needs none of the service's settings
+    parser.add_argument("--admin-key", default=os.environ.get("ADMIN_API_KEY"), help="defaults to ADMIN_API_KEY")
+    parser.add_argument("--timeout", type=float, default=300.0, help="in seconds")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="write templates and versions as NDJSON")
+    export_parser.add_argument("--tenant-id", help="only this tenant's templates")
+    export_parser.add_argument("--channel", choices=("email", "sms", "push"))
+    export_parser.add_argument("-o", "--output", help="file to write; stdout by default")
+
+    import_parser = commands.add_parser("import", help="import an NDJSON export")
+    import_parser.add_argument("input", help="export file, or - for stdin")
+    import_parser.add_argument("--tenant-id", help="import into this tenant instead of the exported ones")
+    args = parser.parse_args()
+    if not args.admin_key:
+        parser.error("--admin-key or ADMIN_API_KEY is required")
+
+    with httpx.Client(base_url=args.url, headers={"X-Admin-Key": args.admin_key}, timeout=args.timeout) as client:
+        command = export if args.command == "export" else import_
+        sys.exit(command(client, args))
+
+
+if __name__ == "__main__":
+    main()
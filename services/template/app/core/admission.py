@@ -0,0 +1,271 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, fields, replace
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED, tenant_label
+
+# Tenant state is dropped once idle; the table is swept for idle tenants when
+# it reaches this size, or twice its size after the last sweep if larger
+TENANT_SWEEP_THRESHOLD = 1024
+
+
+@dataclass(frozen=True)
+class TenantLimits:
+    """
+    Admission limits of one tenant. None disables a limit.
+    """
+    concurrency: Optional[int] = 16
+    max_queue: int = 32
+    # Renders per second and bucket size; the burst defaults to one second of rate
+    rate: Optional[float] = None
+    burst: Optional[float] = None
+
+
+class AdmissionRejected(Exception):
+    """
+    A render was shed. `status_code` is 429 when the tenant went over its
+    own limits and 503 when the service as a whole is saturated.
+    """
+
+    def __init__(self, status_code: int, reason: str, retry_after: float, detail: str):
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.detail = detail
+        super().__init__(detail)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """
+        Takes a token. Returns 0 on success, otherwise the seconds until a
+        token will be available.
+        """
+        self.tokens = self.level(now)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def level(self, now: float) -> float:
+        return min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+
+
+class _Tenant:
+    __slots__ = ("label", "limits", "bucket", "active", "waiting")
+
+    def __init__(self, label: str, limits: TenantLimits, now: float):
+        self.label = label
+        self.limits = limits
+        self.bucket = None
+        if limits.rate:
+            self.bucket = TokenBucket(limits.rate, max(1.0, limits.burst or limits.rate), now)
+        self.active = 0
+        self.waiting = 0
+
+    def idle(self, now: float) -> bool:
+        """
+        True when dropping this state loses nothing: no renders in flight or
+        queued, and a full bucket, as a new tenant would have.
+        """
+        if self.active or self.waiting:
+            return False
+        return self.bucket is None or self.bucket.level(now) >= self.bucket.capacity
+
+
+class Ticket:
+    """
+    An admitted render's slot. Release it exactly once when the render is
+    done; further calls are ignored.
+    """
+    __slots__ = ("_release",)
+
+    def __init__(self, release: Callable[[], None]):
+        self._release: Optional[Callable[[], None]] = release
+
+    def release(self) -> None:
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+class AdmissionController:
+    """
+    Decides whether a render may start now, wait, or be shed.
+
+    Each tenant has a token bucket (requests per second) and a concurrency
+    cap; the service has a global concurrency cap. Requests over a rate are
+    shed at once. Requests over a concurrency cap wait in a bounded FIFO
+    queue until a slot frees up or their deadline passes, and are shed when
+    the queue is full. Slots go to the oldest waiter whose tenant is under
+    its cap, so one tenant's backlog never blocks the others.
+
+    Shedding early keeps latency bounded: a render that would only start
+    after its caller gave up is better refused with a Retry-After.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        tenant_limits: TenantLimits,
+        overrides: Optional[Dict[str, Dict[str, float]]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.tenant_limits = tenant_limits
+        self.overrides = overrides or {}
+        self.clock = clock
+        known = {f.name for f in fields(TenantLimits)}
+        for tenant_id, limits in self.overrides.items():
+            unknown = set(limits) - known
+            if unknown:
+                raise ValueError(f"Unknown admission limits for '{tenant_id}': {', '.join(sorted(unknown))}")
+
+        self.active = 0
+        self._tenants: Dict[Optional[str], _Tenant] = {}
+        self._sweep_at = TENANT_SWEEP_THRESHOLD
+        self._waiters: Deque[Tuple[_Tenant, asyncio.Future]] = deque()
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            tenant_limits=TenantLimits(
+                concurrency=settings.ADMISSION_TENANT_CONCURRENCY,
+                max_queue=settings.ADMISSION_TENANT_MAX_QUEUE,
+                rate=settings.ADMISSION_TENANT_RATE,
+                burst=settings.ADMISSION_TENANT_BURST,
+            ),
+            overrides=settings.ADMISSION_TENANT_OVERRIDES,
+        )
+
+    def _tenant(self, tenant_id: Optional[str]) -> _Tenant:
+        tenant = self._tenants.get(tenant_id)
+        if tenant is None:
+            limits = self.tenant_limits
+            if tenant_id in self.overrides:
+                limits = replace(limits, **self.overrides[tenant_id])
+            if len(self._tenants) >= self._sweep_at:
+                self._sweep()
+            tenant = self._tenants[tenant_id] = _Tenant(tenant_label(tenant_id), limits, self.clock())
+        return tenant
+
+    def _sweep(self) -> None:
+        # Renders in flight or queued keep a reference to their tenant, so
+        # only idle tenants can go; the threshold keeps sweeps amortised O(1)
+        now = self.clock()
+        self._tenants = {tenant_id: tenant for tenant_id, tenant in self._tenants.items() if not tenant.idle(now)}
+        self._sweep_at = max(TENANT_SWEEP_THRESHOLD, 2 * len(self._tenants))
+
+    def _under_tenant_cap(self, tenant: _Tenant) -> bool:
+        return tenant.limits.concurrency is None or tenant.active < tenant.limits.concurrency
+
+    def _shed(self, tenant: _Tenant, status_code: int, reason: str, retry_after: float, detail: str) -> AdmissionRejected:
+        ADMISSION_SHED.labels(tenant=tenant.label, reason=reason).inc()
+        return AdmissionRejected(status_code, reason, retry_after, detail)
+
+    def _grant(self, tenant: _Tenant) -> Ticket:
+        self.active += 1
+        tenant.active += 1
+        ADMISSION_IN_FLIGHT.labels(tenant=tenant.label).inc()
+        return Ticket(lambda: self._release(tenant))
+
+    def _release(self, tenant: _Tenant) -> None:
+        self.active -= 1
+        tenant.active -= 1
+        ADMISSION_IN_FLIGHT.labels(tenant=tenant.label).dec()
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        # Hand free slots to the oldest waiters whose tenant has room
+        remaining: Deque[Tuple[_Tenant, asyncio.Future]] = deque()
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            tenant, future = waiter
+            if future.done():
+                # Timed out or cancelled while waiting
+                continue
+            if self.active < self.max_concurrency and self._under_tenant_cap(tenant):
+                future.set_result(self._grant(tenant))
+            else:
+                remaining.append(waiter)
+        self._waiters = remaining
+
+    async def acquire(self, tenant_id: Optional[str]) -> Ticket:
+        """
+        Waits for a render slot for `tenant_id`.
+
+        Raises:
+            AdmissionRejected: If the render is shed.
+        """
+        tenant = self._tenant(tenant_id)
+        if tenant.bucket is not None:
+            wait = tenant.bucket.take(self.clock())
+            if wait:
+                raise self._shed(tenant, 429, "rate_limited", wait, "Render rate limit exceeded for this tenant")
+
+        if self.active < self.max_concurrency and self._under_tenant_cap(tenant):
+            return self._grant(tenant)
+
+        if tenant.waiting >= tenant.limits.max_queue:
+            raise self._shed(
+                tenant, 429, "tenant_queue_full", self.queue_timeout, "Too many queued renders for this tenant"
+            )
+        if len(self._waiters) >= self.max_queue:
+            raise self._shed(tenant, 503, "queue_full", self.queue_timeout, "Render queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (tenant, future)
+        self._waiters.append(waiter)
+        tenant.waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(tenant=tenant.label).inc()
+        try:
+            return await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Over its own cap the tenant waited on itself, otherwise on everyone
+            if not self._under_tenant_cap(tenant):
+                raise self._shed(
+                    tenant, 429, "deadline", self.queue_timeout, "Timed out waiting behind this tenant's renders"
+                )
+            raise self._shed(tenant, 503, "deadline", self.queue_timeout, "Timed out waiting for a render slot")
+        except BaseException:
+            # Cancelled by the caller; give back a slot granted meanwhile
+            if future.done() and not future.cancelled():
+                future.result().release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            tenant.waiting -= 1
+            ADMISSION_QUEUE_DEPTH.labels(tenant=tenant.label).dec()
+
+    @asynccontextmanager
+    async def admit(self, tenant_id: Optional[str]) -> AsyncIterator[None]:
+        ticket = await self.acquire(tenant_id)
+        try:
+            yield
+        finally:
+            ticket.release()
+
+
+render_admission = AdmissionController.from_settings()
@@ -0,0 +1,171 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional, TextIO, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import CAPTURED_REQUESTS
+
+REDACTED = "*"
+
+
+def redact(value: Any, fields: Iterable[str]) -> Tuple[Any, bool]:
+    """
+    Returns a copy of `value` in which every value under a key named in
+    `fields` (case-insensitive, at any depth) is masked, and whether
+    anything was. Masking keeps the shape and size of the data: strings
+    become asterisks of the same length, numbers zero, and containers are
+    masked element by element.
+    """
+    names = {field.lower() for field in fields}
+    masked = False
+
+    def mask(item: Any) -> Any:
+        if isinstance(item, str):
+            return REDACTED * len(item)
+        if isinstance(item, bool) or item is None:
+            return item
+        if isinstance(item, (int, float)):
+            return type(item)(0)
+        if isinstance(item, dict):
+            return {key: mask(child) for key, child in item.items()}
+        if isinstance(item, (list, tuple)):
+            return [mask(child) for child in item]
+        return REDACTED
+
+    def walk(item: Any) -> Any:
+        nonlocal masked
+        if isinstance(item, dict):
+            result = {}
+            for key, child in item.items():
+                if isinstance(key, str) and key.lower() in names:
+                    masked = True
+                    result[key] = mask(child)
+                else:
+                    result[key] = walk(child)
+            return result
+        if isinstance(item, (list, tuple)):
+            return [walk(child) for child in item]
+        return item
+
+    return walk(value), masked
+
+
+class TrafficCapture:
+    """
+    Writes a `rate` share of render requests to NDJSON files in `directory`
+    for later replay (see benchmarks/replay_capture.py).
+
+    Records are queued and written by a thread started on the first one, so
+    requests never wait on the disk; when the bounded queue is full they
+    are dropped and counted. A file is closed once it reaches `max_bytes`
+    and the oldest files beyond `keep` are deleted. Files are named by the
+    time they were opened, so they sort in capture order.
+    """
+
+    def __init__(self, directory: str, rate: float, max_bytes: int, keep: int, queue_size: int = 1000):
+        if keep < 1:
+            # The file being written counts, so at least one is kept
+            raise ValueError(f"Traffic capture must keep at least one file, not {keep}")
+        self.directory = directory
+        self.rate = rate
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._file: Optional[TextIO] = None
+        self._written = 0
+
+    def sampled(self) -> bool:
+        return self.rate > 0 and random.random() < self.rate
+
+    def record(self, entry: dict) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            CAPTURED_REQUESTS.labels(outcome="dropped").inc()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            try:
+                line = json.dumps(entry, default=str, ensure_ascii=False) + "\n"
+            except (TypeError, ValueError) as e:
+                # e.g. non-string map keys from msgpack; skip just this record
+                CAPTURED_REQUESTS.labels(outcome="dropped").inc()
+                logger.warning(f"Traffic capture could not serialise a record: {e}")
+                continue
+            try:
+                self._write(line)
+                CAPTURED_REQUESTS.labels(outcome="written").inc()
+            except OSError as e:
+                CAPTURED_REQUESTS.labels(outcome="dropped").inc()
+                logger.warning(f"Traffic capture could not write to {self.directory}: {e}")
+            if self._queue.empty() and self._file is not None:
+                self._file.flush()
+        self._close()
+
+    def _write(self, line: str) -> None:
+        if self._file is None or self._written >= self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._written += len(line.encode("utf-8"))
+
+    def _rotate(self) -> None:
+        self._close()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        self._file = open(os.path.join(self.directory, f"render-{stamp}.ndjson"), "a", encoding="utf-8")
+        self._written = 0
+        for old in self.files()[:-self.keep]:
+            os.remove(old)
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def files(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.startswith("render-") and name.endswith(".ndjson")
+        )
+
+    def stop(self) -> None:
+        """
+        Writes out the queued records and stops the writer thread.
+        """
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+
+traffic_capture = TrafficCapture(
+    directory=settings.CAPTURE_DIR,
+    rate=settings.CAPTURE_SAMPLE_RATE,
+    max_bytes=settings.CAPTURE_MAX_FILE_BYTES,
+    keep=settings.CAPTURE_KEEP_FILES,
+)
+
+atexit.register(traffic_capture.stop)
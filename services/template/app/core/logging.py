@@ -1,9 +1,31 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+import threading
+from typing import Optional, TextIO, Tuple
+
 from loguru import logger
 from app.core.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
 from asgi_correlation_id import correlation_id
 
+def _caller_from_stdlib(record):
+    # The standard record already knows its caller, so no frames are walked
+    stdlib_record = record["extra"].pop("stdlib_record", None)
+    if stdlib_record is not None:
+        record["name"] = stdlib_record.name
+        record["function"] = stdlib_record.funcName
+        record["line"] = stdlib_record.lineno
+        record["module"] = stdlib_record.module
+        record["file"] = type(record["file"])(stdlib_record.filename, stdlib_record.pathname)
+
+
+_stdlib_logger = logger.patch(_caller_from_stdlib)
+
+
 class InterceptHandler(logging.Handler):
     def emit(self, record):
         # Get corresponding Loguru level if it exists
@@ -12,21 +34,150 @@ class InterceptHandler(logging.Handler):
         except ValueError:
             level = record.levelno
 
-        # Find caller from where originated the logged message
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
+        _stdlib_logger.bind(stdlib_record=record).opt(exception=record.exc_info).log(level, record.getMessage())
+
+
+class SampledLoggers(logging.Filter):
+    """
+    Keeps a `rate` share of the routine INFO and DEBUG records of the given
+    standard loggers (per-request access logs and the like). Warnings and
+    errors always pass. Runs before InterceptHandler, so dropped records
+    cost no formatting.
+    """
 
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+    def __init__(self, names: Tuple[str, ...], rate: float):
+        super().__init__()
+        self.names = names
+        self.prefixes = tuple(f"{name}." for name in names)
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        if record.name not in self.names and not record.name.startswith(self.prefixes):
+            return True
+        if random.random() < self.rate:
+            return True
+        LOG_RECORDS_DROPPED.labels(reason="sampled").inc()
+        return False
+
+
+class BackgroundSink:
+    """
+    Loguru sink handing records to a writer thread, so requests never wait
+    on stderr. Records are serialised on the writer thread in the shape of
+    loguru's `serialize=True`, one JSON object per line. When the bounded
+    queue is full, records below WARNING are dropped and counted; warnings
+    and errors wait up to `block_timeout` for room and are then written
+    from the caller's thread.
+    """
+
+    def __init__(self, stream: TextIO, max_size: int, block_timeout: float = 0.1):
+        self.stream = stream
+        self.block_timeout = block_timeout
+        self._queue: "queue.Queue[Optional[Tuple[str, dict, Optional[str]]]]" = queue.Queue(max_size)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        # The correlation id lives in the caller's context, so read it here
+        item = (str(message), message.record, correlation_id.get())
+        try:
+            self._queue.put_nowait(item)
+            return
+        except queue.Full:
+            if message.record["level"].no < logging.WARNING:
+                LOG_RECORDS_DROPPED.labels(reason="queue_full").inc()
+                return
+        try:
+            self._queue.put(item, timeout=self.block_timeout)
+        except queue.Full:
+            with self._lock:
+                self.stream.write(_json_line(*item))
+                self.stream.flush()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            with self._lock:
+                self.stream.write(_json_line(*item))
+                if self._queue.empty():
+                    self.stream.flush()
+        self.stream.flush()
+
+    def stop(self) -> None:
+        """
+        Writes out the queued records and stops the writer thread.
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+
+def _json_line(text: str, record: dict, cid: Optional[str]) -> str:
+    # Same shape as loguru's serialize=True, which log consumers parse
+    extra = dict(record["extra"])
+    if cid:
+        extra["correlation_id"] = cid
+    exception = record["exception"]
+    if exception is not None:
+        exception = {
+            "type": None if exception.type is None else exception.type.__name__,
+            "value": exception.value,
+            "traceback": bool(exception.traceback),
+        }
+    entry = {
+        "text": text,
+        "record": {
+            "elapsed": {"repr": record["elapsed"], "seconds": record["elapsed"].total_seconds()},
+            "exception": exception,
+            "extra": extra,
+            "file": {"name": record["file"].name, "path": record["file"].path},
+            "function": record["function"],
+            "level": {"icon": record["level"].icon, "name": record["level"].name, "no": record["level"].no},
+            "line": record["line"],
+            "message": record["message"],
+            "module": record["module"],
+            "name": record["name"],
+            "process": {"id": record["process"].id, "name": record["process"].name},
+            "thread": {"id": record["thread"].id, "name": record["thread"].name},
+            "time": {"repr": record["time"], "timestamp": record["time"].timestamp()},
+        },
+    }
+    return json.dumps(entry, default=str, ensure_ascii=False) + "\n"
+
+
+_background_sink: Optional[BackgroundSink] = None
+
+
+def _stop_background_sink() -> None:
+    global _background_sink
+    if _background_sink is not None:
+        _background_sink.stop()
+        _background_sink = None
+
+
+atexit.register(_stop_background_sink)
+
+
+def setup_logging(stream: TextIO = sys.stderr):
+    global _background_sink
+    # In production records are queued to a writer thread as JSON, routine
+    # per-request logs are sampled and tracebacks skip variable values
+    production = settings.ENV == "production"
 
-def setup_logging():
     # Intercept standard logging
-    logging.root.handlers = [InterceptHandler()]
+    handler = InterceptHandler()
+    if production:
+        handler.addFilter(SampledLoggers(tuple(settings.LOG_SAMPLED_LOGGERS), settings.LOG_SAMPLE_RATE))
+    logging.root.handlers = [handler]
     logging.root.setLevel(settings.LOG_LEVEL)
 
     # Remove default loguru handler
     logger.remove()
+    _stop_background_sink()
 
     # Define format
     def format_record(record):
@@ -38,13 +189,21 @@ def setup_logging():
         return "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>\n"
 
     # Add handler (JSON for prod, text for dev)
-    serialize = settings.ENV == "production"
-    
+    if production:
+        _background_sink = BackgroundSink(stream, settings.LOG_QUEUE_SIZE)
+        logger.add(
+            _background_sink,
+            level=settings.LOG_LEVEL,
+            format="{message}",
+            backtrace=False,
+            diagnose=False,
+        )
+        return
+
     logger.add(
-        sys.stderr,
+        stream,
         level=settings.LOG_LEVEL,
-        format=format_record if not serialize else "{message}",
-        serialize=serialize,
+        format=format_record,
         backtrace=True,
         diagnose=True,
     )
@@ -0,0 +1,151 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import weakref
+from contextvars import Context, copy_context
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Deque, List, Optional
+
+from asgi_correlation_id import correlation_id
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+
+
+@dataclass
+class LoopBlock:
+    started_at: datetime
+    duration_ms: float
+    correlation_id: Optional[str]
+    task: Optional[str]
+    stack: str
+
+    def summary(self) -> dict:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "correlation_id": self.correlation_id,
+            "task": self.task,
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    """
+    Measures how late the event loop wakes up a task sleeping `interval`
+    seconds, which is how long any other coroutine would have waited.
+
+    With `detect_blocking`, a watchdog thread also notices when the loop
+    stops waking up for more than `threshold` seconds, captures the loop
+    thread's stack and the correlation id of the running task, and logs
+    them once the loop recovers. The last `keep` blocks stay in `blocks`.
+    To read correlation ids from another thread it installs a task factory
+    remembering each task's context, which works on asyncio and uvloop.
+    """
+
+    def __init__(self, interval: float, detect_blocking: bool = False, threshold: float = 0.1, keep: int = 32):
+        self.interval = interval
+        self.detect_blocking = detect_blocking
+        self.threshold = threshold
+        self.blocks: Deque[LoopBlock] = deque(maxlen=keep)
+        self._last_beat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._contexts: "weakref.WeakKeyDictionary[asyncio.Task, Context]" = weakref.WeakKeyDictionary()
+        self._previous_factory = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = self._loop.create_task(self._run(), name="loop-monitor")
+        if self.detect_blocking:
+            self._previous_factory = self._loop.get_task_factory()
+            self._loop.set_task_factory(self._task_factory)
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+            self._loop.set_task_factory(self._previous_factory)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _task_factory(self, loop: asyncio.AbstractEventLoop, coro, context: Optional[Context] = None) -> asyncio.Task:
+        context = context or copy_context()
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, context=context)
+        else:
+            task = asyncio.Task(coro, loop=loop, context=context)
+        self._contexts[task] = context
+        return task
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - self.interval))
+            self._last_beat = time.monotonic()
+
+    def _watch(self) -> None:
+        # The loop is blocked when its monitor task wakes up late
+        poll = min(self.interval, self.threshold) / 2
+        stalled: Optional[dict] = None
+        while not self._stop.wait(poll):
+            late = time.monotonic() - self._last_beat - self.interval
+            if late > self.threshold and stalled is None:
+                stalled = self._capture()
+            elif late <= self.threshold and stalled is not None:
+                # The beat after the stall ends it; its wait is the duration
+                self._record(stalled)
+                stalled = None
+
+    def _capture(self) -> dict:
+        frame = sys._current_frames().get(self._loop_thread)
+        task = asyncio.current_task(self._loop)
+        started = self._last_beat + self.interval
+        return {
+            "started": started,
+            "started_at": datetime.now(timezone.utc) - timedelta(seconds=time.monotonic() - started),
+            "correlation_id": self._contexts[task].get(correlation_id) if task in self._contexts else None,
+            "task": task.get_name() if task is not None else None,
+            "stack": "".join(traceback.format_stack(frame)) if frame is not None else "",
+        }
+
+    def _record(self, stalled: dict) -> None:
+        duration = self._last_beat - stalled.pop("started")
+        block = LoopBlock(duration_ms=duration * 1000, **stalled)
+        self.blocks.append(block)
+        EVENT_LOOP_BLOCKS.inc()
+        logger.bind(correlation_id=block.correlation_id).warning(
+            f"Event loop blocked for {block.duration_ms:.0f}ms in task {block.task} "
+            f"(request {block.correlation_id or '-'}):\n{block.stack}"
+        )
+
+    def recent(self) -> List[dict]:
+        return [block.summary() for block in reversed(self.blocks)]
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+    detect_blocking=settings.LOOP_BLOCK_DETECTOR,
+    threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000,
+)
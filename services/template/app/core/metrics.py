@@ -0,0 +1,139 @@
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+# Exposed on /metrics by the Instrumentator through the default registry
+
+RENDER_BUDGET_ABORTS = Counter(
+    "template_render_budget_aborts_total",
+    "Sandboxed renders aborted for exceeding their budget",
+    ["limit", "channel"],
+)
+
+RENDER_APP_REQUESTS = Histogram(
+    "template_render_app_request_duration_seconds",
+    "Requests served by the lean render app, by route and status",
+    ["route", "status"],
+)
+
+LANE_IN_FLIGHT = Gauge(
+    "template_lane_in_flight_requests",
+    "Requests holding a slot in a request lane",
+    ["lane"],
+)
+
+LANE_REJECTIONS = Counter(
+    "template_lane_rejections_total",
+    "Requests rejected after waiting too long for a lane slot",
+    ["lane"],
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "template_admission_in_flight_renders",
+    "Admitted renders in progress, by tenant",
+    ["tenant"],
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "template_admission_queue_depth",
+    "Renders waiting for admission, by tenant",
+    ["tenant"],
+)
+
+ADMISSION_SHED = Counter(
+    "template_admission_shed_total",
+    "Renders refused by admission control, by tenant and reason",
+    ["tenant", "reason"],
+)
+
+DB_STATEMENT_SECONDS = Histogram(
+    "template_db_statement_duration_seconds",
+    "Database statement execution time, by connection pool and operation",
+    ["pool", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "template_event_loop_lag_seconds",
+    "How late the event loop ran a task that was due, sampled periodically",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+EVENT_LOOP_BLOCKS = Counter(
+    "template_event_loop_blocks_total",
+    "Times the blocking detector saw the event loop stalled past its threshold",
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "template_log_records_dropped_total",
+    "Log records not written, by reason: sampled out or queue full",
+    ["reason"],
+)
+
+CAPTURED_REQUESTS = Counter(
+    "template_captured_requests_total",
+    "Sampled render requests by outcome: written to the capture or dropped",
+    ["outcome"],
+)
+
+
+def tenant_label(tenant_id: Optional[str]) -> str:
+    """
+    Tenants listed in METRICS_TENANTS keep their id, all others share
+    "other", so the label set stays bounded as tenants are added.
+    """
+    if tenant_id is None:
+        return "shared"
+    return tenant_id if tenant_id in settings.METRICS_TENANTS else "other"
+
+
+def template_key_label(key: Optional[str]) -> str:
+    # Empty unless enabled; an empty label is the same as no label in PromQL
+    return (key or "") if settings.METRICS_TEMPLATE_KEY_LABEL else ""
+
+
+# Render path: resolution, compilation and rendering, labelled by channel,
+# tenant bucket, language used and (opt-in) template key
+_RENDER_SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+TEMPLATE_RESOLVE_SECONDS = Histogram(
+    "template_resolve_duration_seconds",
+    "Time to resolve the published version and load its layouts and partials",
+    ["channel", "tenant", "template_key"],
+    buckets=_RENDER_SECONDS_BUCKETS,
+)
+
+TEMPLATE_RESOLUTIONS = Counter(
+    "template_resolutions_total",
+    "Version resolutions by fallback depth: exact, base_language or not_found",
+    ["channel", "tenant", "fallback", "template_key"],
+)
+
+TEMPLATE_COMPILE_SECONDS = Histogram(
+    "template_compile_duration_seconds",
+    "Time to compile one part of a version",
+    ["channel", "tenant", "part"],
+    buckets=_RENDER_SECONDS_BUCKETS,
+)
+
+TEMPLATE_RENDER_SECONDS = Histogram(
+    "template_render_duration_seconds",
+    "Time to render one part, including compilation on a cache miss",
+    ["channel", "tenant", "language", "part", "template_key"],
+    buckets=_RENDER_SECONDS_BUCKETS,
+)
+
+TEMPLATE_OUTPUT_BYTES = Histogram(
+    "template_render_output_bytes",
+    "Size of one rendered part",
+    ["channel", "tenant", "language", "part", "template_key"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+TEMPLATE_RENDER_FAILURES = Counter(
+    "template_render_failures_total",
+    "Failed renders by reason: missing_variables, undefined, invalid_data, budget or error",
+    ["channel", "tenant", "language", "reason", "template_key"],
+)
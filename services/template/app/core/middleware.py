@@ -0,0 +1,77 @@
+import time
+from typing import Optional
+
+from asgi_correlation_id import correlation_id
+from prometheus_client import Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class CorrelationIdPassthrough:
+    """
+    Binds an incoming request id header to the log correlation id and
+    echoes it on the response. Unlike CorrelationIdMiddleware it never
+    generates or validates ids: internal callers already send one.
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Request-ID"):
+        self.app = app
+        self.header = header_name.lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value: Optional[bytes] = None
+        for name, header_value in scope["headers"]:
+            if name == self.header:
+                value = header_value
+                break
+        if value is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (self.header, value)]
+            await send(message)
+
+        token = correlation_id.set(value.decode("latin-1"))
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            correlation_id.reset(token)
+
+
+class RequestMetrics:
+    """
+    Records request duration by matched route template and status class in
+    a single histogram. Unmatched paths share one label value, so probing
+    random URLs cannot grow the label set.
+    """
+
+    def __init__(self, app: ASGIApp, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            self.histogram.labels(
+                route=getattr(route, "path", "unmatched"), status=f"{status // 100}xx"
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,244 @@
+import random
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import FrameType
+from typing import Deque, Dict, List, Optional
+
+from asgi_correlation_id import correlation_id
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_KEY_HEADER = b"x-admin-key"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Innermost frames of threads parked waiting for work; their samples are
+# counted as idle instead of cluttering the flamegraph
+IDLE_FRAMES = {
+    ("threading", "Condition.wait"),
+    ("threading", "Event.wait"),
+    ("queue", "Queue.get"),
+    ("selectors", "EpollSelector.select"),
+    ("selectors", "KqueueSelector.select"),
+    ("selectors", "SelectSelector.select"),
+}
+
+
+def _frame_label(frame: FrameType) -> str:
+    # Folded stacks separate frames with ";" and end with " <count>"
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_qualname}".replace(";", ",").replace(" ", "_")
+
+
+class StackSampler:
+    """
+    Statistical CPU profiler: a background thread captures every other
+    thread's stack each `interval` seconds and counts identical stacks.
+    Stacks are rooted at the thread name, so the event loop and the heavy
+    lane's worker threads show up side by side.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            self.samples += 1
+            if (frame.f_globals.get("__name__"), frame.f_code.co_qualname) in IDLE_FRAMES:
+                self.idle += 1
+                continue
+            stack: List[str] = []
+            current: Optional[FrameType] = frame
+            while current is not None:
+                stack.append(_frame_label(current))
+                current = current.f_back
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", ",").replace(" ", "_"))
+            self.stacks[";".join(reversed(stack))] += 1
+
+
+def _allocation_stacks(snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+    stacks: Dict[str, int] = {}
+    for stat in snapshot.statistics("traceback"):
+        # Tracebacks run from the oldest frame to the allocation site
+        stack = ";".join(f"{frame.filename}:{frame.lineno}".replace(";", ",").replace(" ", "_")
+                         for frame in stat.traceback)
+        stacks[stack] = stacks.get(stack, 0) + stat.size
+    return stacks
+
+
+@dataclass
+class RequestProfile:
+    id: str
+    started_at: datetime
+    method: str
+    path: str
+    correlation_id: Optional[str]
+    duration_ms: float = 0.0
+    status: int = 0
+    samples: int = 0
+    idle_samples: int = 0
+    # Folded stacks: sample counts, and bytes still allocated at the end
+    cpu: Dict[str, int] = field(default_factory=dict)
+    memory: Optional[Dict[str, int]] = None
+    memory_peak_bytes: Optional[int] = None
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "started_at": self.started_at.isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "correlation_id": self.correlation_id,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "memory": self.memory is not None,
+            "memory_peak_bytes": self.memory_peak_bytes,
+        }
+
+    def folded(self, kind: str = "cpu") -> Optional[str]:
+        """
+        Returns the profile in the folded stack format read by flamegraph.pl,
+        speedscope and inferno, or None if it holds no data of that kind.
+        """
+        stacks = self.cpu if kind == "cpu" else self.memory
+        if stacks is None:
+            return None
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+class ProfileStore:
+    """
+    Keeps the most recent profiles; older ones are dropped.
+    """
+
+    def __init__(self, size: int):
+        self._profiles: Deque[RequestProfile] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[RequestProfile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+
+profile_store = ProfileStore(settings.PROFILE_RING_SIZE)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles selected requests: those sending `X-Profile: cpu` (or
+    `memory`, which adds tracemalloc) with a valid X-Admin-Key, and a
+    PROFILE_SAMPLE_RATE share of requests under PROFILE_SAMPLE_PATH.
+
+    One request is profiled at a time, since the sampler sees the whole
+    process and tracemalloc is global; others run unprofiled meanwhile.
+    Requests that are not selected only pay for the header check.
+    Profiled responses carry the profile id in X-Profile-Id.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        self._busy = False
+
+    def _requested(self, scope: Scope) -> Optional[str]:
+        mode = admin_key = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                mode = value.decode("latin-1").strip().lower()
+            elif name == ADMIN_KEY_HEADER:
+                admin_key = value.decode("latin-1")
+        if mode in ("cpu", "memory"):
+            if settings.ADMIN_API_KEY and admin_key and secrets.compare_digest(admin_key, settings.ADMIN_API_KEY):
+                return mode
+            return None
+        rate = settings.PROFILE_SAMPLE_RATE
+        if rate and scope["path"].startswith(settings.PROFILE_SAMPLE_PATH) and random.random() < rate:
+            return "cpu"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._busy:
+            await self.app(scope, receive, send)
+            return
+        mode = self._requested(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(
+            id=uuid.uuid4().hex,
+            started_at=datetime.now(timezone.utc),
+            method=scope["method"],
+            path=scope["path"],
+            correlation_id=correlation_id.get(),
+        )
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = [*message.get("headers", ()), (PROFILE_ID_HEADER, profile.id.encode())]
+            await send(message)
+
+        self._busy = True
+        traced = mode == "memory" and not tracemalloc.is_tracing()
+        if traced:
+            tracemalloc.start(settings.PROFILE_MEMORY_FRAMES)
+        sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            profile.duration_ms = (time.perf_counter() - start) * 1000
+            if traced:
+                profile.memory_peak_bytes = tracemalloc.get_traced_memory()[1]
+                profile.memory = _allocation_stacks(tracemalloc.take_snapshot())
+                tracemalloc.stop()
+            self._busy = False
+            profile.cpu = dict(sampler.stacks)
+            profile.samples = sampler.samples
+            profile.idle_samples = sampler.idle
+            self.store.add(profile)
@@ -2,6 +2,7 @@ from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
@@ -20,7 +21,10 @@ def setup_telemetry(app):
         "deployment.environment": settings.ENV
     })
 
-    provider = TracerProvider(resource=resource)
+    # Head sampling: the decision is made once per trace, so unsampled
+    # requests only create non-recording spans
+    sampler = ParentBased(TraceIdRatioBased(settings.OTEL_TRACES_SAMPLE_RATIO))
+    provider = TracerProvider(resource=resource, sampler=sampler)
     
     # Configure OTLP Exporter if endpoint is set, otherwise maybe console or no-op
     # For now, we assume OTLP usage if enabled.
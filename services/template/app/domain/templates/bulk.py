@@ -0,0 +1,326 @@
+"""
+Bulk export and import of templates with their versions, as NDJSON: one
+line per template (BulkTemplate) holding all of its versions.
+
+Export reads through a server-side cursor and writes each template as soon
+as its last version has been read, so memory stays flat whatever the size
+of the tenant.
+
+Import reads the body line by line and works in batches: the sources of a
+batch are validated in the admin render workers in parallel, then its rows
+are copied into temporary staging tables with COPY. Once the whole body is
+staged and valid, one transaction merges it:
+
+- templates are matched on (tenant_id, key, channel); existing ones have
+  their name, description, category and email pipeline updated
+- versions are appended after the existing versions of their template and
+  language, keeping their order and status
+- an imported current version is then published through the service, as
+  POST .../publish would: what renders need (placeholders, dependencies,
+  processed HTML, cost profile) is derived from its source, never taken
+  from the body, and it must pass the publish checks. Layouts and partials
+  are published before the versions that reference them.
+
+Any invalid line or failed publish rejects the whole import and nothing is
+written.
+"""
+import json
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.domain.templates.exceptions import InvalidImport, InvalidTemplateSyntax, TemplateException
+from app.domain.templates.models import BulkTemplate, ChannelType
+from app.domain.templates.services import TemplateService, admin_renders
+from app.infrastructure.db.models.templates import Template as DBTemplate, TemplateVersion as DBTemplateVersion
+
+TEMPLATE_FIELDS = ("key", "name", "description", "channel", "tenant_id", "category", "email_pipeline")
+# Derived columns (placeholders, dependencies, cost_profile,
+# body_html_compiled) are left out: publishing computes them
+VERSION_FIELDS = (
+    "language", "version", "subject", "body_html", "body_text", "placeholders_schema", "status", "is_current",
+    "created_at", "updated_at",
+)
+SOURCE_FIELDS = ("subject", "body_html", "body_text", "placeholders_schema")
+# Columns stored as JSON, which COPY takes as text
+JSON_FIELDS = {"email_pipeline", "placeholders_schema"}
+
+STAGING_TEMPLATE_COLUMNS = (
+    "id", "tenant_id", "key", "name", "description", "channel", "category", "email_pipeline", "created_at", "updated_at"
+)
+STAGING_VERSION_COLUMNS = ("id", "template_id", *VERSION_FIELDS)
+
+# An import stops reading once it has found this many errors
+MAX_IMPORT_ERRORS = 100
+
+SessionFactory = Callable[[], Any]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _line(template: Dict[str, Any]) -> bytes:
+    return json.dumps(template, default=_json_default, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+async def export_templates(
+    session_factory: SessionFactory,
+    tenant_id: Optional[str] = None,
+    channel: Optional[ChannelType] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yields one NDJSON line per template, all templates when `tenant_id` is
+    None. Opens its own session: a streamed response outlives the request's
+    dependencies.
+    """
+    version_columns = [getattr(DBTemplateVersion, field).label(f"v_{field}") for field in VERSION_FIELDS]
+    query = (
+        select(DBTemplate.id, *(getattr(DBTemplate, field) for field in TEMPLATE_FIELDS), *version_columns)
+        .outerjoin(DBTemplateVersion, DBTemplateVersion.template_id == DBTemplate.id)
+        .order_by(DBTemplate.id, DBTemplateVersion.language, DBTemplateVersion.version)
+        .execution_options(yield_per=settings.BULK_BATCH_SIZE)
+    )
+    if tenant_id:
+        query = query.where(DBTemplate.tenant_id == tenant_id)
+    if channel:
+        query = query.where(DBTemplate.channel == channel)
+
+    async with session_factory() as session:
+        result = await session.stream(query)
+        current_id, template = None, None
+        async for row in result:
+            if row.id != current_id:
+                if template is not None:
+                    yield _line(template)
+                current_id = row.id
+                template = {field: getattr(row, field) for field in TEMPLATE_FIELDS}
+                template["versions"] = []
+            if row.v_language is not None:
+                template["versions"].append({field: getattr(row, f"v_{field}") for field in VERSION_FIELDS})
+        if template is not None:
+            yield _line(template)
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    number, pending = 0, b""
+    async for chunk in chunks:
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            number += 1
+            if line.strip():
+                yield number, line
+    if pending.strip():
+        yield number + 1, pending
+
+
+def _copy_value(field: str, value: Any) -> Any:
+    if field in JSON_FIELDS:
+        return None if value is None else json.dumps(value)
+    if field in ("channel", "status"):
+        # Enums are stored by name
+        return value.name
+    return value
+
+
+class _Importer:
+    def __init__(self, session: AsyncSession, tenant_id: Optional[str]):
+        self.session = session
+        self.tenant_id = tenant_id
+        self.errors: List[Dict[str, Any]] = []
+        self.seen: Set[Tuple[Optional[str], str, ChannelType]] = set()
+        self.templates: List[tuple] = []
+        self.versions: List[tuple] = []
+        self.sources: List[Tuple[Any, str, Any]] = []
+        # Labels of the versions to publish once merged, by version id
+        self.current: Dict[uuid.UUID, Tuple[int, str, str, int]] = {}
+        self.template_count = 0
+        self.version_count = 0
+        self.now = datetime.utcnow()
+
+    def add(self, number: int, line: bytes) -> None:
+        try:
+            template = BulkTemplate.model_validate_json(line)
+        except ValidationError as e:
+            self.errors.append({"line": number, "errors": e.errors(include_url=False, include_context=False, include_input=False)})
+            return
+        if self.tenant_id is not None:
+            template.tenant_id = self.tenant_id
+        identity = (template.tenant_id, template.key, template.channel)
+        if identity in self.seen:
+            self.errors.append({"line": number, "errors": [f"Duplicate template '{template.key}' ({template.channel.value})"]})
+            return
+        self.seen.add(identity)
+
+        template_id = uuid.uuid4()
+        values = {
+            **{field: getattr(template, field) for field in TEMPLATE_FIELDS},
+            "id": template_id, "created_at": self.now, "updated_at": self.now,
+        }
+        self.templates.append(tuple(_copy_value(field, values[field]) for field in STAGING_TEMPLATE_COLUMNS))
+        self.template_count += 1
+        for version in template.versions:
+            values = {
+                **version.model_dump(include=set(VERSION_FIELDS)),
+                "id": uuid.uuid4(), "template_id": template_id,
+                "created_at": version.created_at or self.now, "updated_at": version.updated_at or self.now,
+            }
+            self.versions.append(tuple(_copy_value(field, values[field]) for field in STAGING_VERSION_COLUMNS))
+            self.version_count += 1
+            label = (number, template.key, version.language, version.version)
+            if version.is_current:
+                self.current[values["id"]] = label
+            for field in SOURCE_FIELDS:
+                source = getattr(version, field)
+                if source:
+                    self.sources.append((label, field, source))
+
+    async def flush(self) -> None:
+        """
+        Validates the pending sources and stages the pending rows.
+        """
+        for (number, key, language, version), message in await admin_renders.validate(self.sources):
+            self.errors.append({"line": number, "errors": [f"{key} {language} v{version} {message}"]})
+        self.sources = []
+        if not self.errors:
+            connection = await (await self.session.connection()).get_raw_connection()
+            driver = connection.driver_connection
+            await driver.copy_records_to_table(
+                "import_templates", records=self.templates, columns=STAGING_TEMPLATE_COLUMNS
+            )
+            await driver.copy_records_to_table(
+                "import_versions", records=self.versions, columns=STAGING_VERSION_COLUMNS
+            )
+        self.templates, self.versions = [], []
+
+    @property
+    def batch_full(self) -> bool:
+        return len(self.versions) + len(self.templates) >= settings.BULK_BATCH_SIZE
+
+
+async def import_templates(
+    session: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    tenant_id: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Imports an NDJSON body of BulkTemplate lines, read from `chunks`, into
+    the templates of `tenant_id`, or of the tenant in each line when None.
+    Returns counts of templates created and updated and versions imported.
+
+    Raises:
+        InvalidImport: With the errors of up to MAX_IMPORT_ERRORS lines, or
+            of the current versions that failed to publish; nothing is
+            written.
+    """
+    importer = _Importer(session, tenant_id)
+    # A savepoint keeps a rejected import from ending the session's transaction
+    async with session.begin_nested():
+        connection = await session.connection()
+        await connection.exec_driver_sql(
+            "CREATE TEMP TABLE import_templates (LIKE templates INCLUDING DEFAULTS, target_id uuid) ON COMMIT DROP"
+        )
+        await connection.exec_driver_sql(
+            "CREATE TEMP TABLE import_versions (LIKE template_versions INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+
+        async for number, line in _lines(chunks):
+            importer.add(number, line)
+            if len(importer.errors) >= MAX_IMPORT_ERRORS:
+                break
+            if importer.batch_full:
+                await importer.flush()
+        await importer.flush()
+
+        if importer.errors:
+            raise InvalidImport(importer.errors[:MAX_IMPORT_ERRORS])
+
+        counts = await _merge(connection)
+        await _publish_current(session, importer.current)
+        await connection.exec_driver_sql("DROP TABLE import_versions, import_templates")
+    await session.commit()
+    return {**counts, "versions": importer.version_count}
+
+
+async def _merge(connection) -> Dict[str, int]:
+    # Match staged templates to existing ones; tenant_id may be NULL
+    await connection.exec_driver_sql(
+        "UPDATE import_templates s SET target_id = t.id FROM templates t "
+        "WHERE t.key = s.key AND t.channel = s.channel AND t.tenant_id IS NOT DISTINCT FROM s.tenant_id"
+    )
+    updated = await connection.exec_driver_sql(
+        "UPDATE templates t SET name = s.name, description = s.description, category = s.category, "
+        "email_pipeline = s.email_pipeline, updated_at = s.updated_at "
+        "FROM import_templates s WHERE t.id = s.target_id"
+    )
+    created = await connection.exec_driver_sql(
+        "INSERT INTO templates (id, tenant_id, key, name, description, channel, category, email_pipeline, "
+        "created_at, updated_at) "
+        "SELECT id, tenant_id, key, name, description, channel, category, email_pipeline, created_at, updated_at "
+        "FROM import_templates WHERE target_id IS NULL"
+    )
+    await connection.exec_driver_sql("UPDATE import_templates SET target_id = id WHERE target_id IS NULL")
+
+    # Current versions become current when _publish_current publishes them
+    await connection.exec_driver_sql(
+        "INSERT INTO template_versions (id, template_id, language, version, subject, body_html, body_text, "
+        "status, is_current, placeholders_schema, created_at, updated_at) "
+        "SELECT v.id, s.target_id, v.language, "
+        "coalesce(m.max_version, 0) + row_number() OVER (PARTITION BY s.target_id, v.language ORDER BY v.version), "
+        "v.subject, v.body_html, v.body_text, v.status, false, v.placeholders_schema, v.created_at, v.updated_at "
+        "FROM import_versions v JOIN import_templates s ON s.id = v.template_id "
+        "LEFT JOIN LATERAL (SELECT max(e.version) AS max_version FROM template_versions e "
+        "WHERE e.template_id = s.target_id AND e.language = v.language) m ON true"
+    )
+    return {"templates_created": created.rowcount, "templates_updated": updated.rowcount}
+
+
+async def _publish_current(session: AsyncSession, current: Dict[uuid.UUID, Tuple[int, str, str, int]]) -> None:
+    """
+    Publishes the merged current versions through TemplateService, layouts
+    and partials first. Versions whose references form a cycle are
+    published in any order, for the publish checks to report.
+    """
+    if not current:
+        return
+    service = TemplateService(session)
+    staged = table("import_versions", column("id"), column("is_current"))
+    rows = (await session.execute(
+        select(DBTemplateVersion, DBTemplate)
+        .join(DBTemplate, DBTemplate.id == DBTemplateVersion.template_id)
+        .where(DBTemplateVersion.id.in_(select(staged.c.id).where(staged.c.is_current)))
+    )).all()
+
+    pending = []
+    for ver, tpl in rows:
+        try:
+            keys = service._find_dependencies(ver)
+        except InvalidTemplateSyntax:
+            # Reported by the publish
+            keys = []
+        pending.append((ver, tpl, [(tpl.tenant_id, tpl.channel, key) for key in keys]))
+    importing = {(tpl.tenant_id, tpl.channel, tpl.key) for _, tpl, _ in pending}
+    published: Set[Tuple[Optional[str], ChannelType, str]] = set()
+    errors: List[Dict[str, Any]] = []
+    while pending:
+        ready = [item for item in pending if all(ref in published or ref not in importing for ref in item[2])]
+        ready = ready or pending
+        for ver, tpl, _ in ready:
+            try:
+                await service._publish(tpl, ver)
+            except TemplateException as e:
+                number, key, language, version = current[ver.id]
+                errors.append({"line": number, "errors": [f"{key} {language} v{version} {e}"]})
+                continue
+            published.add((tpl.tenant_id, tpl.channel, tpl.key))
+        pending = [item for item in pending if item not in ready]
+    if errors:
+        raise InvalidImport(sorted(errors, key=lambda error: error["line"])[:MAX_IMPORT_ERRORS])
@@ -0,0 +1,184 @@
+import re
+from typing import Callable, Dict, List, Sequence
+
+# Jinja constructs are swapped for inert markers while the HTML is processed.
+# Raw blocks are kept whole so their contents are never touched.
+_JINJA = re.compile(
+    r"\{%-?\s*raw\s*-?%\}.*?\{%-?\s*endraw\s*-?%\}"
+    r"|\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}",
+    re.S,
+)
+
+# Contents of these elements are whitespace-sensitive or not HTML
+_VERBATIM = re.compile(r"<(pre|textarea|script|style)\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>.*?</\1\s*>", re.S | re.I)
+_STYLE = re.compile(r"(<style\b[^>]*>)(.*?)(</style\s*>)", re.S | re.I)
+
+# Whitespace next to these tags never renders, so it can be dropped entirely
+_BLOCK_TAGS = (
+    "html|head|body|title|meta|link|style|table|thead|tbody|tfoot|tr|td|th|div|p|br|hr|"
+    "ul|ol|li|h[1-6]|center|section|header|footer|article|nav|main|blockquote"
+)
+_BLOCK_TAG = re.compile(
+    rf"\s*(</?(?:{_BLOCK_TAGS})\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>)\s*", re.I
+)
+_WHITESPACE = re.compile(r"\s+")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_PUNCTUATION = re.compile(r"\s*([{};])\s*")
+
+_EXTENDS = re.compile(r"\{%-?\s*extends\b")
+_DOCUMENT = re.compile(r"<html\b", re.I)
+_TBODY = re.compile(r"</?tbody\b[^>]*>", re.I)
+_EMPTY_STYLE = re.compile(r"<style\b[^>]*>\s*</style>", re.I)
+_WRAPPED = re.compile(r"^<html><head>(.*?)</head><body>(.*)</body></html>$", re.S)
+
+
+class _Protected:
+    """
+    HTML with its Jinja constructs replaced by markers.
+
+    Expressions become plain identifiers, which are valid in text, attribute
+    values and CSS property values alike. Statements and comments become HTML
+    comments, which an HTML parser keeps in place even between table rows.
+    """
+
+    def __init__(self, source: str):
+        prefix = "__jinja"
+        while prefix in source:
+            prefix += "_"
+        self.prefix = prefix
+        self.constructs: List[str] = []
+        self.statements: List[int] = []
+        self.html = _JINJA.sub(self._marker, source)
+        # Only the comments wrapped around statements are ours; an expression
+        # inside an author's comment must come back still commented out
+        self._statement_markers = {f"<!--{prefix}{index}__-->" for index in self.statements}
+        self._restore = re.compile(rf"<!--{re.escape(prefix)}(\d+)__-->|{re.escape(prefix)}(\d+)__")
+
+    def _marker(self, match: re.Match) -> str:
+        index = len(self.constructs)
+        self.constructs.append(match.group(0))
+        marker = f"{self.prefix}{index}__"
+        if match.group(0).startswith("{{"):
+            return marker
+        self.statements.append(index)
+        return f"<!--{marker}-->"
+
+    def is_statement_marker(self, comment: str) -> bool:
+        return comment in self._statement_markers
+
+    def has_statement_marker(self, html: str) -> bool:
+        return any(marker in html for marker in self._statement_markers)
+
+    def _restored(self, match: re.Match) -> str:
+        if match.group(2) is not None:
+            return self.constructs[int(match.group(2))]
+        construct = self.constructs[int(match.group(1))]
+        return construct if match.group(0) in self._statement_markers else f"<!--{construct}-->"
+
+    def restore(self, html: str) -> str:
+        # Expressions may legitimately vanish with an unused CSS rule, but a
+        # lost statement would change what the template does
+        kept = {int(a or b) for a, b in self._restore.findall(html)}
+        missing = [self.constructs[i] for i in self.statements if i not in kept]
+        if missing:
+            raise ValueError(f"Template tags were lost while processing the HTML: {', '.join(missing)}")
+        return self._restore.sub(self._restored, html)
+
+
+def inline_css(protected: _Protected) -> str:
+    """
+    Moves `<style>` rules into the `style` attributes of the elements they
+    match. Rules that match nothing as written (media queries, or classes only
+    applied through template logic) stay in the stylesheet.
+
+    Sources without a stylesheet, and templates that extend a layout (whose
+    blocks are fragments styled by the layout), are left untouched.
+    """
+    html = protected.html
+    styles = _STYLE.findall(html)
+    if not styles or any(_EXTENDS.match(c) for c in protected.constructs):
+        return html
+    for _, css, _ in styles:
+        if protected.has_statement_marker(css):
+            raise ValueError("CSS inlining cannot evaluate template tags inside <style>; move them out of the stylesheet")
+
+    try:
+        import css_inline
+    except ImportError:
+        raise ValueError("CSS inlining requires the css-inline package (install the 'email' extra)") from None
+
+    inliner = css_inline.CSSInliner(
+        keep_style_tags=True, remove_inlined_selectors=True, load_remote_stylesheets=False
+    )
+    try:
+        inlined = inliner.inline(html)
+    except css_inline.InlineError as e:
+        raise ValueError(f"CSS inlining failed: {e}") from None
+
+    inlined = _EMPTY_STYLE.sub("", inlined)
+    # The parser adds table bodies, which would not line up with loops over
+    # rows, and wraps fragments in a document; undo both
+    if not _TBODY.search(html):
+        inlined = _TBODY.sub("", inlined)
+    if not _DOCUMENT.search(html):
+        wrapped = _WRAPPED.match(inlined)
+        if wrapped:
+            inlined = wrapped.group(1) + wrapped.group(2)
+    return inlined
+
+
+def _minify_css(css: str) -> str:
+    css = _WHITESPACE.sub(" ", _CSS_COMMENT.sub("", css))
+    return _CSS_PUNCTUATION.sub(r"\1", css).replace(";}", "}").strip()
+
+
+def minify_html(protected: _Protected) -> str:
+    """
+    Drops comments and collapses insignificant whitespace. Conditional
+    comments (used by Outlook) and the contents of `<pre>`, `<textarea>` and
+    `<script>` are kept as they are; stylesheets are minified conservatively.
+    """
+    def collapse(html: str) -> str:
+        html = re.sub(
+            r"<!--.*?-->",
+            lambda m: m.group(0) if m.group(0).startswith("<!--[if") or protected.is_statement_marker(m.group(0)) else "",
+            html,
+            flags=re.S,
+        )
+        html = _WHITESPACE.sub(" ", html)
+        return _BLOCK_TAG.sub(r"\1", html)
+
+    # Whitespace around verbatim blocks is dropped too, as around block tags
+    out, pos = [], 0
+    for match in _VERBATIM.finditer(protected.html):
+        out.append(collapse(protected.html[pos:match.start()]).strip())
+        block = match.group(0)
+        if match.group(1).lower() == "style":
+            block = _STYLE.sub(lambda m: m.group(1) + _minify_css(m.group(2)) + m.group(3), block)
+        out.append(block)
+        pos = match.end()
+    out.append(collapse(protected.html[pos:]).strip())
+    return "".join(out)
+
+
+STEPS: Dict[str, Callable[[_Protected], str]] = {
+    "inline_css": inline_css,
+    "minify_html": minify_html,
+}
+
+
+def run_pipeline(source: str, steps: Sequence[str]) -> str:
+    """
+    Runs the given post-processing steps, in order, over an HTML template
+    source. Template tags are carried through unchanged, so the result is
+    still a template and variables are substituted at render time as usual.
+
+    Raises:
+        ValueError: If a step is unknown or cannot process the source.
+    """
+    protected = _Protected(source)
+    for step in steps:
+        if step not in STEPS:
+            raise ValueError(f"Unknown email pipeline step '{step}'")
+        protected.html = STEPS[step](protected)
+    return protected.restore(protected.html)
@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class TemplateException(Exception):
     """Base exception for template domain."""
     pass
@@ -21,3 +24,46 @@ class InvalidTemplateSyntax(TemplateException):
     def __init__(self, detail: str = "Invalid template syntax"):
         self.detail = detail
         super().__init__(detail)
+
+class DependencyCycle(TemplateException):
+    def __init__(self, cycle: list[str], detail: Optional[str] = None):
+        self.cycle = cycle
+        self.detail = detail or f"Template references form a cycle: {' -> '.join(cycle)}"
+        super().__init__(self.detail)
+
+class MissingTemplateVariables(TemplateException):
+    def __init__(self, missing: list[str], detail: Optional[str] = None):
+        self.missing = missing
+        self.detail = detail or f"Missing required template variables: {', '.join(missing)}"
+        super().__init__(self.detail)
+
+class InvalidTemplateData(TemplateException):
+    def __init__(self, errors: list[dict], detail: str = "Render data does not match the placeholders schema"):
+        self.errors = errors
+        self.detail = detail
+        super().__init__(detail)
+
+class InvalidImport(TemplateException):
+    def __init__(self, errors: list[dict], detail: str = "Import rejected; nothing was written"):
+        self.errors = errors
+        self.detail = detail
+        super().__init__(detail)
+
+class RenderBudgetExceeded(TemplateException):
+    def __init__(self, limit: str, detail: str = "Render budget exceeded"):
+        self.limit = limit
+        self.detail = detail
+        super().__init__(detail)
+
+    def __reduce__(self):
+        # Raised in admin render worker processes and re-raised here
+        return type(self), (self.limit, self.detail)
+
+class RenderCostRegression(TemplateException):
+    def __init__(self, previous_ms: float, current_ms: float, detail: Optional[str] = None):
+        self.previous_ms = previous_ms
+        self.current_ms = current_ms
+        self.detail = detail or (
+            f"Render cost regressed from {previous_ms}ms to {current_ms}ms, above the allowed threshold"
+        )
+        super().__init__(self.detail)
@@ -0,0 +1,157 @@
+from contextvars import ContextVar
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Union
+from zoneinfo import ZoneInfo
+
+from babel import Locale, UnknownLocaleError
+from babel.dates import DateTimePattern, parse_pattern as parse_date_pattern
+from babel.numbers import NumberPattern, parse_pattern as parse_number_pattern
+from jinja2 import Undefined
+
+DEFAULT_LOCALE = "en"
+
+# CLDR named formats; anything else is taken as a CLDR pattern
+NAMED_FORMATS = ("short", "medium", "long", "full")
+
+
+class LocaleFormatter:
+    """
+    Formats dates, numbers and plurals for one locale.
+
+    Instances are cached per locale and keep the patterns they have parsed,
+    so repeated renders only look up and apply them.
+    """
+
+    def __init__(self, locale: Locale):
+        self.locale = locale
+        self._date_patterns: Dict[tuple, DateTimePattern] = {}
+        self._number_patterns: Dict[tuple, NumberPattern] = {}
+
+    def _date_pattern(self, kind: str, format: str) -> DateTimePattern:
+        pattern = self._date_patterns.get((kind, format))
+        if pattern is None:
+            if format not in NAMED_FORMATS:
+                source = format
+            elif kind == "date":
+                source = self.locale.date_formats[format].pattern
+            else:
+                # Combine the locale's date and time patterns the way CLDR
+                # describes, e.g. "{1}, {0}"
+                source = (
+                    self.locale.datetime_formats[format]
+                    .replace("{0}", self.locale.time_formats[format].pattern)
+                    .replace("{1}", self.locale.date_formats[format].pattern)
+                )
+            pattern = self._date_patterns[(kind, format)] = parse_date_pattern(source)
+        return pattern
+
+    def _number_pattern(self, kind: str, format: Optional[str]) -> NumberPattern:
+        pattern = self._number_patterns.get((kind, format))
+        if pattern is None:
+            if format is not None:
+                pattern = parse_number_pattern(format)
+            elif kind == "currency":
+                pattern = self.locale.currency_formats["standard"]
+            else:
+                pattern = self.locale.decimal_formats[None]
+            self._number_patterns[(kind, format)] = pattern
+        return pattern
+
+    def date(self, value: Any, format: str = "medium") -> str:
+        value = _to_datetime(value)
+        if isinstance(value, datetime):
+            value = value.date()
+        return self._date_pattern("date", format).apply(value, self.locale)
+
+    def datetime(self, value: Any, format: str = "medium", tz: Optional[str] = None) -> str:
+        value = _to_datetime(value)
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, time())
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        if tz:
+            value = value.astimezone(ZoneInfo(tz))
+        return self._date_pattern("datetime", format).apply(value, self.locale)
+
+    def number(self, value: Any, format: Optional[str] = None) -> str:
+        return self._number_pattern("number", format).apply(_to_decimal(value), self.locale)
+
+    def currency(self, value: Any, currency: str, format: Optional[str] = None) -> str:
+        return self._number_pattern("currency", format).apply(_to_decimal(value), self.locale, currency=currency)
+
+    def plural(self, count: Any, one: str = "", other: str = "", **forms: str) -> str:
+        """
+        Picks the form for the CLDR plural category of `count` in this
+        locale (zero, one, two, few, many, other), falling back to `other`.
+        """
+        forms.update(one=one, other=other)
+        return forms.get(self.locale.plural_form(_to_decimal(count)), other)
+
+
+@lru_cache(maxsize=256)
+def formatter_for(language: str) -> LocaleFormatter:
+    """
+    Returns the cached formatter for a language tag such as "en-US",
+    falling back to the base language and then to DEFAULT_LOCALE.
+    """
+    for tag in (language, language.split("-")[0], DEFAULT_LOCALE):
+        try:
+            return LocaleFormatter(Locale.parse(tag, sep="-"))
+        except (UnknownLocaleError, ValueError):
+            continue
+    raise UnknownLocaleError(language)
+
+
+_active_formatter: ContextVar[LocaleFormatter] = ContextVar("render_locale", default=formatter_for(DEFAULT_LOCALE))
+
+
+def set_locale(language: Optional[str]) -> Any:
+    """
+    Makes `language` the locale of the filters for the current render.
+    Returns a token for `reset_locale`.
+    """
+    return _active_formatter.set(formatter_for(language or DEFAULT_LOCALE))
+
+
+def reset_locale(token: Any) -> None:
+    _active_formatter.reset(token)
+
+
+def _to_datetime(value: Any) -> Union[date, datetime]:
+    if isinstance(value, (date, datetime)):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str):
+        return date.fromisoformat(value) if len(value) == 10 else datetime.fromisoformat(value)
+    raise ValueError(f"Cannot format {type(value).__name__} as a date")
+
+
+def _to_decimal(value: Any) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, bool):
+        raise ValueError("Cannot format a boolean as a number")
+    if isinstance(value, (int, float, str)):
+        return Decimal(str(value))
+    raise ValueError(f"Cannot format {type(value).__name__} as a number")
+
+
+def _filter(method: Callable[..., str]) -> Callable[..., str]:
+    def apply(value: Any, *args: Any, **kwargs: Any) -> str:
+        # Missing values render empty, or raise for strict templates
+        if isinstance(value, Undefined):
+            return str(value)
+        if value is None:
+            return ""
+        return method(_active_formatter.get(), value, *args, **kwargs)
+    apply.__name__ = method.__name__
+    return apply
+
+
+FILTERS: Dict[str, Callable[..., str]] = {
+    name: _filter(getattr(LocaleFormatter, name))
+    for name in ("date", "datetime", "number", "currency", "plural")
+}
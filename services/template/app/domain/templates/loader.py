@@ -0,0 +1,95 @@
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from jinja2 import BaseLoader, Environment, TemplateNotFound
+
+
+class TemplateRef(NamedTuple):
+    """
+    Identifies one part of a published template as seen by the loader.
+
+    Layouts and partials are looked up within the tenant, channel and
+    language of the template that references them, and always for the same
+    part (a body_html layout only ever provides body_html).
+    """
+    tenant_id: Optional[str]
+    channel: str
+    language: str
+    part: str
+    key: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.tenant_id or '*'}/{self.channel}/{self.language}/{self.part}/{self.key}"
+
+
+class VersionLoader(BaseLoader):
+    """
+    Serves published template versions (layouts and partials) to Jinja.
+
+    Jinja loaders are synchronous, so the service registers the sources a
+    render needs before rendering starts. Compiled templates live in the
+    environment cache and stay up to date for as long as the registered
+    version of their name is unchanged: publishing a layout recompiles only
+    that layout, since dependents look it up by name at render time.
+    """
+
+    def __init__(self):
+        self._refs: Dict[str, TemplateRef] = {}
+        self._sources: Dict[str, Tuple[str, Any]] = {}
+
+    def register_ref(self, ref: TemplateRef) -> str:
+        """
+        Makes a name known for path joining without providing a source.
+        Used for top-level templates compiled straight from a version.
+        """
+        name = ref.name
+        self._refs[name] = ref
+        return name
+
+    def unregister_ref(self, name: str) -> None:
+        """
+        Forgets a name made known by register_ref, once nothing compiled
+        under it is cached. Names with a registered source are kept.
+        """
+        if name not in self._sources:
+            self._refs.pop(name, None)
+
+    def register(self, ref: TemplateRef, source: str, version_id: Any) -> str:
+        name = self.register_ref(ref)
+        current = self._sources.get(name)
+        if current is None or current[1] != version_id:
+            self._sources[name] = (source, version_id)
+        return name
+
+    def version_id(self, ref: TemplateRef) -> Any:
+        entry = self._sources.get(ref.name)
+        return entry[1] if entry else None
+
+    def entry(self, ref: TemplateRef) -> Optional[Tuple[str, Any]]:
+        """
+        Returns the registered (source, version_id) of a ref, if any.
+        """
+        return self._sources.get(ref.name)
+
+    def ref(self, name: Optional[str]) -> Optional[TemplateRef]:
+        return self._refs.get(name) if name else None
+
+    def get_source(self, environment: Environment, template: str) -> Tuple[str, Optional[str], Callable[[], bool]]:
+        entry = self._sources.get(template)
+        if entry is None:
+            raise TemplateNotFound(template)
+        source, version_id = entry
+        return source, None, lambda: self.version_id(self._refs[template]) == version_id
+
+
+class VersionEnvironment(Environment):
+    """
+    Environment that resolves `{% extends %}` and `{% include %}` names
+    relative to the scope (tenant, channel, language, part) of the parent.
+    """
+
+    def join_path(self, template: str, parent: str) -> str:
+        ref = self.loader.ref(parent) if isinstance(self.loader, VersionLoader) else None
+        if ref is None:
+            return template
+        return self.loader.register_ref(ref._replace(key=template))
@@ -3,7 +3,7 @@ from enum import Enum
 from typing import Optional, Any
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 from app.domain.templates.renderer import TemplateRenderer
 
@@ -14,6 +14,25 @@ class ChannelType(str, Enum):
     PUSH = "push"
 
 
+class RenderPart(str, Enum):
+    SUBJECT = "subject"
+    BODY_HTML = "body_html"
+    BODY_TEXT = "body_text"
+
+
+# Parts each channel can deliver. Parts outside a channel's policy are never rendered.
+CHANNEL_PARTS: dict[ChannelType, tuple[RenderPart, ...]] = {
+    ChannelType.EMAIL: (RenderPart.SUBJECT, RenderPart.BODY_HTML, RenderPart.BODY_TEXT),
+    ChannelType.SMS: (RenderPart.BODY_TEXT,),
+    ChannelType.PUSH: (RenderPart.SUBJECT, RenderPart.BODY_TEXT),
+}
+
+
+class EmailPipelineStep(str, Enum):
+    INLINE_CSS = "inline_css"
+    MINIFY_HTML = "minify_html"
+
+
 class TemplateStatus(str, Enum):
     DRAFT = "draft"
     PUBLISHED = "published"
@@ -28,16 +47,23 @@ class TemplateBase(BaseModel):
     channel: ChannelType
     tenant_id: Optional[str] = None
     category: Optional[str] = None
+    # Post-processing applied to body_html at publish time, in order
+    email_pipeline: Optional[list[EmailPipelineStep]] = None
 
 
 class TemplateCreate(TemplateBase):
-    pass
+    @model_validator(mode="after")
+    def validate_email_pipeline(self) -> "TemplateCreate":
+        if self.email_pipeline and self.channel != ChannelType.EMAIL:
+            raise ValueError("email_pipeline is only supported for email templates")
+        return self
 
 
 class TemplateUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     category: Optional[str] = None
+    email_pipeline: Optional[list[EmailPipelineStep]] = None
 
 
 class TemplateInDBBase(TemplateBase):
@@ -73,6 +99,17 @@ class TemplateVersionCreate(TemplateVersionBase):
             raise ValueError(f"Invalid template syntax: {err}")
         return v
 
+    @field_validator("placeholders_schema")
+    @classmethod
+    def validate_placeholders_schema(cls, v: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+        if not v:
+            return v
+        renderer = TemplateRenderer()
+        err = renderer.validate_schema(v)
+        if err:
+            raise ValueError(f"Invalid placeholders schema: {err}")
+        return v
+
 
 class TemplateVersionUpdate(BaseModel):
     subject: Optional[str] = None
@@ -91,6 +128,17 @@ class TemplateVersionUpdate(BaseModel):
             raise ValueError(f"Invalid template syntax: {err}")
         return v
 
+    @field_validator("placeholders_schema")
+    @classmethod
+    def validate_placeholders_schema(cls, v: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+        if not v:
+            return v
+        renderer = TemplateRenderer()
+        err = renderer.validate_schema(v)
+        if err:
+            raise ValueError(f"Invalid placeholders schema: {err}")
+        return v
+
 
 class TemplateVersionInDBBase(TemplateVersionBase):
     id: UUID
@@ -98,6 +146,10 @@ class TemplateVersionInDBBase(TemplateVersionBase):
     version: int
     status: TemplateStatus
     is_current: bool = False
+    placeholders: Optional[dict[str, Any]] = None
+    dependencies: Optional[list[str]] = None
+    cost_profile: Optional[dict[str, Any]] = None
+    body_html_compiled: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -110,3 +162,40 @@ class TemplateVersion(TemplateVersionInDBBase):
 
 class TemplateWithVersions(Template):
     versions: list[TemplateVersion] = []
+
+
+# Bulk import and export: one line per template, carrying all of its versions.
+# Syntax is not checked by these models; the importer validates the sources
+# of many versions at once in the admin render workers. Data derived at
+# publish time is not carried: the importer publishes current versions.
+class BulkVersion(BaseModel):
+    language: str
+    version: int = Field(ge=1)
+    subject: Optional[str] = None
+    body_html: Optional[str] = None
+    body_text: Optional[str] = None
+    placeholders_schema: Optional[dict[str, Any]] = None
+    status: TemplateStatus = TemplateStatus.DRAFT
+    is_current: bool = False
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def validate_current(self) -> "BulkVersion":
+        if self.is_current and self.status != TemplateStatus.PUBLISHED:
+            raise ValueError("Only a published version can be current")
+        return self
+
+
+class BulkTemplate(TemplateCreate):
+    versions: list[BulkVersion] = []
+
+    @model_validator(mode="after")
+    def validate_versions(self) -> "BulkTemplate":
+        numbers = [(v.language, v.version) for v in self.versions]
+        if len(set(numbers)) != len(numbers):
+            raise ValueError("Version numbers must be unique per language")
+        current = [v.language for v in self.versions if v.is_current]
+        if len(set(current)) != len(current):
+            raise ValueError("At most one version per language can be current")
+        return self
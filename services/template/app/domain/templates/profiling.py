@@ -0,0 +1,156 @@
+import statistics
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from jinja2 import nodes
+
+from app.domain.templates.exceptions import RenderBudgetExceeded
+from app.domain.templates.renderer import TemplateRenderer
+from app.domain.templates.sandbox import RenderBudget
+
+TEMPLATE_PARTS = ("subject", "body_html", "body_text")
+
+# Items generated for arrays without minItems, so loops do some work
+SAMPLE_ARRAY_ITEMS = 10
+
+
+def sample_from_schema(schema: Dict[str, Any]) -> Any:
+    """
+    Builds a representative value for a JSON Schema: every declared object
+    property is filled and arrays get several items so loops are exercised.
+    """
+    if "const" in schema:
+        return schema["const"]
+    if "default" in schema:
+        return schema["default"]
+    if schema.get("examples"):
+        return schema["examples"][0]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    for key in ("anyOf", "oneOf"):
+        if schema.get(key):
+            return sample_from_schema(schema[key][0])
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+    if schema_type is None:
+        schema_type = "object" if "properties" in schema else "string"
+
+    if schema_type == "object":
+        return {name: sample_from_schema(sub) for name, sub in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        items = schema.get("items", {})
+        count = max(schema.get("minItems", SAMPLE_ARRAY_ITEMS), 1)
+        count = min(count, schema.get("maxItems", count))
+        return [sample_from_schema(items) for _ in range(count)]
+    if schema_type == "string":
+        return "x" * max(schema.get("minLength", 8), 1)
+    if schema_type == "integer":
+        return int(schema.get("minimum", 1))
+    if schema_type == "number":
+        return float(schema.get("minimum", 1.5))
+    if schema_type == "boolean":
+        return True
+    return None
+
+
+def loop_depth(node: nodes.Node) -> int:
+    """
+    Returns the deepest nesting of `{% for %}` loops in a template AST.
+    """
+    depth = 0
+    for child in node.iter_child_nodes():
+        depth = max(depth, loop_depth(child))
+    return depth + 1 if isinstance(node, nodes.For) else depth
+
+
+class CostProfiler:
+    """
+    Measures what a version costs to compile and render at publish time.
+
+    Renders run on a sandboxed renderer with the given budget, so a runaway
+    template cannot stall a publish; an exceeded budget or a failed render
+    is recorded in the profile's errors, with the time until the abort as
+    the part's render time.
+    """
+
+    def __init__(self, renderer: TemplateRenderer, runs: int = 5, budget: Optional[RenderBudget] = None):
+        self.renderer = renderer
+        self.runs = max(runs, 1)
+        self.budget = budget
+
+    def profile(
+        self,
+        version: Any,
+        scope: Optional[Tuple[Optional[str], str]] = None,
+        sample_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        if sample_data is not None:
+            data, sample = sample_data, "provided"
+        elif version.placeholders_schema:
+            data, sample = sample_from_schema(version.placeholders_schema), "schema"
+            if not isinstance(data, dict):
+                data = {}
+        else:
+            data, sample = {}, "empty"
+
+        profile: Dict[str, Any] = {
+            "sample": sample,
+            "compile_ms": 0.0,
+            "render_ms": 0.0,
+            "output_bytes": 0,
+            "loop_depth": 0,
+            "parts": {},
+        }
+        for part in TEMPLATE_PARTS:
+            source = getattr(version, part)
+            if not source:
+                continue
+            part_profile = self._profile_part(version, part, scope, data)
+            profile["parts"][part] = part_profile
+            profile["loop_depth"] = max(profile["loop_depth"], part_profile["loop_depth"])
+            for key in ("compile_ms", "render_ms", "output_bytes"):
+                profile[key] += part_profile.get(key, 0)
+            if "error" in part_profile:
+                profile.setdefault("errors", {})[part] = part_profile["error"]
+
+        profile["compile_ms"] = round(profile["compile_ms"], 3)
+        profile["render_ms"] = round(profile["render_ms"], 3)
+        return profile
+
+    def _profile_part(
+        self,
+        version: Any,
+        part: str,
+        scope: Optional[Tuple[Optional[str], str]],
+        data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        env = self.renderer.env_forgiving
+        result: Dict[str, Any] = {"loop_depth": loop_depth(env.parse(getattr(version, part)))}
+
+        start = time.perf_counter()
+        template = self.renderer.compile_part(version, part, strict=False, scope=scope)
+        result["compile_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+        timings = []
+        try:
+            for _ in range(self.runs):
+                start = time.perf_counter()
+                output = self.renderer.render_compiled(template, data, self.budget, version.language)
+                timings.append(time.perf_counter() - start)
+        except RenderBudgetExceeded as e:
+            # Time until the abort, so the worst templates don't look cheapest
+            result["render_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            result["error"] = {"type": "budget_exceeded", "limit": e.limit, "message": e.detail}
+            return result
+        except Exception as e:
+            result["render_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            result["error"] = {"type": "render_failed", "message": str(e)}
+            return result
+        finally:
+            self.renderer.release(version.id, [template])
+
+        result["render_ms"] = round(statistics.median(timings) * 1000, 3)
+        result["output_bytes"] = len(output.encode("utf-8"))
+        return result
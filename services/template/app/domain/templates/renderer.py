@@ -1,26 +1,117 @@
-from typing import Any, Dict, Optional
-from jinja2 import Environment, StrictUndefined, Undefined, TemplateSyntaxError, BaseLoader
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import fastjsonschema
+from jinja2 import StrictUndefined, Undefined, TemplateSyntaxError, Template, meta, nodes
+from opentelemetry import trace
+
+from app.core.metrics import TEMPLATE_COMPILE_SECONDS, tenant_label
+from app.domain.templates.formatting import FILTERS, reset_locale, set_locale
+from app.domain.templates.loader import TemplateRef, VersionEnvironment, VersionLoader
+from app.domain.templates.sandbox import BudgetedSandboxedEnvironment, RenderBudget
+
+tracer = trace.get_tracer(__name__)
+
+
+def _collect_required_names(node: nodes.Node, names: Set[str]) -> None:
+    """
+    Collects names that are always evaluated when the template renders.
+
+    Names that only appear in conditional positions (if/for bodies, the right
+    side of and/or, macros, tests, default filters) are skipped since strict
+    mode does not necessarily fail when they are missing.
+    """
+    if isinstance(node, nodes.If):
+        _collect_required_names(node.test, names)
+        return
+    if isinstance(node, nodes.For):
+        _collect_required_names(node.iter, names)
+        return
+    if isinstance(node, nodes.CondExpr):
+        _collect_required_names(node.test, names)
+        return
+    if isinstance(node, (nodes.And, nodes.Or)):
+        _collect_required_names(node.left, names)
+        return
+    if isinstance(node, (nodes.Macro, nodes.CallBlock, nodes.Test)):
+        return
+    if isinstance(node, nodes.Filter) and node.name in ("default", "d"):
+        for arg in node.args:
+            _collect_required_names(arg, names)
+        return
+    if isinstance(node, nodes.Name) and node.ctx == "load":
+        names.add(node.name)
+    for child in node.iter_child_nodes():
+        _collect_required_names(child, names)
+
+
+def _assigned_names(ast: nodes.Template) -> Set[str]:
+    names = {node.name for node in ast.find_all(nodes.Name) if node.ctx in ("store", "param")}
+    names.update(node.target for node in ast.find_all(nodes.Import))
+    for node in ast.find_all(nodes.FromImport):
+        names.update(name[1] if isinstance(name, tuple) else name for name in node.names)
+    return names
+
+
+class CompiledVersion:
+    """
+    Compiled artifacts of a single template version.
+
+    Jinja templates are compiled per (part, strict) on first use and the
+    placeholders schema is compiled into a validator function once.
+    """
+
+    def __init__(self, placeholders_schema: Optional[dict]):
+        self.templates: Dict[Tuple[str, bool], Template] = {}
+        self.validator: Optional[Callable[[Any], Any]] = (
+            fastjsonschema.compile(placeholders_schema) if placeholders_schema else None
+        )
 
 
 class TemplateRenderer:
-    def __init__(self):
-        # We don't use a loader because we render strings directly from DB
-        self.env_strict = Environment(
-            loader=BaseLoader(),
+    def __init__(
+        self,
+        cache_size: int = 1024,
+        sandboxed: bool = False,
+        loader: Optional[VersionLoader] = None
+    ):
+        # Versions are rendered from strings; the loader only serves the
+        # layouts and partials they extend or include. It can be shared so
+        # several renderers see the same registered layouts.
+        # Sandboxed renderers restrict attribute access and enforce a
+        # RenderBudget (loop iterations, output size, wall-clock time).
+        self.sandboxed = sandboxed
+        env_class = BudgetedSandboxedEnvironment if sandboxed else VersionEnvironment
+        self.loader = loader or VersionLoader()
+        self.env_strict = env_class(
+            loader=self.loader,
             undefined=StrictUndefined,
-            autoescape=True
+            autoescape=True,
+            cache_size=cache_size
         )
-        self.env_forgiving = Environment(
-            loader=BaseLoader(),
+        self.env_forgiving = env_class(
+            loader=self.loader,
             undefined=Undefined,
-            autoescape=True
+            autoescape=True,
+            cache_size=cache_size
         )
+        # Locale-aware date, datetime, number, currency and plural filters
+        self.env_strict.filters.update(FILTERS)
+        self.env_forgiving.filters.update(FILTERS)
+        # Compiled versions keyed by (id, updated_at), least recently used first
+        self.cache_size = cache_size
+        self._compiled: "OrderedDict[Tuple[Any, Any], CompiledVersion]" = OrderedDict()
+        self._lock = threading.Lock()
 
     def render(
         self, 
         template_content: str, 
         data: Dict[str, Any], 
-        strict: bool = True
+        strict: bool = True,
+        budget: Optional[RenderBudget] = None,
+        language: Optional[str] = None
     ) -> str:
         """
         Renders a template string with the provided data.
@@ -30,6 +121,8 @@ class TemplateRenderer:
             data: Dictionary of variables to substitute.
             strict: If True, raises error on missing variables. 
                     If False, missing variables are empty strings.
+            budget: Limits for sandboxed renderers. Defaults to RenderBudget().
+            language: Locale of the formatting filters. Defaults to "en".
                     
         Returns:
             Rendered string.
@@ -37,6 +130,8 @@ class TemplateRenderer:
         Raises:
             jinja2.exceptions.UndefinedError: If strict=True and variable missing.
             jinja2.exceptions.TemplateSyntaxError: If template syntax is invalid.
+            jinja2.exceptions.SecurityError: If a sandboxed template accesses unsafe attributes.
+            RenderBudgetExceeded: If a sandboxed render exceeds its budget.
         """
         if not template_content:
             return ""
@@ -47,12 +142,240 @@ class TemplateRenderer:
             # Create a template object from the string
             template = env.from_string(template_content)
             # Render it
-            return template.render(**data)
+            return self.render_compiled(template, data, budget, language)
         except (TemplateSyntaxError, Exception) as e:
             # Re-raise or wrap exception as needed.
             # strict=True will raise UndefinedError which inherits from Exception
             raise e
 
+    def compiled(self, version: Any) -> CompiledVersion:
+        """
+        Returns the cached compiled artifacts for a stored template version.
+
+        Versions without an id (not yet persisted) are compiled but not cached.
+        """
+        if version.id is None:
+            return CompiledVersion(version.placeholders_schema)
+
+        key = (version.id, version.updated_at)
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is not None:
+                self._compiled.move_to_end(key)
+                return compiled
+
+        compiled = CompiledVersion(version.placeholders_schema)
+        evicted = None
+        with self._lock:
+            self._compiled[key] = compiled
+            if len(self._compiled) > self.cache_size:
+                evicted = self._compiled.popitem(last=False)
+        if evicted is not None:
+            (version_id, _), artifacts = evicted
+            self.release(version_id, artifacts.templates.values())
+        return compiled
+
+    def release(self, version_id: Any, templates: Iterable[Template]) -> None:
+        """
+        Drops the loader names of templates compiled by `compile_part` for a
+        version, unless a cached entry of that version still uses them.
+        """
+        with self._lock:
+            if any(key[0] == version_id for key in self._compiled):
+                return
+        for template in templates:
+            if template.name is not None:
+                self.loader.unregister_ref(template.name)
+
+    def render_version(
+        self,
+        version: Any,
+        part: str,
+        data: Dict[str, Any],
+        strict: bool = True,
+        scope: Optional[Tuple[Optional[str], str]] = None,
+        budget: Optional[RenderBudget] = None
+    ) -> str:
+        """
+        Renders one part (subject, body_html, body_text) of a stored version,
+        reusing its compiled template across calls.
+
+        `scope` is the (tenant_id, channel) of the version's template. It is
+        required for `{% extends %}` and `{% include %}` to find layouts and
+        partials registered on the loader.
+        """
+        if not getattr(version, part):
+            return ""
+        template = self._compiled_part(version, part, strict, scope)
+        return self.render_compiled(template, data, budget, version.language)
+
+    def generate_version(
+        self,
+        version: Any,
+        part: str,
+        data: Dict[str, Any],
+        strict: bool = True,
+        scope: Optional[Tuple[Optional[str], str]] = None,
+        budget: Optional[RenderBudget] = None
+    ) -> Iterator[str]:
+        """
+        Like `render_version`, but yields the output in chunks as Jinja
+        generates it instead of building the whole string.
+        """
+        if not getattr(version, part):
+            return iter(())
+        template = self._compiled_part(version, part, strict, scope)
+        return self.generate_compiled(template, data, budget, version.language)
+
+    def _compiled_part(
+        self,
+        version: Any,
+        part: str,
+        strict: bool,
+        scope: Optional[Tuple[Optional[str], str]]
+    ) -> Template:
+        compiled = self.compiled(version)
+        template = compiled.templates.get((part, strict))
+        if template is None:
+            template = compiled.templates[(part, strict)] = self.compile_part(version, part, strict, scope)
+        return template
+
+    def compile_part(
+        self,
+        version: Any,
+        part: str,
+        strict: bool = True,
+        scope: Optional[Tuple[Optional[str], str]] = None
+    ) -> Template:
+        """
+        Compiles one part of a version without caching it. Templates compiled
+        with a scope are named so their extends/includes resolve on the loader.
+        """
+        env = self.env_strict if strict else self.env_forgiving
+        name = None
+        tenant_id, channel = scope if scope is not None else (None, "")
+        if scope is not None:
+            name = self.loader.register_ref(
+                TemplateRef(tenant_id, channel, version.language, part, f"@{version.id}")
+            )
+        with tracer.start_as_current_span("template.compile", attributes={"template.part": part}):
+            start = time.perf_counter()
+            template = env.template_class.from_code(
+                env, env.compile(self.source(version, part), name=name), env.make_globals(None)
+            )
+        TEMPLATE_COMPILE_SECONDS.labels(channel=channel, tenant=tenant_label(tenant_id), part=part).observe(
+            time.perf_counter() - start
+        )
+        return template
+
+    @staticmethod
+    def source(version: Any, part: str) -> str:
+        """
+        Returns the source rendered for a part: the publish-time processed
+        HTML when the version has one, otherwise the part as authored.
+        """
+        if part == "body_html":
+            return getattr(version, "body_html_compiled", None) or version.body_html
+        return getattr(version, part)
+
+    def render_compiled(
+        self,
+        template: Template,
+        data: Dict[str, Any],
+        budget: Optional[RenderBudget] = None,
+        language: Optional[str] = None
+    ) -> str:
+        token = set_locale(language)
+        try:
+            if self.sandboxed:
+                return template.environment.render_budgeted(template, data, budget or RenderBudget())
+            return template.render(data)
+        finally:
+            reset_locale(token)
+
+    def generate_compiled(
+        self,
+        template: Template,
+        data: Dict[str, Any],
+        budget: Optional[RenderBudget] = None,
+        language: Optional[str] = None
+    ) -> Iterator[str]:
+        if self.sandboxed:
+            chunks = template.environment.generate_budgeted(template, data, budget or RenderBudget())
+        else:
+            chunks = template.generate(data)
+        # Consumers may pull each chunk from a different thread or context,
+        # so the locale is set around every step rather than once
+        while True:
+            token = set_locale(language)
+            try:
+                chunk = next(chunks, None)
+            finally:
+                reset_locale(token)
+            if chunk is None:
+                return
+            yield chunk
+
+    def register_dependency(
+        self,
+        scope: Tuple[Optional[str], str],
+        language: str,
+        key: str,
+        version: Any
+    ) -> None:
+        """
+        Registers the parts of a published layout or partial so templates
+        rendered in `scope` and `language` can extend or include it by key.
+        """
+        tenant_id, channel = scope
+        for part in ("subject", "body_html", "body_text"):
+            source = self.source(version, part)
+            if source:
+                self.loader.register(TemplateRef(tenant_id, channel, language, part, key), source, version.id)
+
+    def is_dependency_registered(
+        self,
+        scope: Tuple[Optional[str], str],
+        language: str,
+        key: str,
+        version_id: Any,
+        parts: List[str]
+    ) -> bool:
+        tenant_id, channel = scope
+        return all(
+            self.loader.version_id(TemplateRef(tenant_id, channel, language, part, key)) == version_id
+            for part in parts
+        )
+
+    def validate_data(self, version: Any, data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Validates render data against the version's placeholders schema.
+        Returns a list of structured errors if invalid, None if valid.
+        """
+        validator = self.compiled(version).validator
+        if validator is None:
+            return None
+        try:
+            validator(data)
+            return None
+        except fastjsonschema.JsonSchemaValueException as e:
+            return [{
+                "path": ".".join(str(p) for p in e.path[1:]),
+                "message": e.message,
+                "rule": e.rule,
+            }]
+
+    def validate_schema(self, placeholders_schema: dict) -> Optional[str]:
+        """
+        Validates a placeholders JSON Schema by compiling it.
+        Returns error message string if invalid, None if valid.
+        """
+        try:
+            fastjsonschema.compile(placeholders_schema)
+            return None
+        except fastjsonschema.JsonSchemaDefinitionException as e:
+            return str(e)
+
     def validate_syntax(self, template_content: str) -> Optional[str]:
         """
         Validates syntax of a template string. 
@@ -63,3 +386,40 @@ class TemplateRenderer:
             return None
         except TemplateSyntaxError as e:
             return f"Syntax error at line {e.lineno}: {e.message}"
+
+    def find_placeholders(self, template_content: str) -> Dict[str, List[str]]:
+        """
+        Extracts the variables a template reads from the render data.
+
+        Returns a dict with:
+            variables: every undeclared variable referenced by the template.
+            required: the subset that strict mode always evaluates, i.e. the
+                      keys whose absence is guaranteed to fail the render.
+
+        Raises:
+            jinja2.exceptions.TemplateSyntaxError: If template syntax is invalid.
+        """
+        ast = self.env_strict.parse(template_content)
+        variables = meta.find_undeclared_variables(ast) - self.env_strict.globals.keys()
+
+        required: Set[str] = set()
+        # Only blocks the layout calls are rendered when extending, so nothing
+        # in the child is guaranteed to be evaluated.
+        if next(ast.find_all(nodes.Extends), None) is None:
+            _collect_required_names(ast, required)
+        # A name the template assigns anywhere (set, for, macro or with) may
+        # not need the data, e.g. when it is only set inside a branch
+        required -= _assigned_names(ast)
+
+        return {
+            "variables": sorted(variables),
+            "required": sorted(required & variables),
+        }
+
+    def find_dependencies(self, template_content: str) -> List[Optional[str]]:
+        """
+        Lists the template keys referenced by extends, include and import.
+        Dynamic references that cannot be resolved statically appear as None.
+        """
+        ast = self.env_strict.parse(template_content)
+        return list(dict.fromkeys(meta.find_referenced_templates(ast)))
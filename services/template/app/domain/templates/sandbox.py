@@ -0,0 +1,232 @@
+import math
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from jinja2 import nodes
+from jinja2.runtime import Context
+from jinja2.sandbox import SandboxedEnvironment
+from jinja2.visitor import NodeTransformer
+
+from app.domain.templates.exceptions import RenderBudgetExceeded
+from app.domain.templates.loader import VersionEnvironment
+
+
+# Digits a `**` result may have: Python refuses to print larger ints anyway
+# (sys.get_int_max_str_digits), and computing them can take seconds
+MAX_POWER_DIGITS = 4300
+
+
+@dataclass(frozen=True)
+class RenderBudget:
+    """
+    Per-render limits enforced in sandboxed mode.
+
+    The timeout is cooperative: the clock is checked between output chunks,
+    loop iterations, filter and test calls, and items produced by lazy
+    filters such as `map`. A single call into Python that runs long on its
+    own (sorting a huge list, say) finishes before the render is stopped.
+    """
+    max_loop_iterations: int = 10_000
+    max_output_bytes: int = 1_000_000
+    timeout_seconds: float = 1.0
+
+
+class BudgetPolicy:
+    """
+    Resolves the budget for a (tenant, channel) pair.
+
+    Overrides are keyed "tenant:channel", with "*" as a wildcard on either
+    side, and only need to list the limits they change. More specific keys
+    win: "*:channel" < "tenant:*" < "tenant:channel".
+    """
+
+    def __init__(self, default: RenderBudget, overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.default = default
+        self.overrides = overrides or {}
+        self._resolved: Dict[Tuple[Optional[str], str], RenderBudget] = {}
+        known = {f.name for f in fields(RenderBudget)}
+        for key, limits in self.overrides.items():
+            unknown = set(limits) - known
+            if unknown:
+                raise ValueError(f"Unknown render budget limits for '{key}': {', '.join(sorted(unknown))}")
+
+    def for_scope(self, tenant_id: Optional[str], channel: str) -> RenderBudget:
+        budget = self._resolved.get((tenant_id, channel))
+        if budget is not None:
+            return budget
+
+        budget = self.default
+        for key in (f"*:{channel}", f"{tenant_id}:*", f"{tenant_id}:{channel}"):
+            if key in self.overrides:
+                budget = replace(budget, **self.overrides[key])
+        self._resolved[(tenant_id, channel)] = budget
+        return budget
+
+
+class BudgetTracker:
+    """
+    Tracks usage of a RenderBudget during a single render.
+    """
+    __slots__ = ("budget", "iterations", "output_bytes", "deadline")
+
+    # Loop iterations between wall-clock checks
+    CLOCK_INTERVAL = 256
+
+    def __init__(self, budget: RenderBudget):
+        self.budget = budget
+        self.iterations = 0
+        self.output_bytes = 0
+        self.deadline = time.monotonic() + budget.timeout_seconds
+
+    def iterate(self, iterable: Iterable[Any]) -> Iterator[Any]:
+        for item in iterable:
+            self.iterations += 1
+            if self.iterations > self.budget.max_loop_iterations:
+                raise RenderBudgetExceeded(
+                    "loop_iterations", f"Render exceeded {self.budget.max_loop_iterations} loop iterations"
+                )
+            if not self.iterations % self.CLOCK_INTERVAL:
+                self.check_deadline()
+            yield item
+
+    def watch(self, iterable: Iterable[Any]) -> Iterator[Any]:
+        """
+        Checks the deadline as a lazy filter result is consumed; unlike
+        loops, its items do not count as iterations.
+        """
+        for count, item in enumerate(iterable, 1):
+            if not count % self.CLOCK_INTERVAL:
+                self.check_deadline()
+            yield item
+
+    def add_output(self, chunk: str) -> None:
+        self.output_bytes += len(chunk) if chunk.isascii() else len(chunk.encode("utf-8"))
+        if self.output_bytes > self.budget.max_output_bytes:
+            raise RenderBudgetExceeded(
+                "output_bytes", f"Render exceeded {self.budget.max_output_bytes} output bytes"
+            )
+        self.check_deadline()
+
+    def check_deadline(self) -> None:
+        if time.monotonic() > self.deadline:
+            raise RenderBudgetExceeded(
+                "timeout", f"Render exceeded {self.budget.timeout_seconds}s"
+            )
+
+
+_active_tracker: ContextVar[Optional[BudgetTracker]] = ContextVar("render_budget", default=None)
+
+
+class _WrapFiltersAndTests(NodeTransformer):
+    # Wraps `x|f` and `x is t` in environment.budget_value(...)
+    def visit_FilterBlock(self, node: nodes.FilterBlock) -> nodes.Node:
+        # The block's filter has no operand and must stay a Filter
+        node.body = [self.visit(child) for child in node.body]
+        return node
+
+    def visit_Filter(self, node: nodes.Filter) -> nodes.Node:
+        return self._wrap(self.generic_visit(node))
+
+    def visit_Test(self, node: nodes.Test) -> nodes.Node:
+        return self._wrap(self.generic_visit(node))
+
+    @staticmethod
+    def _wrap(node: nodes.Node) -> nodes.Node:
+        return nodes.Call(
+            nodes.EnvironmentAttribute("budget_value"), [node], [], None, None, lineno=node.lineno
+        )
+
+
+def _power_digits(base: Any, exponent: Any) -> float:
+    # Approximate decimal digits of an integer power; float powers overflow quickly
+    if isinstance(base, bool) or isinstance(exponent, bool) or not isinstance(base, int) \
+            or not isinstance(exponent, int) or exponent <= 0 or abs(base) <= 1:
+        return 0
+    return exponent * math.log10(abs(base))
+
+
+class BudgetedSandboxedEnvironment(SandboxedEnvironment, VersionEnvironment):
+    """
+    Sandboxed environment whose templates count loop iterations against
+    the budget of the render in progress.
+
+    Every `{% for %}` iterable is wrapped in `environment.budget_iter` and
+    every filter and test in `environment.budget_value` at parse time, so
+    layouts and partials are covered too. Output size and wall-clock time
+    are checked by `render_budgeted` as chunks are generated. `*` and `**`
+    are intercepted to refuse results too large to compute or print.
+    """
+    intercepted_binops = frozenset(["*", "**"])
+
+    def _parse(self, source: str, name: Optional[str], filename: Optional[str]) -> nodes.Template:
+        ast = super()._parse(source, name, filename)
+        for node in list(ast.find_all(nodes.For)):
+            node.iter = nodes.Call(
+                nodes.EnvironmentAttribute("budget_iter"), [node.iter], [], None, None, lineno=node.lineno
+            )
+        return _WrapFiltersAndTests().visit(ast)
+
+    def budget_iter(self, iterable: Iterable[Any]) -> Iterable[Any]:
+        tracker = _active_tracker.get()
+        if tracker is None:
+            return iterable
+        return tracker.iterate(iterable)
+
+    def budget_value(self, value: Any) -> Any:
+        tracker = _active_tracker.get()
+        if tracker is None:
+            return value
+        tracker.check_deadline()
+        if isinstance(value, Iterator):
+            return tracker.watch(value)
+        return value
+
+    def call_binop(self, context: Context, operator: str, left: Any, right: Any) -> Any:
+        # Refuse sequence repetition that would blow the output budget on its own
+        tracker = _active_tracker.get()
+        if tracker is not None and operator == "*":
+            for seq, count in ((left, right), (right, left)):
+                if isinstance(seq, (str, list, tuple)) and isinstance(count, int) \
+                        and len(seq) * count > tracker.budget.max_output_bytes:
+                    raise RenderBudgetExceeded(
+                        "output_bytes", f"Render exceeded {tracker.budget.max_output_bytes} output bytes"
+                    )
+        if tracker is not None and operator == "**" and _power_digits(left, right) > MAX_POWER_DIGITS:
+            raise RenderBudgetExceeded("power", f"Render exceeded {MAX_POWER_DIGITS} digits in a power")
+        return super().call_binop(context, operator, left, right)
+
+    def render_budgeted(self, template: Any, data: Dict[str, Any], budget: RenderBudget) -> str:
+        tracker = BudgetTracker(budget)
+        token = _active_tracker.set(tracker)
+        try:
+            chunks = []
+            for chunk in template.generate(data):
+                tracker.add_output(chunk)
+                chunks.append(chunk)
+            return "".join(chunks)
+        finally:
+            _active_tracker.reset(token)
+
+    def generate_budgeted(self, template: Any, data: Dict[str, Any], budget: RenderBudget) -> Iterator[str]:
+        """
+        Streaming counterpart of `render_budgeted`. The tracker is only active
+        while a chunk is generated, and time spent waiting for the consumer
+        does not count towards the timeout.
+        """
+        tracker = BudgetTracker(budget)
+        chunks = template.generate(data)
+        while True:
+            token = _active_tracker.set(tracker)
+            try:
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    tracker.add_output(chunk)
+            finally:
+                _active_tracker.reset(token)
+            if chunk is None:
+                return
+            paused = time.monotonic()
+            yield chunk
+            tracker.deadline += time.monotonic() - paused
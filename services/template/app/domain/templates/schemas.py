@@ -1,7 +1,7 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
-from app.domain.templates.models import ChannelType
+from app.domain.templates.models import ChannelType, RenderPart
 
 
 class RenderRequest(BaseModel):
@@ -11,8 +11,10 @@ class RenderRequest(BaseModel):
     language: str
     data: Dict[str, Any] = Field(default_factory=dict)
     options: Dict[str, Any] = Field(default_factory=dict) # e.g. strict=True
+    parts: Optional[List[RenderPart]] = None # Defaults to every part the channel delivers
 
 
+# Parts that were not rendered are left unset and excluded from the response
 class RenderResponse(BaseModel):
     template_key: str
     channel: ChannelType
@@ -21,6 +23,35 @@ class RenderResponse(BaseModel):
     subject: Optional[str] = None
     body_html: Optional[str] = None
     body_text: Optional[str] = None
+
+
+class MultiChannelRenderRequest(BaseModel):
+    template_key: str
+    channels: List[ChannelType] = Field(min_length=1)
+    tenant_id: Optional[str] = None
+    language: str
+    data: Dict[str, Any] = Field(default_factory=dict)
+    options: Dict[str, Any] = Field(default_factory=dict) # e.g. strict=True
+    parts: Optional[List[RenderPart]] = None
+
+
+# One entry per requested channel; status mirrors what /render/ would return
+class ChannelRenderResult(BaseModel):
+    channel: ChannelType
+    status: int
+    language_used: Optional[str] = None
+    version: Optional[int] = None
+    subject: Optional[str] = None
+    body_html: Optional[str] = None
+    body_text: Optional[str] = None
+    error: Optional[Any] = None
+
+
+class MultiChannelRenderResponse(BaseModel):
+    template_key: str
+    results: List[ChannelRenderResult]
+
+
 class PreviewContentRequest(BaseModel):
     content_html: Optional[str] = None
     content_text: Optional[str] = None
@@ -31,3 +62,7 @@ class PreviewContentResponse(BaseModel):
     subject: Optional[str] = None
     body_html: Optional[str] = None
     body_text: Optional[str] = None
+
+
+class PublishVersionRequest(BaseModel):
+    sample_data: Optional[Dict[str, Any]] = None # Payload used to profile render cost
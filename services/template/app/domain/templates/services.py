@@ -1,28 +1,101 @@
-from typing import Optional, List, Any
+import time
+from functools import partial
+from typing import Optional, List, Any, Iterator, Sequence, Set, Tuple
 import uuid
 
+from anyio import CapacityLimiter, to_thread
+
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
+from jinja2 import UndefinedError
+from opentelemetry import trace
 
 from app.domain.templates.models import (
     Template, ChannelType, TemplateStatus, 
     TemplateVersion, TemplateCreate, 
-    TemplateVersionCreate
+    TemplateVersionCreate, RenderPart, CHANNEL_PARTS
 )
 from app.infrastructure.db.models.templates import Template as DBTemplate, TemplateVersion as DBTemplateVersion
 from app.domain.templates.exceptions import (
-    TemplateNotFound, VersionNotFound, 
-    DuplicateTemplateError, InvalidTemplateSyntax
+    TemplateException, TemplateNotFound, VersionNotFound, 
+    DuplicateTemplateError, InvalidTemplateSyntax,
+    MissingTemplateVariables, InvalidTemplateData,
+    RenderBudgetExceeded, RenderCostRegression, DependencyCycle
 )
+from app.domain.templates.email_pipeline import run_pipeline
 from app.domain.templates.renderer import TemplateRenderer
+from app.domain.templates.sandbox import BudgetPolicy, RenderBudget
+from app.domain.templates.workers import AdminRenderPool, render_job
+from app.core.config import settings
+from app.core.metrics import (
+    RENDER_BUDGET_ABORTS, TEMPLATE_RESOLVE_SECONDS, TEMPLATE_RESOLUTIONS,
+    TEMPLATE_RENDER_SECONDS, TEMPLATE_OUTPUT_BYTES, TEMPLATE_RENDER_FAILURES,
+    tenant_label, template_key_label
+)
+
+
+TEMPLATE_PARTS = tuple(part.value for part in RenderPart)
+
+tracer = trace.get_tracer(__name__)
+
+# Shared across requests so compiled templates and validators are reused
+renderer = TemplateRenderer(cache_size=settings.TEMPLATE_CACHE_SIZE, sandboxed=settings.RENDER_SANDBOX)
+
+budgets = BudgetPolicy(
+    RenderBudget(
+        max_loop_iterations=settings.RENDER_MAX_LOOP_ITERATIONS,
+        max_output_bytes=settings.RENDER_MAX_OUTPUT_BYTES,
+        timeout_seconds=settings.RENDER_TIMEOUT_SECONDS,
+    ),
+    settings.RENDER_BUDGET_OVERRIDES,
+)
+
+# Previews and publish-time profiling run in worker processes. Profiling
+# always runs sandboxed so a runaway template cannot stall a publish.
+admin_renders = AdminRenderPool(
+    workers=settings.ADMIN_RENDER_CONCURRENCY,
+    cache_size=settings.TEMPLATE_CACHE_SIZE,
+    sandboxed=settings.RENDER_SANDBOX,
+    profile_runs=settings.PROFILE_RENDER_RUNS,
+    profile_budget=budgets.default,
+)
+
+_heavy_lane: Optional[CapacityLimiter] = None
+
+
+def heavy_lane() -> CapacityLimiter:
+    """
+    Worker threads for versions whose cost profile marks them as heavy.
+    Created lazily since a limiter needs a running event loop.
+    """
+    global _heavy_lane
+    if _heavy_lane is None:
+        _heavy_lane = CapacityLimiter(settings.RENDER_HEAVY_LANE_CONCURRENCY)
+    return _heavy_lane
+
+
+def _byte_size(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def _failure_reason(e: Exception) -> str:
+    if isinstance(e, MissingTemplateVariables):
+        return "missing_variables"
+    if isinstance(e, UndefinedError):
+        return "undefined"
+    if isinstance(e, InvalidTemplateData):
+        return "invalid_data"
+    if isinstance(e, RenderBudgetExceeded):
+        return "budget"
+    return "error"
 
 
 class TemplateService:
     def __init__(self, session: AsyncSession):
         self.session = session
-        self.renderer = TemplateRenderer()
+        self.renderer = renderer
 
     async def list_templates(
         self,
@@ -52,7 +125,7 @@ class TemplateService:
             await self.session.refresh(db_obj)
         except IntegrityError:
             await self.session.rollback()
-            raise DuplicateTemplateError(f"Template with key '{template_in.key}' already exists for this tenant.")
+            raise DuplicateTemplateError(f"Template with key '{template_in.key}' already exists for this tenant and channel.")
         return db_obj
 
     async def get_template(self, id: uuid.UUID) -> DBTemplate:
@@ -63,14 +136,20 @@ class TemplateService:
             raise TemplateNotFound(f"Template with id {id} not found")
         return tpl
 
+    async def _require_template(self, id: uuid.UUID) -> DBTemplate:
+        tpl = await self.session.get(DBTemplate, id)
+        if not tpl:
+            raise TemplateNotFound(f"Template with id {id} not found")
+        return tpl
+
     async def delete_template(self, id: uuid.UUID) -> None:
         tpl = await self.get_template(id)
         await self.session.delete(tpl)
         await self.session.commit()
 
     async def create_version(self, template_id: uuid.UUID, version_in: TemplateVersionCreate) -> DBTemplateVersion:
-        # Verify template exists
-        await self.get_template(template_id)
+        # Verify template exists, without loading all of its versions
+        await self._require_template(template_id)
 
         # Calculate next version
         q_ver = select(func.max(DBTemplateVersion.version)).where(
@@ -93,14 +172,19 @@ class TemplateService:
         return db_ver
         
     async def list_template_versions(self, template_id: uuid.UUID) -> List[DBTemplateVersion]:
-        # Verify template exists
-        await self.get_template(template_id)
+        # Verify template exists, without loading all of its versions
+        await self._require_template(template_id)
         
         query = select(DBTemplateVersion).where(DBTemplateVersion.template_id == template_id).order_by(DBTemplateVersion.version.asc())
         result = await self.session.execute(query)
         return result.scalars().all()
 
-    async def publish_version(self, template_id: uuid.UUID, version_id: uuid.UUID) -> DBTemplateVersion:
+    async def publish_version(
+        self,
+        template_id: uuid.UUID,
+        version_id: uuid.UUID,
+        sample_data: Optional[dict] = None
+    ) -> DBTemplateVersion:
         # Get version
         q = select(DBTemplateVersion).where(
             DBTemplateVersion.id == version_id,
@@ -111,6 +195,23 @@ class TemplateService:
         if not ver:
             raise VersionNotFound(f"Version {version_id} not found")
 
+        tpl = await self.session.get(DBTemplate, template_id)
+        await self._publish(tpl, ver, sample_data)
+        await self.session.commit()
+        return ver
+
+    async def _publish(
+        self,
+        tpl: DBTemplate,
+        ver: DBTemplateVersion,
+        sample_data: Optional[dict] = None
+    ) -> None:
+        """
+        Validates a version, derives what renders need (placeholders,
+        dependencies, processed HTML, cost profile) and makes it the current
+        version of its language, without committing. Shared by publish and
+        bulk import.
+        """
         # Syntax validation (double check even if models have it, models might be skipped if we just load DB obj)
         # But here we are dealing with DB obj directly.
         if ver.subject:
@@ -122,23 +223,230 @@ class TemplateService:
         if ver.body_text:
             err = self.renderer.validate_syntax(ver.body_text)
             if err: raise InvalidTemplateSyntax(f"Body Text syntax error: {err}")
+        if ver.placeholders_schema:
+            err = self.renderer.validate_schema(ver.placeholders_schema)
+            if err: raise InvalidTemplateSyntax(f"Placeholders schema error: {err}")
+
+        # Extract placeholders once so the render path can fail fast and prune data
+        ver.placeholders = {
+            part: self.renderer.find_placeholders(getattr(ver, part))
+            for part in TEMPLATE_PARTS
+            if getattr(ver, part)
+        }
+        ver.dependencies = await self._check_dependencies(tpl, ver)
+        # Post-process the HTML once here instead of on every render
+        ver.body_html_compiled = self._run_email_pipeline(tpl, ver)
 
-        # Unpublish current
         q_curr = select(DBTemplateVersion).where(
-            DBTemplateVersion.template_id == template_id,
+            DBTemplateVersion.template_id == tpl.id,
             DBTemplateVersion.language == ver.language,
             DBTemplateVersion.is_current == True
         )
         res_curr = await self.session.execute(q_curr)
         curr_ver = res_curr.scalar_one_or_none()
+
+        # Profile render cost off the API process and guard against regressions
+        scope = (tpl.tenant_id, tpl.channel.value)
+        dependencies = await self._load_dependencies(ver, tpl.tenant_id, tpl.channel)
+        cycle = self._find_cycle(tpl.key, ver.dependencies, dependencies)
+        if cycle:
+            raise DependencyCycle(cycle)
+        ver.cost_profile = await admin_renders.profile(
+            render_job(self.renderer, ver, scope, dependencies), sample_data
+        )
+        for error in ver.cost_profile.get("errors", {}).values():
+            if error["type"] == "budget_exceeded":
+                raise RenderBudgetExceeded(error["limit"], f"Publish profiling: {error['message']}")
+        if curr_ver and curr_ver.id != ver.id:
+            self._check_cost_regression(curr_ver.cost_profile, ver.cost_profile)
+
+        # Unpublish current
         if curr_ver:
             curr_ver.is_current = False
         
         ver.status = TemplateStatus.PUBLISHED
         ver.is_current = True
-        
-        await self.session.commit()
-        return ver
+        # Flushed so a later publish in the same transaction sees it
+        await self.session.flush()
+
+    def _run_email_pipeline(self, tpl: DBTemplate, ver: DBTemplateVersion) -> Optional[str]:
+        """
+        Runs the template's email pipeline over body_html. The authored
+        source is kept as is for editing; the result is stored alongside it.
+        """
+        if not tpl.email_pipeline or not ver.body_html:
+            return None
+        try:
+            compiled = run_pipeline(ver.body_html, tpl.email_pipeline)
+        except ValueError as e:
+            raise InvalidTemplateSyntax(f"Email pipeline error: {e}")
+        err = self.renderer.validate_syntax(compiled)
+        if err: raise InvalidTemplateSyntax(f"Email pipeline produced an invalid template: {err}")
+        return compiled
+
+    @staticmethod
+    def _check_cost_regression(previous: Optional[dict], current: dict) -> None:
+        """
+        Rejects a publish whose median render time exceeds the current
+        version's by more than PUBLISH_MAX_COST_REGRESSION. Profiles are only
+        compared when they were measured on the same kind of sample.
+        """
+        ratio = settings.PUBLISH_MAX_COST_REGRESSION
+        if ratio is None or not previous or previous.get("sample") != current.get("sample"):
+            return
+        limit = max(previous["render_ms"] * ratio, settings.PUBLISH_COST_REGRESSION_MIN_MS)
+        if current["render_ms"] > limit:
+            raise RenderCostRegression(previous["render_ms"], current["render_ms"])
+
+    async def get_cost_profile(self, template_id: uuid.UUID, version_id: uuid.UUID) -> Optional[dict]:
+        q = select(DBTemplateVersion.cost_profile).where(
+            DBTemplateVersion.id == version_id,
+            DBTemplateVersion.template_id == template_id
+        )
+        res = await self.session.execute(q)
+        row = res.one_or_none()
+        if not row:
+            raise VersionNotFound(f"Version {version_id} not found")
+        return row.cost_profile
+
+    async def _check_dependencies(self, tpl: DBTemplate, ver: DBTemplateVersion) -> List[str]:
+        """
+        Collects the layouts and partials a version extends or includes and
+        checks they are published templates of the same tenant and channel.
+        """
+        keys = self._find_dependencies(ver)
+        if not keys:
+            return []
+
+        if tpl.key in keys:
+            raise InvalidTemplateSyntax("A template cannot extend or include itself")
+
+        q = (
+            select(DBTemplate.key)
+            .join(DBTemplateVersion)
+            .where(
+                DBTemplate.key.in_(keys),
+                DBTemplate.channel == tpl.channel,
+                DBTemplate.tenant_id == tpl.tenant_id,
+                DBTemplateVersion.status == TemplateStatus.PUBLISHED,
+                DBTemplateVersion.is_current == True
+            )
+        )
+        res = await self.session.execute(q)
+        unknown = set(keys) - set(res.scalars().all())
+        if unknown:
+            raise InvalidTemplateSyntax(f"Unknown template reference(s): {', '.join(sorted(unknown))}")
+        return keys
+
+    @staticmethod
+    def _find_cycle(key: str, keys: Optional[Sequence[str]], dependencies: Sequence[Any]) -> Optional[List[str]]:
+        """
+        Returns a path of references leading from `key` back to itself
+        through the published dependencies (as loaded by
+        _load_dependencies), or None. Direct self-references are rejected
+        earlier, by _check_dependencies.
+        """
+        graph = {row.key: row.dependencies or () for row in dependencies}
+        paths = [[key, dep] for dep in keys or ()]
+        seen = set()
+        while paths:
+            path = paths.pop()
+            if path[-1] == key:
+                return path
+            if path[-1] in seen:
+                continue
+            seen.add(path[-1])
+            paths.extend(path + [dep] for dep in graph.get(path[-1], ()))
+        return None
+
+    def _find_dependencies(self, ver: DBTemplateVersion) -> List[str]:
+        keys = {}
+        for part in TEMPLATE_PARTS:
+            if getattr(ver, part):
+                keys.update(dict.fromkeys(self.renderer.find_dependencies(getattr(ver, part))))
+        if None in keys:
+            raise InvalidTemplateSyntax("Extended or included template names must be string literals")
+        return sorted(keys)
+
+    async def _load_dependencies(
+        self,
+        version: DBTemplateVersion,
+        tenant_id: Optional[str],
+        channel: ChannelType,
+        keys: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """
+        Registers the published layouts and partials a version depends on,
+        transitively, with the renderer's loader.
+
+        Only metadata is queried per render; bodies are fetched for versions
+        the loader does not hold yet. Returns the metadata rows so their
+        placeholders can be merged with the version's own.
+        """
+        if keys is None:
+            keys = version.dependencies or ()
+        pending = set(keys)
+        if not pending:
+            return []
+
+        with tracer.start_as_current_span("template.load_dependencies") as span:
+            loaded = await self._fetch_dependencies(version, tenant_id, channel, pending)
+            span.set_attribute("template.dependencies", len(loaded))
+        return loaded
+
+    async def _fetch_dependencies(
+        self,
+        version: DBTemplateVersion,
+        tenant_id: Optional[str],
+        channel: ChannelType,
+        pending: Set[str]
+    ) -> List[Any]:
+        scope = (tenant_id, channel.value)
+        languages = [version.language]
+        if "-" in version.language:
+            languages.append(version.language.split("-")[0])
+
+        loaded = {}
+        while pending:
+            q = (
+                select(
+                    DBTemplate.key,
+                    DBTemplateVersion.id,
+                    DBTemplateVersion.language,
+                    DBTemplateVersion.placeholders,
+                    DBTemplateVersion.dependencies
+                )
+                .join(DBTemplate)
+                .where(
+                    DBTemplate.key.in_(pending),
+                    DBTemplate.channel == channel,
+                    DBTemplate.tenant_id == tenant_id,
+                    DBTemplateVersion.language.in_(languages),
+                    DBTemplateVersion.status == TemplateStatus.PUBLISHED,
+                    DBTemplateVersion.is_current == True
+                )
+            )
+            res = await self.session.execute(q)
+            found = {}
+            for row in res.all():
+                current = found.get(row.key)
+                if current is None or languages.index(row.language) < languages.index(current.language):
+                    found[row.key] = row
+            loaded.update(found)
+            pending = {dep for row in found.values() for dep in (row.dependencies or ())} - loaded.keys()
+
+        stale = {
+            row.id: row.key for row in loaded.values()
+            if row.placeholders is None or not self.renderer.is_dependency_registered(
+                scope, version.language, row.key, row.id, list(row.placeholders)
+            )
+        }
+        if stale:
+            res = await self.session.execute(select(DBTemplateVersion).where(DBTemplateVersion.id.in_(stale)))
+            for dep in res.scalars().all():
+                self.renderer.register_dependency(scope, version.language, stale[dep.id], dep)
+
+        return list(loaded.values())
 
     async def preview_version(self, template_id: uuid.UUID, version_id: uuid.UUID, data: dict) -> dict:
         q = select(DBTemplateVersion).where(
@@ -150,21 +458,19 @@ class TemplateService:
         if not ver:
             raise VersionNotFound(f"Version {version_id} not found")
 
-        # Forgiving render for preview
-        strict = False 
-        return {
-            "subject": self.renderer.render(ver.subject or "", data, strict),
-            "body_html": self.renderer.render(ver.body_html or "", data, strict),
-            "body_text": self.renderer.render(ver.body_text or "", data, strict),
-        }
+        # Drafts have no stored dependencies yet, find them on the fly
+        tpl = await self.session.get(DBTemplate, template_id)
+        dependencies = await self._load_dependencies(ver, tpl.tenant_id, tpl.channel, self._find_dependencies(ver))
+
+        # Forgiving render for preview, in a worker process
+        scope = (tpl.tenant_id, tpl.channel.value)
+        budget = budgets.for_scope(*scope)
+        return await admin_renders.preview(render_job(self.renderer, ver, scope, dependencies), data, budget)
     
     async def preview_content(self, content_html: Optional[str], content_text: Optional[str], subject: Optional[str], data: dict) -> dict:
-        strict = False
-        return {
-             "subject": self.renderer.render(subject or "", data, strict),
-             "body_html": self.renderer.render(content_html or "", data, strict),
-             "body_text": self.renderer.render(content_text or "", data, strict),
-        }
+        return await admin_renders.preview_content(
+            {"subject": subject, "body_html": content_html, "body_text": content_text}, data
+        )
 
     async def resolve_and_render(
         self,
@@ -173,24 +479,310 @@ class TemplateService:
         tenant_id: Optional[str],
         language: str,
         data: dict,
-        strict: bool = True
+        strict: bool = True,
+        parts: Optional[Sequence[RenderPart]] = None
     ) -> dict:
-        version = await self.resolve_template_version(key, channel, tenant_id, language)
+        """
+        Resolves the published version and renders the parts the channel
+        delivers, optionally narrowed down to the requested `parts`.
+        Only rendered parts are present in the result.
+        """
+        version, dependencies = await self._resolve(key, channel, tenant_id, language)
         if not version:
              return None
 
+        return await self._render_in_lane(version, tenant_id, channel, data, strict, parts, dependencies, key)
+
+    async def resolve_and_stream(
+        self,
+        key: str,
+        channel: ChannelType,
+        tenant_id: Optional[str],
+        language: str,
+        data: dict,
+        strict: bool = True,
+        parts: Optional[Sequence[RenderPart]] = None
+    ) -> Optional[Tuple[DBTemplateVersion, Iterator[Tuple[str, str]]]]:
+        """
+        Resolves the published version and returns it with an iterator of
+        (part, chunk) pairs. Data is checked before this returns; rendering
+        happens as the iterator is consumed.
+        """
+        version, dependencies = await self._resolve(key, channel, tenant_id, language)
+        if not version:
+             return None
+
+        return version, self.stream_version(version, tenant_id, channel, data, strict, parts, dependencies, key)
+
+    async def _resolve(
+        self,
+        key: str,
+        channel: ChannelType,
+        tenant_id: Optional[str],
+        language: str
+    ) -> Tuple[Optional[DBTemplateVersion], List[Any]]:
+        with tracer.start_as_current_span("template.resolve", attributes={
+            "template.key": key, "template.channel": channel.value, "template.language": language,
+        }) as span:
+            start = time.perf_counter()
+            version = await self.resolve_template_version(key, channel, tenant_id, language)
+            dependencies = await self._load_dependencies(version, tenant_id, channel) if version else []
+            self._record_resolution(key, channel, tenant_id, language, version, time.perf_counter() - start)
+            span.set_attribute("template.found", version is not None)
+            if version is not None:
+                span.set_attribute("template.version", version.version)
+                span.set_attribute("template.language_used", version.language)
+        return version, dependencies
+
+    @staticmethod
+    def _record_resolution(
+        key: str,
+        channel: ChannelType,
+        tenant_id: Optional[str],
+        language: str,
+        version: Optional[DBTemplateVersion],
+        seconds: float
+    ) -> None:
+        if version is None:
+            fallback = "not_found"
+        else:
+            fallback = "exact" if version.language == language else "base_language"
+        labels = {"channel": channel.value, "tenant": tenant_label(tenant_id), "template_key": template_key_label(key)}
+        TEMPLATE_RESOLVE_SECONDS.labels(**labels).observe(seconds)
+        TEMPLATE_RESOLUTIONS.labels(fallback=fallback, **labels).inc()
+
+    async def resolve_and_render_channels(
+        self,
+        key: str,
+        channels: Sequence[ChannelType],
+        tenant_id: Optional[str],
+        language: str,
+        data: dict,
+        strict: bool = True,
+        parts: Optional[Sequence[RenderPart]] = None
+    ) -> dict:
+        """
+        Renders one event for several channels against the same data.
+
+        All versions are resolved in a single query. Returns a dict keyed by
+        channel holding either the render result, None if no published
+        version matched, or the TemplateException raised for that channel.
+        """
+        start = time.perf_counter()
+        with tracer.start_as_current_span("template.resolve", attributes={
+            "template.key": key, "template.channels": [channel.value for channel in channels],
+            "template.language": language,
+        }):
+            versions = await self.resolve_template_versions(key, channels, tenant_id, language)
+        # The lookup is shared; each channel adds its own dependency loading
+        lookup_seconds = time.perf_counter() - start
+
+        results = {}
+        for channel in channels:
+            version = versions.get(channel)
+            if not version:
+                self._record_resolution(key, channel, tenant_id, language, None, lookup_seconds)
+                results[channel] = None
+                continue
+            try:
+                start = time.perf_counter()
+                dependencies = await self._load_dependencies(version, tenant_id, channel)
+                self._record_resolution(
+                    key, channel, tenant_id, language, version, lookup_seconds + time.perf_counter() - start
+                )
+                results[channel] = await self._render_in_lane(
+                    version, tenant_id, channel, data, strict, parts, dependencies, key
+                )
+            except TemplateException as e:
+                results[channel] = e
+        return results
+
+    async def _render_in_lane(
+        self,
+        version: DBTemplateVersion,
+        tenant_id: Optional[str],
+        channel: ChannelType,
+        data: dict,
+        strict: bool,
+        parts: Optional[Sequence[RenderPart]],
+        dependencies: Sequence[Any],
+        key: Optional[str] = None
+    ) -> dict:
+        """
+        Renders inline, or on the heavy lane's worker threads when the
+        version's cost profile exceeds RENDER_HEAVY_THRESHOLD_MS, so heavy
+        templates do not hold the event loop.
+        """
+        render = partial(self.render_version, version, tenant_id, channel, data, strict, parts, dependencies, key)
+        if self.is_heavy(version):
+            return await to_thread.run_sync(render, limiter=heavy_lane())
+        return render()
+
+    @staticmethod
+    def is_heavy(version: DBTemplateVersion) -> bool:
+        threshold = settings.RENDER_HEAVY_THRESHOLD_MS
+        profile = version.cost_profile
+        if threshold is None or not profile:
+            return False
+        # A part that failed while profiling has no reliable cost
+        return bool(profile.get("errors")) or profile.get("render_ms", 0) >= threshold
+
+    def render_version(
+        self,
+        version: DBTemplateVersion,
+        tenant_id: Optional[str],
+        channel: ChannelType,
+        data: dict,
+        strict: bool = True,
+        parts: Optional[Sequence[RenderPart]] = None,
+        dependencies: Sequence[Any] = (),
+        key: Optional[str] = None
+    ) -> dict:
+        """
+        Renders the requested parts of a resolved version. `key` is the
+        template key, only used to label metrics.
+        """
+        labels = self._render_labels(version, tenant_id, channel, key)
+        render_parts = self.parts_for(channel, parts)
+        scope = (tenant_id, channel.value)
+        budget = budgets.for_scope(*scope)
+        result = {"version": version}
         try:
-            subject = self.renderer.render(version.subject or "", data, strict)
-            body_html = self.renderer.render(version.body_html or "", data, strict)
-            body_text = self.renderer.render(version.body_text or "", data, strict)
+            data = self._prepare_data(version, data, strict, render_parts, dependencies)
+            for part in render_parts:
+                with tracer.start_as_current_span("template.render_part", attributes={"template.part": part}):
+                    start = time.perf_counter()
+                    output = result[part] = self.renderer.render_version(version, part, data, strict, scope, budget)
+                TEMPLATE_RENDER_SECONDS.labels(part=part, **labels).observe(time.perf_counter() - start)
+                TEMPLATE_OUTPUT_BYTES.labels(part=part, **labels).observe(_byte_size(output))
+        except RenderBudgetExceeded as e:
+            RENDER_BUDGET_ABORTS.labels(limit=e.limit, channel=channel.value).inc()
+            TEMPLATE_RENDER_FAILURES.labels(reason="budget", **labels).inc()
+            raise
+        except TemplateException as e:
+            TEMPLATE_RENDER_FAILURES.labels(reason=_failure_reason(e), **labels).inc()
+            raise
         except Exception as e:
+            TEMPLATE_RENDER_FAILURES.labels(reason=_failure_reason(e), **labels).inc()
             raise InvalidTemplateSyntax(f"Rendering failed: {str(e)}")
 
+        return result
+
+    def stream_version(
+        self,
+        version: DBTemplateVersion,
+        tenant_id: Optional[str],
+        channel: ChannelType,
+        data: dict,
+        strict: bool = True,
+        parts: Optional[Sequence[RenderPart]] = None,
+        dependencies: Sequence[Any] = (),
+        key: Optional[str] = None
+    ) -> Iterator[Tuple[str, str]]:
+        labels = self._render_labels(version, tenant_id, channel, key)
+        render_parts = self.parts_for(channel, parts)
+        try:
+            data = self._prepare_data(version, data, strict, render_parts, dependencies)
+        except TemplateException as e:
+            TEMPLATE_RENDER_FAILURES.labels(reason=_failure_reason(e), **labels).inc()
+            raise
+        scope = (tenant_id, channel.value)
+        return self._generate_parts(version, render_parts, data, strict, scope, budgets.for_scope(*scope), labels)
+
+    def _generate_parts(
+        self,
+        version: DBTemplateVersion,
+        parts: Sequence[str],
+        data: dict,
+        strict: bool,
+        scope: Tuple[Optional[str], str],
+        budget: RenderBudget,
+        labels: dict
+    ) -> Iterator[Tuple[str, str]]:
+        # Render time is not recorded for streams: it includes the consumer
+        try:
+            for part in parts:
+                size = 0
+                for chunk in self.renderer.generate_version(version, part, data, strict, scope, budget):
+                    size += _byte_size(chunk)
+                    yield part, chunk
+                TEMPLATE_OUTPUT_BYTES.labels(part=part, **labels).observe(size)
+        except RenderBudgetExceeded as e:
+            RENDER_BUDGET_ABORTS.labels(limit=e.limit, channel=scope[1]).inc()
+            TEMPLATE_RENDER_FAILURES.labels(reason="budget", **labels).inc()
+            raise
+        except Exception as e:
+            TEMPLATE_RENDER_FAILURES.labels(reason=_failure_reason(e), **labels).inc()
+            raise InvalidTemplateSyntax(f"Rendering failed: {str(e)}")
+
+    @staticmethod
+    def _render_labels(
+        version: DBTemplateVersion,
+        tenant_id: Optional[str],
+        channel: ChannelType,
+        key: Optional[str]
+    ) -> dict:
         return {
-            "version": version,
-            "subject": subject,
-            "body_html": body_html,
-            "body_text": body_text
+            "channel": channel.value,
+            "tenant": tenant_label(tenant_id),
+            "language": version.language,
+            "template_key": template_key_label(key),
+        }
+
+    @staticmethod
+    def parts_for(channel: ChannelType, parts: Optional[Sequence[RenderPart]] = None) -> List[str]:
+        """
+        Returns the part names to render for a channel, in policy order.
+        """
+        policy = CHANNEL_PARTS[channel]
+        if parts is not None:
+            policy = [part for part in policy if part in parts]
+        return [part.value for part in policy]
+
+    def _prepare_data(
+        self,
+        version: DBTemplateVersion,
+        data: dict,
+        strict: bool,
+        parts: Sequence[str] = TEMPLATE_PARTS,
+        dependencies: Sequence[Any] = ()
+    ) -> dict:
+        """
+        Checks data against the placeholders schema and the placeholders
+        extracted at publish time.
+
+        Schema violations are always rejected. In strict mode all missing
+        required keys are reported before any part is rendered. Keys that
+        neither the rendered parts nor their layouts and partials read are
+        dropped so Jinja does not copy them into every render context.
+        """
+        errors = self.renderer.validate_data(version, data)
+        if errors:
+            raise InvalidTemplateData(errors)
+
+        placeholders = version.placeholders
+        if placeholders is None:
+            # Published before placeholder extraction existed
+            return data
+
+        used = [placeholders[part] for part in parts if part in placeholders]
+
+        if strict:
+            required = {name for part in used for name in part["required"]}
+            missing = required - data.keys()
+            if missing:
+                raise MissingTemplateVariables(sorted(missing))
+
+        for dep in dependencies:
+            if dep.placeholders is None:
+                return data
+            used.extend(dep.placeholders[part] for part in parts if part in dep.placeholders)
+
+        return {
+            name: data[name]
+            for part in used
+            for name in part["variables"]
+            if name in data
         }
 
     async def resolve_template_version(
@@ -201,46 +793,70 @@ class TemplateService:
         language: str
     ) -> Optional[DBTemplateVersion]:
         """
-        Resolves the best matching published template version.
+        Resolves the best matching published template version: the exact
+        language first, then the base language.
         """
-        # Exact match
+        languages = [language]
+        if "-" in language:
+            languages.append(language.split("-")[0])
+
+        for attempt, lang in zip(("exact", "base_language"), languages):
+            with tracer.start_as_current_span("template.resolve_attempt", attributes={
+                "template.attempt": attempt, "template.language": lang,
+            }) as span:
+                query = (
+                    select(DBTemplateVersion)
+                    .join(DBTemplate)
+                    .where(
+                        DBTemplate.key == key,
+                        DBTemplate.channel == channel,
+                        DBTemplate.tenant_id == tenant_id,
+                        DBTemplateVersion.language == lang,
+                        DBTemplateVersion.status == TemplateStatus.PUBLISHED,
+                        DBTemplateVersion.is_current == True
+                    )
+                )
+                result = await self.session.execute(query)
+                version = result.scalar_one_or_none()
+                span.set_attribute("template.matched", version is not None)
+            if version:
+                return version
+
+        return None
+
+    async def resolve_template_versions(
+        self,
+        key: str,
+        channels: Sequence[ChannelType],
+        tenant_id: Optional[str],
+        language: str
+    ) -> dict:
+        """
+        Resolves the best matching published version for each channel
+        with one query covering both the exact and the base language.
+        """
+        languages = [language]
+        if "-" in language:
+            languages.append(language.split("-")[0])
+
         query = (
-            select(DBTemplateVersion)
+            select(DBTemplateVersion, DBTemplate.channel)
             .join(DBTemplate)
             .where(
                 DBTemplate.key == key,
-                DBTemplate.channel == channel,
+                DBTemplate.channel.in_(channels),
                 DBTemplate.tenant_id == tenant_id,
-                DBTemplateVersion.language == language,
+                DBTemplateVersion.language.in_(languages),
                 DBTemplateVersion.status == TemplateStatus.PUBLISHED,
                 DBTemplateVersion.is_current == True
             )
         )
         result = await self.session.execute(query)
-        version = result.scalar_one_or_none()
-        
-        if version:
-            return version
 
-        # Base language fallback
-        if "-" in language:
-            base_lang = language.split("-")[0]
-            query_base = (
-                select(DBTemplateVersion)
-                .join(DBTemplate)
-                .where(
-                    DBTemplate.key == key,
-                    DBTemplate.channel == channel,
-                    DBTemplate.tenant_id == tenant_id,
-                    DBTemplateVersion.language == base_lang,
-                    DBTemplateVersion.status == TemplateStatus.PUBLISHED,
-                    DBTemplateVersion.is_current == True
-                )
-            )
-            result_base = await self.session.execute(query_base)
-            version_base = result_base.scalar_one_or_none()
-            
-            if version_base:
-                return version_base
-
-        return None
+        # Exact language wins over the base language fallback
+        versions = {}
+        for version, channel in result.all():
+            current = versions.get(channel)
+            if current is None or languages.index(version.language) < languages.index(current.language):
+                versions[channel] = version
+        return versions
@@ -0,0 +1,174 @@
+"""
+Admin-side rendering (previews and publish-time profiling) in worker
+processes.
+
+These renders are CPU-bound and arbitrary in cost. Run on the event loop
+they stall service renders outright, and even on threads they hold the GIL
+that every service render needs at each database round trip. Worker
+processes keep that cost off the API process entirely.
+
+Workers do not touch the database: each job carries a snapshot of the
+version and the sources of the layouts and partials it uses, which the
+parent has already loaded.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from types import SimpleNamespace
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.domain.templates.loader import TemplateRef
+from app.domain.templates.profiling import CostProfiler
+from app.domain.templates.renderer import TemplateRenderer
+from app.domain.templates.sandbox import RenderBudget
+
+PARTS = ("subject", "body_html", "body_text")
+
+# Attributes of a version the renderer and profiler read
+VERSION_FIELDS = (
+    "id", "updated_at", "language", "subject", "body_html", "body_html_compiled", "body_text", "placeholders_schema"
+)
+
+WORKER_NICENESS = 10
+
+Scope = Tuple[Optional[str], str]
+
+
+class RenderJob(NamedTuple):
+    version: Dict[str, Any]
+    scope: Scope
+    sources: Tuple[Tuple[TemplateRef, str, Any], ...]
+
+
+def render_job(renderer: TemplateRenderer, version: Any, scope: Scope, dependencies: Sequence[Any]) -> RenderJob:
+    """
+    Snapshots a version and the dependency sources registered for it on
+    `renderer`'s loader (see TemplateService._load_dependencies).
+    """
+    tenant_id, channel = scope
+    sources = []
+    for dep in dependencies:
+        for part in PARTS:
+            ref = TemplateRef(tenant_id, channel, version.language, part, dep.key)
+            entry = renderer.loader.entry(ref)
+            if entry is not None:
+                sources.append((ref, *entry))
+    return RenderJob(
+        {field: getattr(version, field, None) for field in VERSION_FIELDS}, scope, tuple(sources)
+    )
+
+
+# Per worker process, set up by _init_worker
+_renderer: Optional[TemplateRenderer] = None
+_profiler: Optional[CostProfiler] = None
+
+
+def _init_worker(cache_size: int, sandboxed: bool, profile_runs: int, profile_budget: RenderBudget) -> None:
+    global _renderer, _profiler
+    # Yield the CPU to the API process when they compete for it
+    os.nice(WORKER_NICENESS)
+    _renderer = TemplateRenderer(cache_size=cache_size, sandboxed=sandboxed)
+    # Profiling always runs sandboxed, sharing the loader like the API's profiler
+    _profiler = CostProfiler(
+        TemplateRenderer(cache_size=cache_size, sandboxed=True, loader=_renderer.loader),
+        runs=profile_runs,
+        budget=profile_budget,
+    )
+
+
+def _load(job: RenderJob) -> SimpleNamespace:
+    for ref, source, version_id in job.sources:
+        _renderer.loader.register(ref, source, version_id)
+    return SimpleNamespace(**job.version)
+
+
+def _preview(job: RenderJob, data: Dict[str, Any], budget: RenderBudget) -> Dict[str, str]:
+    version = _load(job)
+    # Forgiving render for preview
+    return {part: _renderer.render_version(version, part, data, False, job.scope, budget) for part in PARTS}
+
+
+def _preview_content(parts: Dict[str, Optional[str]], data: Dict[str, Any]) -> Dict[str, str]:
+    return {part: _renderer.render(source or "", data, False) for part, source in parts.items()}
+
+
+def _profile(job: RenderJob, sample_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return _profiler.profile(_load(job), job.scope, sample_data)
+
+
+def _validate(sources: Sequence[Tuple[Any, str, Any]]) -> List[Tuple[Any, str]]:
+    # (label, field, source) in; (label, message) out for the invalid ones
+    errors = []
+    for label, field, source in sources:
+        if field == "placeholders_schema":
+            err = _renderer.validate_schema(source)
+        else:
+            err = _renderer.validate_syntax(source)
+        if err:
+            errors.append((label, f"{field}: {err}"))
+    return errors
+
+
+class AdminRenderPool:
+    """
+    A bounded pool of worker processes for admin-side renders.
+
+    The pool starts on first use; jobs beyond `workers` queue in the
+    executor, and the admin request lane bounds how many can be waiting.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        cache_size: int,
+        sandboxed: bool,
+        profile_runs: int,
+        profile_budget: RenderBudget
+    ):
+        self.workers = workers
+        self._initargs = (cache_size, sandboxed, profile_runs, profile_budget)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned rather than forked: the API process has running threads
+            # and open connections a fork would copy
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=self._initargs,
+            )
+        return self._executor
+
+    async def _run(self, func: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args))
+
+    async def preview(self, job: RenderJob, data: Dict[str, Any], budget: RenderBudget) -> Dict[str, str]:
+        return await self._run(_preview, job, data, budget)
+
+    async def preview_content(self, parts: Dict[str, Optional[str]], data: Dict[str, Any]) -> Dict[str, str]:
+        return await self._run(_preview_content, parts, data)
+
+    async def profile(self, job: RenderJob, sample_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._run(_profile, job, sample_data)
+
+    async def validate(self, sources: Sequence[Tuple[Any, str, Any]]) -> List[Tuple[Any, str]]:
+        """
+        Checks template syntax and placeholder schemas, split across the
+        workers. Returns (label, message) for every invalid source.
+        """
+        if not sources:
+            return []
+        size = -(-len(sources) // self.workers)
+        chunks = [sources[i:i + size] for i in range(0, len(sources), size)]
+        results = await asyncio.gather(*(self._run(_validate, chunk) for chunk in chunks))
+        return [error for errors in results for error in errors]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
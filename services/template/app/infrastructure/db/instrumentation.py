@@ -0,0 +1,64 @@
+import time
+from typing import Any
+
+from asgi_correlation_id import correlation_id
+from loguru import logger
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.metrics import DB_STATEMENT_SECONDS
+
+tracer = trace.get_tracer(__name__)
+
+# Longest statement text put on spans and slow query logs
+MAX_STATEMENT_CHARS = 1000
+
+
+def _operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else ""
+
+
+def instrument_engine(engine: AsyncEngine, pool: str) -> None:
+    """
+    Times every statement run on `engine`: a histogram by pool and
+    operation, a child span of the current trace, and a warning with the
+    request's correlation id for statements slower than DB_SLOW_QUERY_MS.
+
+    Parameters are never recorded, as they carry render data.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        operation = _operation(statement)
+        context._timing = (time.perf_counter(), operation, tracer.start_span(
+            f"db {operation}",
+            kind=trace.SpanKind.CLIENT,
+            attributes={"db.system": "postgresql", "db.operation": operation, "db.pool": pool,
+                        "db.statement": statement[:MAX_STATEMENT_CHARS]},
+        ))
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        start, operation, span = context._timing
+        seconds = time.perf_counter() - start
+        span.end()
+        DB_STATEMENT_SECONDS.labels(pool=pool, operation=operation).observe(seconds)
+
+        threshold = settings.DB_SLOW_QUERY_MS
+        if threshold is not None and seconds * 1000 >= threshold:
+            logger.bind(correlation_id=correlation_id.get()).warning(
+                f"Slow query on the {pool} pool ({seconds * 1000:.1f}ms): {statement[:MAX_STATEMENT_CHARS]}"
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context: Any) -> None:
+        timing = getattr(exception_context.execution_context, "_timing", None)
+        if timing is not None:
+            span = timing[2]
+            span.set_status(Status(StatusCode.ERROR, str(exception_context.original_exception)))
+            span.end()
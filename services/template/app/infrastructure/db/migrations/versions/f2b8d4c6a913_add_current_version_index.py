@@ -0,0 +1,33 @@
+"""add_current_version_index
+
+Revision ID: f2b8d4c6a913
+Revises: e4a91c7d2f60
+Create Date: 2026-10-19 21:14:37.602915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4c6a913'
+down_revision: Union[str, Sequence[str], None] = 'e4a91c7d2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Resolution and publishing look up the current version of a template in
+    # one language; without this they read every version of that language
+    op.create_index(
+        'ix_template_versions_current', 'template_versions', ['template_id', 'language'],
+        unique=False, postgresql_where=sa.text('is_current')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_template_versions_current', table_name='template_versions', postgresql_where=sa.text('is_current'))
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import String, Text, Boolean, Integer, DateTime, ForeignKey, Enum as SAEnum, UniqueConstraint, JSON
+from sqlalchemy import String, Text, Boolean, Integer, DateTime, ForeignKey, Enum as SAEnum, UniqueConstraint, Index, JSON, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 
@@ -20,6 +20,7 @@ class Template(Base):
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     channel: Mapped[ChannelType] = mapped_column(SAEnum(ChannelType, native_enum=False), nullable=False)
     category: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    email_pipeline: Mapped[Optional[list]] = mapped_column(JSON, nullable=True) # Steps run on body_html at publish
     
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -27,7 +28,7 @@ class Template(Base):
     versions: Mapped[List["TemplateVersion"]] = relationship("TemplateVersion", back_populates="template", cascade="all, delete-orphan")
 
     __table_args__ = (
-        UniqueConstraint('tenant_id', 'key', name='uq_template_tenant_key'),
+        UniqueConstraint('tenant_id', 'key', 'channel', name='uq_template_tenant_key_channel'),
     )
 
 
@@ -48,6 +49,10 @@ class TemplateVersion(Base):
     is_current: Mapped[bool] = mapped_column(Boolean, default=False) # Helper to quickly find latest published
     
     placeholders_schema: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    placeholders: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True) # Extracted at publish time
+    dependencies: Mapped[Optional[list]] = mapped_column(JSON, nullable=True) # Keys of extended/included templates
+    cost_profile: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True) # Measured at publish time
+    body_html_compiled: Mapped[Optional[str]] = mapped_column(Text, nullable=True) # body_html after the email pipeline
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -56,4 +61,6 @@ class TemplateVersion(Base):
 
     __table_args__ = (
         UniqueConstraint('template_id', 'language', 'version', name='uq_items'),
+        # Current version per template and language, read on every render
+        Index('ix_template_versions_current', 'template_id', 'language', postgresql_where=text('is_current')),
     )
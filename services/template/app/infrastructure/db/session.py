@@ -1,16 +1,40 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
 from app.core.config import settings
+from app.infrastructure.db.instrumentation import instrument_engine
 
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,
     future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
 )
 
+# Admin endpoints get their own, smaller pool
+admin_engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=False,
+    future=True,
+    pool_size=settings.DB_ADMIN_POOL_SIZE,
+    max_overflow=settings.DB_ADMIN_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+)
+
+instrument_engine(engine, pool="render")
+instrument_engine(admin_engine, pool="admin")
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False,
     autoflush=False,
 )
+
+AdminSessionLocal = async_sessionmaker(
+    bind=admin_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
@@ -1,16 +1,43 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
 from asgi_correlation_id import CorrelationIdMiddleware
 
+from app.core.capture import traffic_capture
 from app.core.config import settings
 from app.core.logging import setup_logging
-from app.api.v1 import health, templates, render
+from app.api.v1 import health, templates, render, profiles
+from app.core.loop_monitor import loop_monitor
+from app.core.profiling import ProfilingMiddleware
 from app.core.telemetry import setup_telemetry
+from app.domain.templates.services import admin_renders
 
 setup_logging()
 
-app = FastAPI(title="Template Service")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve gRPC renders from the same process so both share renderer caches
+    loop_monitor.start()
+    server = None
+    if settings.GRPC_ENABLE:
+        from app.rpc.server import create_server
+
+        server, _ = create_server()
+        await server.start()
+    try:
+        yield
+    finally:
+        if server is not None:
+            await server.stop(settings.GRPC_SHUTDOWN_GRACE_SECONDS)
+        admin_renders.shutdown()
+        traffic_capture.stop()
+        await loop_monitor.stop()
+
+
+app = FastAPI(title="Template Service", lifespan=lifespan)
 
 # Middleware
 app.add_middleware(
@@ -20,6 +47,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
 app.add_middleware(CorrelationIdMiddleware)
 
 setup_telemetry(app)
@@ -32,3 +60,4 @@ Instrumentator().instrument(app).expose(app)
 app.include_router(health.router, prefix="/health", tags=["health"])
 app.include_router(templates.router, prefix="/api/v1/templates", tags=["templates"])
 app.include_router(render.router, prefix="/api/v1/render", tags=["render"])
+app.include_router(profiles.router, prefix="/api/v1/profiles", tags=["profiles"])
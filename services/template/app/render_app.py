@@ -0,0 +1,55 @@
+"""
+Render-only application for internal callers.
+
+`app.main` serves browsers and admins, so it carries CORS, id generation,
+the Prometheus Instrumentator and optionally OpenTelemetry on every route.
+This app serves the same render endpoints with only what they need: the
+service-token check (on the router), one request histogram and request id
+passthrough.
+
+Deploy it on its own:
+    uvicorn app.render_app:app --port 8001
+or mount `create_render_app()` inside another ASGI application.
+"""
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.api.v1 import health, render
+from app.core.capture import traffic_capture
+from app.core.logging import setup_logging
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import RENDER_APP_REQUESTS
+from app.core.middleware import CorrelationIdPassthrough, RequestMetrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_monitor.start()
+    try:
+        yield
+    finally:
+        traffic_capture.stop()
+        await loop_monitor.stop()
+
+
+def create_render_app() -> FastAPI:
+    render_app = FastAPI(title="Template Service (render)", lifespan=lifespan)
+
+    render_app.add_middleware(RequestMetrics, histogram=RENDER_APP_REQUESTS)
+    render_app.add_middleware(CorrelationIdPassthrough)
+
+    render_app.include_router(health.router, prefix="/health", tags=["health"])
+    render_app.include_router(render.router, prefix="/api/v1/render", tags=["render"])
+
+    @render_app.get("/metrics", include_in_schema=False)
+    def metrics() -> Response:
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    return render_app
+
+
+setup_logging()
+
+app = create_render_app()
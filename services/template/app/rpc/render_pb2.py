@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: app/rpc/render.proto
+# Protobuf Python Version: 6.31.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    1,
+    '',
+    'app/rpc/render.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x61pp/rpc/render.proto\x12\x12template.render.v1\"\xaf\x02\n\rRenderRequest\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x14\n\x0ctemplate_key\x18\x02 \x01(\t\x12,\n\x07\x63hannel\x18\x03 \x01(\x0e\x32\x1b.template.render.v1.Channel\x12\x16\n\ttenant_id\x18\x04 \x01(\tH\x00\x88\x01\x01\x12\x10\n\x08language\x18\x05 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x06 \x01(\x0c\x12\x37\n\rdata_encoding\x18\x07 \x01(\x0e\x32 .template.render.v1.DataEncoding\x12\x13\n\x06strict\x18\x08 \x01(\x08H\x01\x88\x01\x01\x12\'\n\x05parts\x18\t \x03(\x0e\x32\x18.template.render.v1.PartB\x0c\n\n_tenant_idB\t\n\x07_strict\"\xf0\x01\n\x0cRenderResult\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x0c\n\x04\x63ode\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t\x12\x19\n\x11missing_variables\x18\x04 \x03(\t\x12\x15\n\rlanguage_used\x18\x05 \x01(\t\x12\x0f\n\x07version\x18\x06 \x01(\x05\x12\x14\n\x07subject\x18\x07 \x01(\tH\x00\x88\x01\x01\x12\x16\n\tbody_html\x18\x08 \x01(\tH\x01\x88\x01\x01\x12\x16\n\tbody_text\x18\t \x01(\tH\x02\x88\x01\x01\x42\n\n\x08_subjectB\x0c\n\n_body_htmlB\x0c\n\n_body_text\"I\n\x12RenderBatchRequest\x12\x33\n\x08requests\x18\x01 \x03(\x0b\x32!.template.render.v1.RenderRequest\"H\n\x13RenderBatchResponse\x12\x31\n\x07results\x18\x01 \x03(\x0b\x32 .template.render.v1.RenderResult*X\n\x07\x43hannel\x12\x17\n\x13\x43HANNEL_UNSPECIFIED\x10\x00\x12\x11\n\rCHANNEL_EMAIL\x10\x01\x12\x0f\n\x0b\x43HANNEL_SMS\x10\x02\x12\x10\n\x0c\x43HANNEL_PUSH\x10\x03*V\n\x04Part\x12\x14\n\x10PART_UNSPECIFIED\x10\x00\x12\x10\n\x0cPART_SUBJECT\x10\x01\x12\x12\n\x0ePART_BODY_HTML\x10\x02\x12\x12\n\x0ePART_BODY_TEXT\x10\x03*A\n\x0c\x44\x61taEncoding\x12\x19\n\x15\x44\x41TA_ENCODING_MSGPACK\x10\x00\x12\x16\n\x12\x44\x41TA_ENCODING_JSON\x10\x01\x32\x97\x02\n\rRenderService\x12M\n\x06Render\x12!.template.render.v1.RenderRequest\x1a .template.render.v1.RenderResult\x12^\n\x0bRenderBatch\x12&.template.render.v1.RenderBatchRequest\x1a\'.template.render.v1.RenderBatchResponse\x12W\n\x0cRenderStream\x12!.template.render.v1.RenderRequest\x1a .template.render.v1.RenderResult(\x01\x30\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'app.rpc.render_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_CHANNEL']._serialized_start=742
+  _globals['_CHANNEL']._serialized_end=830
+  _globals['_PART']._serialized_start=832
+  _globals['_PART']._serialized_end=918
+  _globals['_DATAENCODING']._serialized_start=920
+  _globals['_DATAENCODING']._serialized_end=985
+  _globals['_RENDERREQUEST']._serialized_start=45
+  _globals['_RENDERREQUEST']._serialized_end=348
+  _globals['_RENDERRESULT']._serialized_start=351
+  _globals['_RENDERRESULT']._serialized_end=591
+  _globals['_RENDERBATCHREQUEST']._serialized_start=593
+  _globals['_RENDERBATCHREQUEST']._serialized_end=666
+  _globals['_RENDERBATCHRESPONSE']._serialized_start=668
+  _globals['_RENDERBATCHRESPONSE']._serialized_end=740
+  _globals['_RENDERSERVICE']._serialized_start=988
+  _globals['_RENDERSERVICE']._serialized_end=1267
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,93 @@
+from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from collections.abc import Iterable as _Iterable, Mapping as _Mapping
+from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class Channel(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    CHANNEL_UNSPECIFIED: _ClassVar[Channel]
+    CHANNEL_EMAIL: _ClassVar[Channel]
+    CHANNEL_SMS: _ClassVar[Channel]
+    CHANNEL_PUSH: _ClassVar[Channel]
+
+class Part(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    PART_UNSPECIFIED: _ClassVar[Part]
+    PART_SUBJECT: _ClassVar[Part]
+    PART_BODY_HTML: _ClassVar[Part]
+    PART_BODY_TEXT: _ClassVar[Part]
+
+class DataEncoding(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    DATA_ENCODING_MSGPACK: _ClassVar[DataEncoding]
+    DATA_ENCODING_JSON: _ClassVar[DataEncoding]
+CHANNEL_UNSPECIFIED: Channel
+CHANNEL_EMAIL: Channel
+CHANNEL_SMS: Channel
+CHANNEL_PUSH: Channel
+PART_UNSPECIFIED: Part
+PART_SUBJECT: Part
+PART_BODY_HTML: Part
+PART_BODY_TEXT: Part
+DATA_ENCODING_MSGPACK: DataEncoding
+DATA_ENCODING_JSON: DataEncoding
+
+class RenderRequest(_message.Message):
+    __slots__ = ("request_id", "template_key", "channel", "tenant_id", "language", "data", "data_encoding", "strict", "parts")
+    REQUEST_ID_FIELD_NUMBER: _ClassVar[int]
+    TEMPLATE_KEY_FIELD_NUMBER: _ClassVar[int]
+    CHANNEL_FIELD_NUMBER: _ClassVar[int]
+    TENANT_ID_FIELD_NUMBER: _ClassVar[int]
+    LANGUAGE_FIELD_NUMBER: _ClassVar[int]
+    DATA_FIELD_NUMBER: _ClassVar[int]
+    DATA_ENCODING_FIELD_NUMBER: _ClassVar[int]
+    STRICT_FIELD_NUMBER: _ClassVar[int]
+    PARTS_FIELD_NUMBER: _ClassVar[int]
+    request_id: str
+    template_key: str
+    channel: Channel
+    tenant_id: str
+    language: str
+    data: bytes
+    data_encoding: DataEncoding
+    strict: bool
+    parts: _containers.RepeatedScalarFieldContainer[Part]
+    def __init__(self, request_id: _Optional[str] = ..., template_key: _Optional[str] = ..., channel: _Optional[_Union[Channel, str]] = ..., tenant_id: _Optional[str] = ..., language: _Optional[str] = ..., data: _Optional[bytes] = ..., data_encoding: _Optional[_Union[DataEncoding, str]] = ..., strict: bool = ..., parts: _Optional[_Iterable[_Union[Part, str]]] = ...) -> None: ...
+
+class RenderResult(_message.Message):
+    __slots__ = ("request_id", "code", "error", "missing_variables", "language_used", "version", "subject", "body_html", "body_text")
+    REQUEST_ID_FIELD_NUMBER: _ClassVar[int]
+    CODE_FIELD_NUMBER: _ClassVar[int]
+    ERROR_FIELD_NUMBER: _ClassVar[int]
+    MISSING_VARIABLES_FIELD_NUMBER: _ClassVar[int]
+    LANGUAGE_USED_FIELD_NUMBER: _ClassVar[int]
+    VERSION_FIELD_NUMBER: _ClassVar[int]
+    SUBJECT_FIELD_NUMBER: _ClassVar[int]
+    BODY_HTML_FIELD_NUMBER: _ClassVar[int]
+    BODY_TEXT_FIELD_NUMBER: _ClassVar[int]
+    request_id: str
+    code: int
+    error: str
+    missing_variables: _containers.RepeatedScalarFieldContainer[str]
+    language_used: str
+    version: int
+    subject: str
+    body_html: str
+    body_text: str
+    def __init__(self, request_id: _Optional[str] = ..., code: _Optional[int] = ..., error: _Optional[str] = ..., missing_variables: _Optional[_Iterable[str]] = ..., language_used: _Optional[str] = ..., version: _Optional[int] = ..., subject: _Optional[str] = ..., body_html: _Optional[str] = ..., body_text: _Optional[str] = ...) -> None: ...
+
+class RenderBatchRequest(_message.Message):
+    __slots__ = ("requests",)
+    REQUESTS_FIELD_NUMBER: _ClassVar[int]
+    requests: _containers.RepeatedCompositeFieldContainer[RenderRequest]
+    def __init__(self, requests: _Optional[_Iterable[_Union[RenderRequest, _Mapping]]] = ...) -> None: ...
+
+class RenderBatchResponse(_message.Message):
+    __slots__ = ("results",)
+    RESULTS_FIELD_NUMBER: _ClassVar[int]
+    results: _containers.RepeatedCompositeFieldContainer[RenderResult]
+    def __init__(self, results: _Optional[_Iterable[_Union[RenderResult, _Mapping]]] = ...) -> None: ...
@@ -0,0 +1,186 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from app.rpc import render_pb2 as app_dot_rpc_dot_render__pb2
+
+GRPC_GENERATED_VERSION = '1.76.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in app/rpc/render_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class RenderServiceStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Render = channel.unary_unary(
+                '/template.render.v1.RenderService/Render',
+                request_serializer=app_dot_rpc_dot_render__pb2.RenderRequest.SerializeToString,
+                response_deserializer=app_dot_rpc_dot_render__pb2.RenderResult.FromString,
+                _registered_method=True)
+        self.RenderBatch = channel.unary_unary(
+                '/template.render.v1.RenderService/RenderBatch',
+                request_serializer=app_dot_rpc_dot_render__pb2.RenderBatchRequest.SerializeToString,
+                response_deserializer=app_dot_rpc_dot_render__pb2.RenderBatchResponse.FromString,
+                _registered_method=True)
+        self.RenderStream = channel.stream_stream(
+                '/template.render.v1.RenderService/RenderStream',
+                request_serializer=app_dot_rpc_dot_render__pb2.RenderRequest.SerializeToString,
+                response_deserializer=app_dot_rpc_dot_render__pb2.RenderResult.FromString,
+                _registered_method=True)
+
+
+class RenderServiceServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def Render(self, request, context):
+        """Fails the call with the render's status code
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RenderBatch(self, request, context):
+        """Results are in request order, each with its own code
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RenderStream(self, request_iterator, context):
+        """One result per request, in order, each with its own code
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_RenderServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Render': grpc.unary_unary_rpc_method_handler(
+                    servicer.Render,
+                    request_deserializer=app_dot_rpc_dot_render__pb2.RenderRequest.FromString,
+                    response_serializer=app_dot_rpc_dot_render__pb2.RenderResult.SerializeToString,
+            ),
+            'RenderBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.RenderBatch,
+                    request_deserializer=app_dot_rpc_dot_render__pb2.RenderBatchRequest.FromString,
+                    response_serializer=app_dot_rpc_dot_render__pb2.RenderBatchResponse.SerializeToString,
+            ),
+            'RenderStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.RenderStream,
+                    request_deserializer=app_dot_rpc_dot_render__pb2.RenderRequest.FromString,
+                    response_serializer=app_dot_rpc_dot_render__pb2.RenderResult.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'template.render.v1.RenderService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('template.render.v1.RenderService', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class RenderService(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def Render(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/template.render.v1.RenderService/Render',
+            app_dot_rpc_dot_render__pb2.RenderRequest.SerializeToString,
+            app_dot_rpc_dot_render__pb2.RenderResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RenderBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/template.render.v1.RenderService/RenderBatch',
+            app_dot_rpc_dot_render__pb2.RenderBatchRequest.SerializeToString,
+            app_dot_rpc_dot_render__pb2.RenderBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RenderStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/template.render.v1.RenderService/RenderStream',
+            app_dot_rpc_dot_render__pb2.RenderRequest.SerializeToString,
+            app_dot_rpc_dot_render__pb2.RenderResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
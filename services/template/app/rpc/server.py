@@ -0,0 +1,228 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+import grpc
+import msgpack
+from asgi_correlation_id import correlation_id
+from loguru import logger
+
+from app.core.admission import AdmissionRejected, render_admission
+from app.core.config import settings
+from app.domain.templates.exceptions import (
+    TemplateException, MissingTemplateVariables, RenderBudgetExceeded
+)
+from app.domain.templates.models import ChannelType, RenderPart
+from app.domain.templates.services import TemplateService
+from app.infrastructure.db.session import AsyncSessionLocal
+from app.rpc import render_pb2, render_pb2_grpc
+
+# Metadata keys are lower case in gRPC
+SERVICE_TOKEN_METADATA = "x-service-token"
+REQUEST_ID_METADATA = "x-request-id"
+
+CHANNELS = {
+    render_pb2.CHANNEL_EMAIL: ChannelType.EMAIL,
+    render_pb2.CHANNEL_SMS: ChannelType.SMS,
+    render_pb2.CHANNEL_PUSH: ChannelType.PUSH,
+}
+PARTS = {
+    render_pb2.PART_SUBJECT: RenderPart.SUBJECT,
+    render_pb2.PART_BODY_HTML: RenderPart.BODY_HTML,
+    render_pb2.PART_BODY_TEXT: RenderPart.BODY_TEXT,
+}
+
+# Admission control sheds with HTTP statuses; 429 is the tenant's own limit
+ADMISSION_CODES = {
+    429: grpc.StatusCode.RESOURCE_EXHAUSTED,
+    503: grpc.StatusCode.UNAVAILABLE,
+}
+
+SessionFactory = Callable[[], Any]
+
+
+class RenderError(Exception):
+    def __init__(self, code: grpc.StatusCode, detail: str, missing: Tuple[str, ...] = ()):
+        self.code = code
+        self.detail = detail
+        self.missing = missing
+        super().__init__(detail)
+
+
+def _status_for(e: TemplateException) -> RenderError:
+    if isinstance(e, RenderBudgetExceeded):
+        return RenderError(grpc.StatusCode.RESOURCE_EXHAUSTED, e.detail)
+    if isinstance(e, MissingTemplateVariables):
+        return RenderError(grpc.StatusCode.INVALID_ARGUMENT, e.detail, tuple(e.missing))
+    return RenderError(grpc.StatusCode.INVALID_ARGUMENT, getattr(e, "detail", str(e)))
+
+
+def _decode_data(request: render_pb2.RenderRequest) -> dict:
+    if not request.data:
+        return {}
+    try:
+        if request.data_encoding == render_pb2.DATA_ENCODING_JSON:
+            data = json.loads(request.data)
+        else:
+            data = msgpack.unpackb(request.data, timestamp=3)
+    except (ValueError, msgpack.UnpackException) as e:
+        raise RenderError(grpc.StatusCode.INVALID_ARGUMENT, f"Could not decode render data: {e}")
+    if not (isinstance(data, dict) and all(isinstance(key, str) for key in data)):
+        raise RenderError(grpc.StatusCode.INVALID_ARGUMENT, "Render data must be an object with string keys")
+    return data
+
+
+class RenderServicer(render_pb2_grpc.RenderServiceServicer):
+    """
+    Serves renders through the same TemplateService as the HTTP API, so
+    both share resolution, admission control, caches, budgets and the
+    heavy lane.
+
+    Every render gets its own short-lived session, so long-running streams
+    do not hold a database connection between messages.
+    """
+
+    def __init__(self, session_factory: SessionFactory = AsyncSessionLocal):
+        self.session_factory = session_factory
+
+    async def _render(self, request: render_pb2.RenderRequest) -> render_pb2.RenderResult:
+        channel = CHANNELS.get(request.channel)
+        if channel is None:
+            raise RenderError(grpc.StatusCode.INVALID_ARGUMENT, "A channel is required")
+        if not request.template_key or not request.language:
+            raise RenderError(grpc.StatusCode.INVALID_ARGUMENT, "template_key and language are required")
+        data = _decode_data(request)
+        parts = [PARTS[p] for p in request.parts if p in PARTS] or None
+        strict = request.strict if request.HasField("strict") else True
+
+        tenant_id = request.tenant_id if request.HasField("tenant_id") else None
+        try:
+            ticket = await render_admission.acquire(tenant_id)
+        except AdmissionRejected as e:
+            raise RenderError(ADMISSION_CODES[e.status_code], e.detail)
+
+        try:
+            async with self.session_factory() as session:
+                result = await TemplateService(session).resolve_and_render(
+                    key=request.template_key,
+                    channel=channel,
+                    tenant_id=tenant_id,
+                    language=request.language,
+                    data=data,
+                    strict=strict,
+                    parts=parts
+                )
+        except TemplateException as e:
+            raise _status_for(e)
+        finally:
+            ticket.release()
+
+        if not result:
+            raise RenderError(grpc.StatusCode.NOT_FOUND, "Template not found for these criteria")
+
+        version = result["version"]
+        return render_pb2.RenderResult(
+            request_id=request.request_id,
+            language_used=version.language,
+            version=version.version,
+            **{part.value: result[part.value] for part in RenderPart if part.value in result}
+        )
+
+    async def _render_item(self, request: render_pb2.RenderRequest) -> render_pb2.RenderResult:
+        try:
+            return await self._render(request)
+        except RenderError as e:
+            return render_pb2.RenderResult(
+                request_id=request.request_id, code=e.code.value[0], error=e.detail, missing_variables=e.missing
+            )
+
+    async def Render(self, request: render_pb2.RenderRequest, context: grpc.aio.ServicerContext) -> render_pb2.RenderResult:
+        _bind_request_id(context)
+        try:
+            return await self._render(request)
+        except RenderError as e:
+            await context.abort(e.code, e.detail)
+
+    async def RenderBatch(
+        self, request: render_pb2.RenderBatchRequest, context: grpc.aio.ServicerContext
+    ) -> render_pb2.RenderBatchResponse:
+        _bind_request_id(context)
+        return render_pb2.RenderBatchResponse(results=[await self._render_item(item) for item in request.requests])
+
+    async def RenderStream(
+        self, request_iterator: AsyncIterator[render_pb2.RenderRequest], context: grpc.aio.ServicerContext
+    ) -> AsyncIterator[render_pb2.RenderResult]:
+        _bind_request_id(context)
+        async for request in request_iterator:
+            yield await self._render_item(request)
+
+
+def _bind_request_id(context: grpc.aio.ServicerContext) -> None:
+    # Same correlation id as the HTTP middleware, so logs line up
+    for key, value in context.invocation_metadata() or ():
+        if key == REQUEST_ID_METADATA:
+            correlation_id.set(value)
+            return
+
+
+class ServiceTokenInterceptor(grpc.aio.ServerInterceptor):
+    """
+    Requires the internal service token in the `x-service-token` metadata,
+    like the X-Service-Token header on the HTTP render API.
+    """
+
+    async def intercept_service(
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], Awaitable[grpc.RpcMethodHandler]],
+        handler_call_details: grpc.HandlerCallDetails
+    ) -> grpc.RpcMethodHandler:
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return handler
+        if not settings.INTERNAL_SERVICE_TOKEN:
+            return _deny(handler, grpc.StatusCode.INTERNAL, "Server Authorization not configured")
+        metadata = dict(handler_call_details.invocation_metadata or ())
+        if metadata.get(SERVICE_TOKEN_METADATA) != settings.INTERNAL_SERVICE_TOKEN:
+            return _deny(handler, grpc.StatusCode.UNAUTHENTICATED, "Could not validate credentials")
+        return handler
+
+
+def _deny(handler: grpc.RpcMethodHandler, code: grpc.StatusCode, detail: str) -> grpc.RpcMethodHandler:
+    async def abort(request: Any, context: grpc.aio.ServicerContext) -> None:
+        await context.abort(code, detail)
+
+    if handler.request_streaming and handler.response_streaming:
+        return grpc.stream_stream_rpc_method_handler(abort)
+    if handler.request_streaming:
+        return grpc.stream_unary_rpc_method_handler(abort)
+    if handler.response_streaming:
+        return grpc.unary_stream_rpc_method_handler(abort)
+    return grpc.unary_unary_rpc_method_handler(abort)
+
+
+def create_server(
+    address: Optional[str] = None,
+    session_factory: SessionFactory = AsyncSessionLocal
+) -> Tuple[grpc.aio.Server, int]:
+    """
+    Builds the gRPC server on the running event loop. Returns it with the
+    bound port, which is useful with port 0 in tests. Call `start()` on it.
+    """
+    server = grpc.aio.server(interceptors=[ServiceTokenInterceptor()])
+    render_pb2_grpc.add_RenderServiceServicer_to_server(RenderServicer(session_factory), server)
+    port = server.add_insecure_port(address or settings.GRPC_ADDRESS)
+    return server, port
+
+
+async def serve() -> None:
+    server, port = create_server()
+    await server.start()
+    logger.info(f"gRPC render service listening on port {port}")
+    await server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    from app.core.logging import setup_logging
+
+    setup_logging()
+    asyncio.run(serve())
@@ -0,0 +1,112 @@
+"""
+Measures the logging cost a render request adds to its own latency: the
+access log line uvicorn emits for every request, written to a pipe as
+stderr is in a container.
+
+Compares development logging, the previous production setup (loguru
+serialising to stderr synchronously with diagnose on), and the current
+production mode: sampled access logs queued to a writer thread. For the
+queued mode the time until the writer caught up is reported too, as that
+work still runs in the process.
+
+Usage (from services/template):
+    python -m benchmarks.bench_logging [--requests 20000] [--rounds 5]
+"""
+import argparse
+import io
+import logging
+import subprocess
+import time
+
+from loguru import logger
+
+from app.core import logging as app_logging
+from app.core.config import settings
+
+ACCESS_FORMAT = '%s - "%s %s HTTP/%s" %d'
+ACCESS_ARGS = ("10.0.3.7:51522", "POST", "/api/v1/render/", "1.1", 200)
+
+
+class FrameWalkingInterceptHandler(logging.Handler):
+    # The previous InterceptHandler, which found the caller by walking frames
+    def emit(self, record):
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        frame, depth = logging.currentframe(), 2
+        while frame.f_code.co_filename == logging.__file__:
+            frame = frame.f_back
+            depth += 1
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+
+def legacy_production(stream):
+    logging.root.handlers = [FrameWalkingInterceptHandler()]
+    logging.root.setLevel(settings.LOG_LEVEL)
+    logger.remove()
+    logger.add(stream, level=settings.LOG_LEVEL, format="{message}", serialize=True, backtrace=True, diagnose=True)
+
+
+def development(stream):
+    settings.ENV = "development"
+    app_logging.setup_logging(stream)
+
+
+def production(rate):
+    def setup(stream):
+        settings.ENV = "production"
+        settings.LOG_SAMPLE_RATE = rate
+        app_logging.setup_logging(stream)
+    return setup
+
+
+def run(setup, requests, rounds):
+    sink = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    stream = io.TextIOWrapper(sink.stdin, encoding="utf-8", write_through=False)
+    setup(stream)
+    access = logging.getLogger("uvicorn.access")
+    best = drained = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(requests):
+            access.info(ACCESS_FORMAT, *ACCESS_ARGS)
+        elapsed = time.perf_counter() - start
+        app_logging._stop_background_sink()
+        best = min(best, elapsed)
+        drained = min(drained, time.perf_counter() - start)
+        setup(stream)
+    logger.remove()
+    app_logging._stop_background_sink()
+    stream.close()
+    sink.wait()
+    return best / requests, drained / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5, help="best of N rounds is reported")
+    args = parser.parse_args()
+
+    env, rate = settings.ENV, settings.LOG_SAMPLE_RATE
+    cases = [
+        ("development", development),
+        ("production (before)", legacy_production),
+        ("production (unsampled)", production(1.0)),
+        (f"production (sampled {rate:g})", production(rate)),
+    ]
+    try:
+        results = [(name, *run(setup, args.requests, args.rounds)) for name, setup in cases]
+    finally:
+        settings.ENV, settings.LOG_SAMPLE_RATE = env, rate
+        app_logging.setup_logging()
+
+    baseline = results[1][1]
+    print(f"{'':28} {'in request':>12} {'incl. writer':>14}")
+    for name, per_request, drained in results:
+        print(f"{name:28} {per_request * 1e6:9.2f} us {drained * 1e6:11.2f} us   {baseline / per_request:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
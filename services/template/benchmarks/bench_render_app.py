@@ -0,0 +1,92 @@
+"""
+Measures the per-request cost of the middleware stack on the render
+endpoint, comparing the full `app.main` application with the lean
+`app.render_app` one.
+
+Both apps run in-process through httpx's ASGI transport. The database
+dependency is overridden and template resolution returns a fixed result,
+so the difference between the two is framework and middleware overhead
+only. The absolute saving is what carries over to real renders.
+
+Usage (from services/template):
+    python -m benchmarks.bench_render_app [--requests 2000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from httpx import ASGITransport, AsyncClient
+
+from app.api.v1.deps import get_db
+from app.core.config import settings
+from app.domain.templates.services import TemplateService
+from app.main import app as full_app
+from app.render_app import create_render_app
+
+PAYLOAD = {
+    "template_key": "welcome",
+    "channel": "email",
+    "language": "en",
+    "data": {"name": "Alice", "plan": "pro"},
+}
+RESULT = {
+    "version": SimpleNamespace(language="en", version=1),
+    "subject": "Welcome Alice",
+    "body_html": "<p>Hello Alice, welcome to the pro plan.</p>",
+    "body_text": "Hello Alice, welcome to the pro plan.",
+}
+
+
+async def no_db():
+    yield None
+
+
+async def resolve_and_render(self, **kwargs):
+    return RESULT
+
+
+async def run(app, requests, rounds):
+    app.dependency_overrides[get_db] = no_db
+    headers = {
+        "X-Service-Token": settings.INTERNAL_SERVICE_TOKEN or "",
+        "X-Request-ID": "0f8fad5b-d9cb-469f-a165-70867728950e",
+        "Origin": "https://admin.example.com",
+    }
+    best = float("inf")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        response = await client.post("/api/v1/render/", json=PAYLOAD, headers=headers)
+        response.raise_for_status()
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(requests):
+                await client.post("/api/v1/render/", json=PAYLOAD, headers=headers)
+            best = min(best, time.perf_counter() - start)
+    app.dependency_overrides.clear()
+    return best / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5, help="best of N rounds is reported")
+    args = parser.parse_args()
+
+    if not settings.INTERNAL_SERVICE_TOKEN:
+        parser.error("INTERNAL_SERVICE_TOKEN must be set")
+    # httpx logs every request, which would dominate both measurements
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with mock.patch.object(TemplateService, "resolve_and_render", resolve_and_render):
+        full = asyncio.run(run(full_app, args.requests, args.rounds))
+        lean = asyncio.run(run(create_render_app(), args.requests, args.rounds))
+
+    print(f"{'app.main':18} {full * 1e6:10.1f} us/request")
+    print(f"{'app.render_app':18} {lean * 1e6:10.1f} us/request")
+    print(f"saving: {(full - lean) * 1e6:.1f} us/request ({(full - lean) / full:.0%})")
+
+
+if __name__ == "__main__":
+    main()
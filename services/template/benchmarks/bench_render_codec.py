@@ -0,0 +1,101 @@
+"""
+Compares the cost of decoding a render request and encoding its response
+on the pydantic JSON path, the lightweight JSON path and msgpack.
+
+The pydantic path mirrors what FastAPI does for a `RenderRequest` body
+parameter: decode JSON, validate the whole model (including `data`), and
+encode the response through jsonable_encoder and json.dumps.
+
+Usage (from services/template):
+    python -m benchmarks.bench_render_codec [--iterations 500] [--rounds 5] [--lines 500]
+"""
+import argparse
+import json
+import time
+
+import msgpack
+from fastapi.encoders import jsonable_encoder
+
+from app.api.v1.negotiation import MSGPACK, parse_payload
+from app.domain.templates.schemas import RenderRequest, RenderResponse
+
+
+def make_payload(lines):
+    return {
+        "template_key": "statement",
+        "channel": "email",
+        "tenant_id": "acme",
+        "language": "en-US",
+        "options": {"strict": True},
+        "data": {
+            "customer": {"name": "Alice", "address": {"street": "1 Main St", "city": "Springfield"}},
+            "lines": [
+                {"sku": f"SKU-{i}", "qty": i % 7, "price": i * 1.25, "tags": ["a", "b"], "meta": {"n": i}}
+                for i in range(lines)
+            ],
+        },
+    }
+
+
+def make_response(lines):
+    rows = "".join(f"<tr><td>SKU-{i}</td><td>{i % 7}</td><td>{i * 1.25:.2f}</td></tr>" for i in range(lines))
+    return RenderResponse(
+        template_key="statement", channel="email", language_used="en-US", version=3,
+        subject="Your statement", body_html=f"<table>{rows}</table>", body_text="See HTML part",
+    )
+
+
+def pydantic_json(body, response):
+    RenderRequest.model_validate(json.loads(body))
+    return json.dumps(jsonable_encoder(response, exclude_unset=True), ensure_ascii=False, separators=(",", ":"))
+
+
+def lightweight_json(body, response):
+    parse_payload(body, "application/json", RenderRequest)
+    return json.dumps(jsonable_encoder(response, exclude_unset=True), ensure_ascii=False, separators=(",", ":"))
+
+
+def msgpack_codec(body, response):
+    parse_payload(body, MSGPACK, RenderRequest)
+    return msgpack.packb(response.model_dump(mode="json", exclude_unset=True))
+
+
+def best_of(func, body, response, iterations, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(body, response)
+        best = min(best, time.perf_counter() - start)
+    return best / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5, help="best of N rounds is reported")
+    parser.add_argument("--lines", type=int, default=500, help="line items in the request data")
+    args = parser.parse_args()
+
+    payload = make_payload(args.lines)
+    response = make_response(args.lines)
+    json_body = json.dumps(payload).encode()
+    msgpack_body = msgpack.packb(payload)
+
+    cases = [
+        ("pydantic json", pydantic_json, json_body),
+        ("lightweight json", lightweight_json, json_body),
+        ("msgpack", msgpack_codec, msgpack_body),
+    ]
+    print(f"request: {len(json_body)} bytes json, {len(msgpack_body)} bytes msgpack; "
+          f"response body_html: {len(response.body_html)} chars")
+    baseline = None
+    for name, func, body in cases:
+        func(body, response)
+        per_request = best_of(func, body, response, args.iterations, args.rounds)
+        baseline = baseline or per_request
+        print(f"{name:18} {per_request * 1e6:10.1f} us/request   {baseline / per_request:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+End-to-end render benchmark: drives POST /api/v1/render/ against templates
+published in the configured Postgres database, in process through httpx's
+ASGI transport and over HTTP to a local uvicorn server.
+
+Cases cover a small SMS, a medium email and a large loop-heavy HTML email,
+each rendered in strict and forgiving mode. Every case reports throughput
+and p50/p95/p99 latency. Templates are published through the admin API
+under a dedicated tenant and deleted afterwards.
+
+Save a run as a baseline and compare later runs against it; the comparison
+exits non-zero when a case's p95 regressed by more than --tolerance:
+
+    python -m benchmarks.bench_render_e2e --save baseline.json
+    python -m benchmarks.bench_render_e2e --compare baseline.json
+
+Usage (from services/template, with DATABASE_URL, ADMIN_API_KEY and
+INTERNAL_SERVICE_TOKEN set and migrations applied):
+    python -m benchmarks.bench_render_e2e [--transport asgi|uvicorn|both]
+        [--requests 500] [--concurrency 8] [--warmup 50] [--port 8765]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.domain.templates.services import admin_renders
+from app.main import app
+
+TENANT = "bench-e2e"
+
+ROWS = [
+    {"sku": f"SKU-{i:05}", "name": f"Item <{i}> & co", "qty": i % 9 + 1, "price": round(i * 1.37, 2),
+     "tags": ["new", "sale"] if i % 3 == 0 else []}
+    for i in range(500)
+]
+
+TEMPLATES = {
+    "sms-small": {
+        "channel": "sms",
+        "version": {"language": "en", "body_text": "Hi {{ name }}, your code is {{ code }}. It expires in {{ minutes }} min."},
+        "data": {"name": "Alice", "code": "482913", "minutes": 10},
+    },
+    "email-medium": {
+        "channel": "email",
+        "version": {
+            "language": "en",
+            "subject": "Order {{ order.id }} confirmed",
+            "body_html": (
+                "<h1>Thanks {{ customer.name }}</h1><p>Order {{ order.id }} ships to {{ customer.address.city }}.</p>"
+                "<table>{% for line in order.lines %}<tr><td>{{ line.name }}</td><td>{{ line.qty }}</td>"
+                "<td>{{ line.price | currency('EUR') }}</td></tr>{% endfor %}</table>"
+                "<p>Total: {{ order.total | currency('EUR') }}</p>"
+            ),
+            "body_text": (
+                "Thanks {{ customer.name }}. Order {{ order.id }}:\n"
+                "{% for line in order.lines %}- {{ line.name }} x{{ line.qty }}\n{% endfor %}"
+                "Total: {{ order.total | currency('EUR') }}"
+            ),
+        },
+        "data": {
+            "customer": {"name": "Alice", "address": {"city": "Springfield"}},
+            "order": {"id": "A-1001", "lines": ROWS[:10], "total": sum(r["price"] * r["qty"] for r in ROWS[:10])},
+        },
+    },
+    "html-large": {
+        "channel": "email",
+        "version": {
+            "language": "en",
+            "subject": "Your statement for {{ period }}",
+            "body_html": (
+                "<h1>Statement {{ period }}</h1><table>"
+                "{% for row in rows %}<tr class=\"{{ loop.cycle('odd', 'even') }}\">"
+                "<td>{{ loop.index }}</td><td>{{ row.sku }}</td><td>{{ row.name }}</td><td>{{ row.qty }}</td>"
+                "<td>{{ row.price | number('#,##0.00') }}</td>"
+                "<td>{% for tag in row.tags %}<span>{{ tag | upper }}</span>{% endfor %}</td></tr>"
+                "{% endfor %}</table>"
+            ),
+            "body_text": "{% for row in rows %}{{ row.sku }} {{ row.qty }} {{ row.price }}\n{% endfor %}",
+        },
+        "data": {"period": "2026-09", "rows": ROWS},
+    },
+}
+MODES = {"strict": True, "forgiving": False}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def seed(client: AsyncClient, headers: Dict[str, str]) -> List[str]:
+    ids = []
+    for key, spec in TEMPLATES.items():
+        r = await client.post("/api/v1/templates/", json={
+            "key": key, "name": key, "channel": spec["channel"], "tenant_id": TENANT
+        }, headers=headers)
+        r.raise_for_status()
+        template_id = r.json()["id"]
+        ids.append(template_id)
+        r = await client.post(f"/api/v1/templates/{template_id}/versions", json=spec["version"], headers=headers)
+        r.raise_for_status()
+        r = await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=headers)
+        r.raise_for_status()
+    return ids
+
+
+async def cleanup(client: AsyncClient, headers: Dict[str, str]) -> None:
+    r = await client.get("/api/v1/templates/", params={"tenant_id": TENANT, "limit": 100}, headers=headers)
+    for template in r.json() if r.status_code == 200 else ():
+        await client.delete(f"/api/v1/templates/{template['id']}", headers=headers)
+
+
+async def run_case(client: AsyncClient, payload: dict, requests: int, concurrency: int, warmup: int) -> dict:
+    headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+    body = json.dumps(payload).encode()
+    headers["Content-Type"] = "application/json"
+
+    async def one() -> float:
+        start = time.perf_counter()
+        r = await client.post("/api/v1/render/", content=body, headers=headers)
+        elapsed = time.perf_counter() - start
+        if r.status_code != 200:
+            raise RuntimeError(f"{payload['template_key']}: HTTP {r.status_code} {r.text[:200]}")
+        return elapsed
+
+    for _ in range(warmup):
+        await one()
+
+    latencies: List[float] = []
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            latencies.append(await one())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+async def run_cases(client: AsyncClient, transport: str, args: argparse.Namespace) -> Dict[str, dict]:
+    results = {}
+    for key, spec in TEMPLATES.items():
+        for mode, strict in MODES.items():
+            payload = {
+                "template_key": key, "channel": spec["channel"], "tenant_id": TENANT, "language": "en",
+                "data": spec["data"], "options": {"strict": strict},
+            }
+            name = f"{transport}/{key}/{mode}"
+            results[name] = await run_case(client, payload, args.requests, args.concurrency, args.warmup)
+            print_row(name, results[name])
+    return results
+
+
+def start_uvicorn(port: int) -> subprocess.Popen:
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--no-access-log",
+         "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def wait_ready(client: AsyncClient, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if (await client.get("/health/health/live")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready")
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, dict]:
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    results: Dict[str, dict] = {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        await cleanup(client, admin_headers)
+        await seed(client, admin_headers)
+        try:
+            if args.transport in ("asgi", "both"):
+                results.update(await run_cases(client, "asgi", args))
+            if args.transport in ("uvicorn", "both"):
+                server = start_uvicorn(args.port)
+                try:
+                    async with AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=30) as http:
+                        await wait_ready(http, server)
+                        results.update(await run_cases(http, "uvicorn", args))
+                finally:
+                    server.terminate()
+                    server.wait()
+        finally:
+            await cleanup(client, admin_headers)
+            admin_renders.shutdown()
+    return results
+
+
+def print_row(name: str, result: dict) -> None:
+    print(f"{name:34} {result['throughput_rps']:9.1f} rps  p50 {result['p50_ms']:8.2f}  "
+          f"p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms", flush=True)
+
+
+def compare(results: Dict[str, dict], baseline: dict, tolerance: float) -> bool:
+    """
+    Prints p95 and throughput changes against the baseline. Returns False
+    if any case's p95 grew by more than `tolerance`.
+    """
+    ok = True
+    print(f"\ncompared with {baseline['created_at']} ({baseline['environment']['host']}):")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        change = result["p95_ms"] / before["p95_ms"] - 1
+        regressed = change > tolerance
+        ok = ok and not regressed
+        print(f"{name:34} p95 {before['p95_ms']:8.2f} -> {result['p95_ms']:8.2f} ms ({change:+.0%})  "
+              f"rps {before['throughput_rps']:.0f} -> {result['throughput_rps']:.0f}"
+              f"{'  REGRESSED' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=("asgi", "uvicorn", "both"), default="both")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per case")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per case")
+    parser.add_argument("--port", type=int, default=8765, help="port of the local uvicorn server")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth when comparing")
+    args = parser.parse_args()
+
+    if not settings.INTERNAL_SERVICE_TOKEN or not settings.ADMIN_API_KEY:
+        parser.error("INTERNAL_SERVICE_TOKEN and ADMIN_API_KEY must be set")
+    # httpx logs every request, which would dominate the measurements
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = asyncio.run(main_async(args))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "environment": {
+                    "host": platform.node(), "python": platform.python_version(), "cpus": os.cpu_count(),
+                    "requests": args.requests, "concurrency": args.concurrency,
+                    "sandbox": settings.RENDER_SANDBOX,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nbaseline saved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            if not compare(results, json.load(f), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
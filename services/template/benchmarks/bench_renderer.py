@@ -0,0 +1,166 @@
+"""
+Microbenchmarks for TemplateRenderer.render and validate_syntax.
+
+Render cases vary template size (distinct expressions per loop row), loop
+count, autoescape load (plain values or values full of HTML special
+characters), strict or forgiving mode, and cold or warm compilation. Cold
+is `render()`, which compiles the template string on every call; warm
+renders a template compiled once, as stored versions are.
+
+Every case reports the time per call and the peak memory allocated by one
+call. The per-case budgets in renderer_budgets.json are enforced by
+tests/unit/domain/templates/test_renderer_budgets.py; regenerate them from
+a run on the reference machine with --write-budgets.
+
+Usage (from services/template):
+    python -m benchmarks.bench_renderer [--filter large] [--rounds 5]
+        [--write-budgets benchmarks/renderer_budgets.json --headroom 3 --alloc-headroom 1.5]
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from itertools import product
+from typing import Any, Callable, Dict, NamedTuple, Tuple
+
+from app.domain.templates.renderer import TemplateRenderer
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "renderer_budgets.json")
+
+SIZES = {"small": 2, "large": 40}
+LOOPS = {"loop10": 10, "loop200": 200}
+ESCAPING = {
+    "plain": "Plain value",
+    "escaped": "<b>Tom & \"Jerry\"</b> <script>alert('x')</script>",
+}
+MODES = {"strict": True, "forgiving": False}
+COMPILATION = ("cold", "warm")
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[], Any]
+
+
+def make_template(fields: int) -> str:
+    cells = "".join(f"<td class=\"c{i}\">{{{{ row.f{i} }}}}</td>" for i in range(fields))
+    return (
+        "<html><body><h1>{{ title }}</h1><table>"
+        f"{{% for row in rows %}}<tr><td>{{{{ loop.index }}}}</td>{cells}</tr>{{% endfor %}}"
+        "</table><p>{{ footer }}</p></body></html>"
+    )
+
+
+def make_data(fields: int, rows: int, value: str) -> Dict[str, Any]:
+    return {
+        "title": value,
+        "footer": value,
+        "rows": [{f"f{i}": value for i in range(fields)} for _ in range(rows)],
+    }
+
+
+def build_cases(renderer: TemplateRenderer) -> Dict[str, Case]:
+    cases = {}
+    for (size, fields), (loop, rows), (escaping, value), (mode, strict), compilation in product(
+        SIZES.items(), LOOPS.items(), ESCAPING.items(), MODES.items(), COMPILATION
+    ):
+        source = make_template(fields)
+        data = make_data(fields, rows, value)
+        name = f"render/{size}/{loop}/{escaping}/{mode}/{compilation}"
+        if compilation == "cold":
+            run = lambda source=source, data=data, strict=strict: renderer.render(source, data, strict)
+        else:
+            env = renderer.env_strict if strict else renderer.env_forgiving
+            template = env.from_string(source)
+            run = lambda template=template, data=data: renderer.render_compiled(template, data)
+        cases[name] = Case(name, run)
+
+    for size, fields in SIZES.items():
+        source = make_template(fields)
+        name = f"validate_syntax/{size}"
+        cases[name] = Case(name, lambda source=source: renderer.validate_syntax(source))
+    return cases
+
+
+def time_per_call(run: Callable[[], Any], rounds: int = 5, min_round: float = 0.02) -> float:
+    """
+    Best time per call over `rounds` rounds, each long enough to measure.
+    """
+    run()
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round:
+            break
+        iterations *= 2
+    best = elapsed / iterations
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            run()
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best
+
+
+def peak_allocation(run: Callable[[], Any]) -> int:
+    """
+    Peak bytes allocated while one call runs, after a warm-up call.
+    """
+    run()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+
+def measure(case: Case, rounds: int = 5) -> Tuple[float, int]:
+    return time_per_call(case.run, rounds), peak_allocation(case.run)
+
+
+def load_budgets(path: str = BUDGETS_PATH) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)["cases"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--rounds", type=int, default=5, help="best of N rounds is reported")
+    parser.add_argument("--write-budgets", metavar="PATH", help="write measured results times --headroom as budgets")
+    parser.add_argument("--headroom", type=float, default=3.0, help="time budget over the measured time")
+    parser.add_argument("--alloc-headroom", type=float, default=1.5, help="allocation budget over the measured peak")
+    args = parser.parse_args()
+
+    renderer = TemplateRenderer()
+    budgets = {}
+    print(f"{'case':52} {'time':>12} {'peak alloc':>12}")
+    for name, case in build_cases(renderer).items():
+        if args.filter not in name:
+            continue
+        seconds, allocated = measure(case, args.rounds)
+        print(f"{name:52} {seconds * 1e6:9.1f} us {allocated / 1024:9.1f} KiB")
+        budgets[name] = {
+            "max_us": round(seconds * 1e6 * args.headroom, 1),
+            "max_alloc_kib": round(allocated / 1024 * args.alloc_headroom, 1),
+        }
+
+    if args.write_budgets:
+        with open(args.write_budgets, "w") as f:
+            json.dump({"headroom": args.headroom, "alloc_headroom": args.alloc_headroom, "cases": budgets}, f, indent=2)
+            f.write("\n")
+        print(f"\nbudgets written to {args.write_budgets}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compares render throughput with and without placeholders schema validation.
+
+Usage (from services/template):
+    python -m benchmarks.bench_schema_validation [--iterations 20000] [--rounds 5]
+"""
+import argparse
+import time
+import uuid
+from types import SimpleNamespace
+
+from app.domain.templates.renderer import TemplateRenderer
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "order": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "string"},
+                "total": {"type": "number"},
+                "lines": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"sku": {"type": "string"}, "qty": {"type": "integer"}},
+                        "required": ["sku", "qty"],
+                    },
+                },
+            },
+            "required": ["id", "total", "lines"],
+        },
+    },
+    "required": ["name", "order"],
+}
+
+BODY = (
+    "<p>Hi {{ name }}, order {{ order.id }} totals {{ order.total }}</p>"
+    "<ul>{% for item in order.lines %}<li>{{ item.sku }} x {{ item.qty }}</li>{% endfor %}</ul>"
+)
+
+DATA = {
+    "name": "Alice",
+    "order": {
+        "id": "A-1001",
+        "total": 42.5,
+        "lines": [{"sku": f"SKU-{i}", "qty": i} for i in range(10)],
+    },
+}
+
+
+def make_version(schema):
+    return SimpleNamespace(
+        id=uuid.uuid4(), updated_at=None, placeholders_schema=schema,
+        subject="Order {{ order.id }}", body_html=BODY, body_text=None,
+    )
+
+
+def run(renderer, version, iterations, validate):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if validate:
+            assert renderer.validate_data(version, DATA) is None
+        renderer.render_version(version, "subject", DATA)
+        renderer.render_version(version, "body_html", DATA)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5, help="best of N rounds is reported")
+    args = parser.parse_args()
+
+    renderer = TemplateRenderer()
+    version = make_version(SCHEMA)
+
+    # Warm up compilation so only steady-state cost is measured
+    run(renderer, version, 100, validate=True)
+
+    plain = validated = validate_only = float("inf")
+    for _ in range(args.rounds):
+        plain = min(plain, run(renderer, version, args.iterations, validate=False))
+        validated = min(validated, run(renderer, version, args.iterations, validate=True))
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            renderer.validate_data(version, DATA)
+        validate_only = min(validate_only, time.perf_counter() - start)
+
+    print(f"iterations:             {args.iterations}")
+    print(f"render only:            {args.iterations / plain:10.0f} renders/s")
+    print(f"validate + render:      {args.iterations / validated:10.0f} renders/s")
+    print(f"validation cost:        {validate_only / args.iterations * 1e6:10.2f} us/request")
+    print(f"throughput overhead:    {(validated / plain - 1) * 100:10.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Replays captured render traffic (CAPTURE_SAMPLE_RATE, see app/core/capture.py)
+against a running instance and reports latency percentiles and output
+differences.
+
+Requests are sent on the captured schedule, divided by --speed: 2 replays
+twice as fast, 0 sends them back to back. At most --concurrency are in
+flight at once. Each response is checked against the capture: the status,
+and for records whose data was not redacted, the digest of every rendered
+part. With --compare-to, every request also goes to a second instance and
+differing outputs are shown as diffs, which works for redacted records too.
+
+Usage (from services/template, with INTERNAL_SERVICE_TOKEN set):
+    python -m benchmarks.replay_capture captures/ --target http://localhost:8000
+        [--speed 1] [--concurrency 64] [--compare-to http://localhost:8001]
+        [--limit 10000] [--show-diffs 5]
+"""
+import argparse
+import asyncio
+import difflib
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from httpx import AsyncClient, HTTPError
+
+from app.core.config import settings
+
+PARTS = ("subject", "body_html", "body_text")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def read_capture(paths: List[str], limit: Optional[int] = None) -> Iterator[dict]:
+    """
+    Yields captured records from files and capture directories, in capture
+    order within each directory.
+    """
+    count = 0
+    for path in paths:
+        files = (
+            sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".ndjson"))
+            if os.path.isdir(path) else [path]
+        )
+        for file in files:
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    yield json.loads(line)
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+
+
+def digests(body: dict) -> Dict[str, str]:
+    return {
+        part: hashlib.sha256(body[part].encode("utf-8")).hexdigest()
+        for part in PARTS if body.get(part) is not None
+    }
+
+
+class Outcome:
+    __slots__ = ("record", "latency", "status", "body", "other_body", "error")
+
+    def __init__(self, record: dict):
+        self.record = record
+        self.latency: Optional[float] = None
+        self.status: Optional[int] = None
+        self.body: Optional[dict] = None
+        self.other_body: Optional[dict] = None
+        self.error: Optional[str] = None
+
+
+async def send(client: AsyncClient, record: dict) -> Tuple[float, int, Optional[dict]]:
+    start = time.perf_counter()
+    r = await client.post("/api/v1/render/", json=record["request"],
+                          headers={"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN})
+    latency = time.perf_counter() - start
+    return latency, r.status_code, r.json() if r.status_code == 200 else None
+
+
+async def replay(
+    records: List[dict], target: AsyncClient, other: Optional[AsyncClient], speed: float, concurrency: int
+) -> Tuple[List[Outcome], float]:
+    """
+    Sends every record on its captured schedule scaled by `speed`. Returns
+    the outcomes and the wall time taken.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    first = datetime.fromisoformat(records[0]["captured_at"]) if records else None
+
+    async def one(record: dict) -> Outcome:
+        outcome = Outcome(record)
+        try:
+            async with slots:
+                outcome.latency, outcome.status, outcome.body = await send(target, record)
+            if other is not None:
+                _, _, outcome.other_body = await send(other, record)
+        except HTTPError as e:
+            outcome.error = f"{type(e).__name__}: {e}"
+        return outcome
+
+    start = time.perf_counter()
+    tasks = []
+    for record in records:
+        if speed > 0:
+            due = (datetime.fromisoformat(record["captured_at"]) - first).total_seconds() / speed
+            delay = due - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(record)))
+    outcomes = await asyncio.gather(*tasks)
+    return outcomes, time.perf_counter() - start
+
+
+def latency_row(name: str, seconds: List[float]) -> str:
+    values = sorted(seconds)
+    return (f"{name:40} {len(values):7}  p50 {percentile(values, 50) * 1000:8.2f}  "
+            f"p95 {percentile(values, 95) * 1000:8.2f}  p99 {percentile(values, 99) * 1000:8.2f}  "
+            f"max {values[-1] * 1000:8.2f} ms")
+
+
+def output_diff(outcome: Outcome) -> str:
+    lines = []
+    for part in PARTS:
+        before = (outcome.body or {}).get(part) or ""
+        after = (outcome.other_body or {}).get(part) or ""
+        if before != after:
+            lines.extend(difflib.unified_diff(
+                before.splitlines(), after.splitlines(), f"target/{part}", f"compare-to/{part}", lineterm=""
+            ))
+    return "\n".join(lines)
+
+
+def report(outcomes: List[Outcome], wall: float, show_diffs: int) -> bool:
+    """
+    Prints latency percentiles overall and per template, then the status
+    and output mismatches. Returns False if there were any.
+    """
+    replayed = [o for o in outcomes if o.error is None]
+    print(f"replayed {len(replayed)} of {len(outcomes)} requests in {wall:.1f}s "
+          f"({len(replayed) / wall if wall else 0:.1f} rps)\n")
+    if replayed:
+        print(latency_row("all (replayed)", [o.latency for o in replayed]))
+        print(latency_row("all (captured)", [o.record["duration_ms"] / 1000 for o in replayed]))
+        by_template: Dict[str, List[float]] = defaultdict(list)
+        for o in replayed:
+            request = o.record["request"]
+            by_template[f"{request.get('tenant_id') or '-'}/{request['template_key']}/{request['channel']}"].append(
+                o.latency
+            )
+        for name, latencies in sorted(by_template.items(), key=lambda item: -len(item[1]))[:20]:
+            print(latency_row(name, latencies))
+
+    errors = [o for o in outcomes if o.error is not None]
+    statuses = [o for o in replayed if o.status != o.record["status"]]
+    changed = [
+        o for o in replayed
+        if o.body is not None and not o.record["redacted"] and "output_sha256" in o.record
+        and digests(o.body) != o.record["output_sha256"]
+    ]
+    compared = [o for o in replayed if o.body is not None and o.other_body is not None]
+    different = [o for o in compared if any(o.body.get(part) != o.other_body.get(part) for part in PARTS)]
+
+    print(f"\nrequest errors: {len(errors)}")
+    for o in errors[:show_diffs]:
+        print(f"  {o.record['request']['template_key']}: {o.error}")
+    print(f"status changed from the capture: {len(statuses)}")
+    for o in statuses[:show_diffs]:
+        print(f"  {o.record['request']['template_key']}: {o.record['status']} -> {o.status}")
+    checkable = sum(1 for o in replayed if o.body is not None and not o.record["redacted"])
+    print(f"output changed from the capture: {len(changed)} of {checkable} unredacted")
+    for o in changed[:show_diffs]:
+        parts = [part for part in PARTS if digests(o.body).get(part) != o.record["output_sha256"].get(part)]
+        print(f"  {o.record['request']['template_key']} v{o.record.get('version')} -> v{o.body['version']}: "
+              f"{', '.join(parts)}")
+    if compared:
+        print(f"output differs from --compare-to: {len(different)} of {len(compared)}")
+        for o in different[:show_diffs]:
+            print(output_diff(o))
+    return not (errors or statuses or changed or different)
+
+
+async def main_async(args: argparse.Namespace) -> bool:
+    records = list(read_capture(args.capture, args.limit))
+    if not records:
+        print("no captured requests found")
+        return True
+    records.sort(key=lambda record: record["captured_at"])
+    async with AsyncClient(base_url=args.target, timeout=args.timeout) as target:
+        if args.compare_to:
+            async with AsyncClient(base_url=args.compare_to, timeout=args.timeout) as other:
+                outcomes, wall = await replay(records, target, other, args.speed, args.concurrency)
+        else:
+            outcomes, wall = await replay(records, target, None, args.speed, args.concurrency)
+    return report(outcomes, wall, args.show_diffs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", nargs="+", help="capture files or directories")
+    parser.add_argument("--target", required=True, help="base URL of the instance to replay against")
+    parser.add_argument("--compare-to", metavar="URL", help="also replay against this instance and diff outputs")
+    parser.add_argument("--speed", type=float, default=1.0, help="rate multiplier; 0 sends back to back")
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight at most")
+    parser.add_argument("--limit", type=int, help="replay only the first N records")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per request, in seconds")
+    parser.add_argument("--show-diffs", type=int, default=5, help="mismatches printed per kind")
+    args = parser.parse_args()
+
+    if not settings.INTERNAL_SERVICE_TOKEN:
+        parser.error("INTERNAL_SERVICE_TOKEN must be set")
+    if args.speed < 0:
+        parser.error("--speed must not be negative")
+
+    if not asyncio.run(main_async(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
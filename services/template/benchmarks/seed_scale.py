@@ -0,0 +1,150 @@
+"""
+Seeds the configured Postgres database with synthetic templates at
+production scale, so query plans and timings can be checked locally.
+
+Rows are loaded with COPY: tenants x templates per tenant templates, each
+with versions in several languages. Per language, the newest version is
+published and current and the older ones are archived, like a template
+that was republished over time. The defaults produce 1M version rows.
+
+Synthetic tenants are named "scale-NNNNN"; --drop deletes them again.
+The plan regression tests in tests/integration/db/test_query_plans.py run
+once this data is present.
+
+Usage (from services/template, migrations applied):
+    python -m benchmarks.seed_scale [--tenants 100] [--templates 100]
+        [--languages 5] [--versions 20]
+    python -m benchmarks.seed_scale --drop
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterator, Tuple
+
+import asyncpg
+
+from app.core.config import settings
+from app.domain.templates.models import ChannelType, TemplateStatus
+from app.domain.templates.renderer import TemplateRenderer
+
+TENANT_PREFIX = "scale-"
+LANGUAGES = ("en", "en-US", "fr", "de", "es", "pt-BR", "ja", "it", "nl", "pl")
+CHANNELS = (ChannelType.EMAIL, ChannelType.SMS, ChannelType.PUSH)
+
+SUBJECT = "Your {{ product }} update, {{ name }}"
+BODY_HTML = "<p>Hi {{ name }},</p><p>{{ product }} renews on {{ renews_at }}.</p>"
+BODY_TEXT = "Hi {{ name }}, {{ product }} renews on {{ renews_at }}."
+
+TEMPLATE_COLUMNS = ("id", "tenant_id", "key", "name", "channel", "category", "created_at", "updated_at")
+VERSION_COLUMNS = (
+    "id", "template_id", "language", "version", "subject", "body_html", "body_text", "status", "is_current",
+    "placeholders", "dependencies", "cost_profile", "created_at", "updated_at",
+)
+
+
+def tenant_id(index: int) -> str:
+    return f"{TENANT_PREFIX}{index:05}"
+
+
+def dsn() -> str:
+    # asyncpg takes the plain postgresql:// form of the SQLAlchemy URL
+    return settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def generate(
+    tenants: int, templates: int, languages: int, versions: int
+) -> Tuple[list, Iterator[tuple]]:
+    """
+    Returns the template rows and a generator of their version rows.
+    """
+    renderer = TemplateRenderer()
+    placeholders = {
+        channel: json.dumps({
+            part: renderer.find_placeholders(source)
+            for part, source in (("subject", SUBJECT), ("body_html", BODY_HTML), ("body_text", BODY_TEXT))
+            if channel == ChannelType.EMAIL or part == "body_text"
+        })
+        for channel in CHANNELS
+    }
+    cost_profile = json.dumps({"render_ms": 0.05, "output_bytes": 120, "loop_depth": 0})
+    start = datetime.utcnow() - timedelta(days=365)
+
+    template_rows = []
+    for t in range(tenants):
+        for k in range(templates):
+            channel = CHANNELS[k % len(CHANNELS)]
+            created = start + timedelta(minutes=t * templates + k)
+            template_rows.append((
+                uuid.uuid4(), tenant_id(t), f"template-{k:04}", f"Template {k}", channel.name,
+                f"category-{k % 10}", created, created,
+            ))
+
+    def version_rows() -> Iterator[tuple]:
+        archived, published = TemplateStatus.ARCHIVED.name, TemplateStatus.PUBLISHED.name
+        for template_id, _, _, _, channel_name, _, created, _ in template_rows:
+            email = channel_name == ChannelType.EMAIL.name
+            for language in LANGUAGES[:languages]:
+                for v in range(1, versions + 1):
+                    current = v == versions
+                    at = created + timedelta(hours=v)
+                    yield (
+                        uuid.uuid4(), template_id, language, v,
+                        SUBJECT if email else None, BODY_HTML if email else None, BODY_TEXT,
+                        published if current else archived, current,
+                        placeholders[ChannelType[channel_name]], "[]", cost_profile, at, at,
+                    )
+
+    return template_rows, version_rows()
+
+
+async def seed(args: argparse.Namespace) -> None:
+    conn = await asyncpg.connect(dsn())
+    try:
+        start = time.perf_counter()
+        template_rows, version_rows = generate(args.tenants, args.templates, args.languages, args.versions)
+        async with conn.transaction():
+            await conn.copy_records_to_table("templates", records=template_rows, columns=TEMPLATE_COLUMNS)
+            await conn.copy_records_to_table("template_versions", records=version_rows, columns=VERSION_COLUMNS)
+        print(f"copied {len(template_rows)} templates and "
+              f"{len(template_rows) * args.languages * args.versions} versions "
+              f"in {time.perf_counter() - start:.1f}s")
+        await conn.execute("ANALYZE templates")
+        await conn.execute("ANALYZE template_versions")
+    finally:
+        await conn.close()
+
+
+async def drop() -> None:
+    conn = await asyncpg.connect(dsn())
+    try:
+        async with conn.transaction():
+            deleted = await conn.execute(
+                "DELETE FROM template_versions WHERE template_id IN "
+                "(SELECT id FROM templates WHERE tenant_id LIKE $1)", f"{TENANT_PREFIX}%"
+            )
+            await conn.execute("DELETE FROM templates WHERE tenant_id LIKE $1", f"{TENANT_PREFIX}%")
+        print(f"deleted {deleted.split()[-1]} versions")
+        await conn.execute("VACUUM ANALYZE templates")
+        await conn.execute("VACUUM ANALYZE template_versions")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=100)
+    parser.add_argument("--templates", type=int, default=100, help="templates per tenant")
+    parser.add_argument("--languages", type=int, default=5, choices=range(1, len(LANGUAGES) + 1),
+                        metavar=f"1-{len(LANGUAGES)}", help="languages per template")
+    parser.add_argument("--versions", type=int, default=20, help="versions per language")
+    parser.add_argument("--drop", action="store_true", help="delete the synthetic tenants instead")
+    args = parser.parse_args()
+
+    asyncio.run(drop() if args.drop else seed(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import sys
 import os
 import pytest
 import pytest_asyncio
+from contextlib import asynccontextmanager
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -11,7 +12,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from app.main import app
 from app.core.config import settings
-from app.api.v1.deps import get_db
+from app.api.v1.deps import get_db, get_admin_db, get_admin_sessionmaker
 
 # Use the same DB for now but usually we'd want a separate test DB
 TEST_DATABASE_URL = settings.DATABASE_URL
@@ -54,7 +55,13 @@ async def client(db_session):
     async def override_get_db():
         yield db_session
 
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_admin_db] = override_get_db
+    app.dependency_overrides[get_admin_sessionmaker] = lambda: session_factory
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as c:
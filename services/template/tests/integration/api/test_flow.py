@@ -1,8 +1,12 @@
+import json
+
+import msgpack
 import pytest
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from app.main import app
+from app.render_app import create_render_app
 from app.core.config import settings
 from app.api.v1.deps import get_db
 
@@ -58,6 +62,12 @@ async def test_full_flow(client: AsyncClient):
     response = await client.post(f"/api/v1/templates/{template_id}/versions/{version_id}/publish", headers=admin_headers)
     assert response.status_code == 200
     assert response.json()["status"] == "published"
+    assert response.json()["cost_profile"]["sample"] == "empty"
+
+    # 3.1 Cost profile is exposed through the admin API
+    response = await client.get(f"/api/v1/templates/{template_id}/versions/{version_id}/profile", headers=admin_headers)
+    assert response.status_code == 200
+    assert set(response.json()["parts"]) == {"subject", "body_html", "body_text"}
 
     # 4. Render (Service API)
     render_payload = {
@@ -97,3 +107,650 @@ async def test_full_flow(client: AsyncClient):
     rendered = response.json()
     assert rendered["subject"] == "Welcome (Generic), Bob!"
     assert rendered["language_used"] == "en"
+
+    # 6. Strict render lists every missing variable before rendering
+    render_missing_payload = {
+        "template_key": "welcome_email",
+        "channel": "email",
+        "tenant_id": "tenant-123",
+        "language": "en-US",
+        "data": {}
+    }
+    response = await client.post("/api/v1/render/", json=render_missing_payload, headers=service_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"]["missing"] == ["name"]
+
+    # 7. Field selection renders and returns only the requested parts
+    render_subject_payload = {**render_payload, "parts": ["subject"]}
+    response = await client.post("/api/v1/render/", json=render_subject_payload, headers=service_headers)
+    assert response.status_code == 200
+    rendered = response.json()
+    assert rendered["subject"] == "Welcome, Alice!"
+    assert "body_html" not in rendered
+    assert "body_text" not in rendered
+
+
+@pytest.mark.asyncio
+async def test_multi_channel_render(client: AsyncClient):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+
+    versions = {
+        "email": {"language": "en", "subject": "Order {{ order_id }}", "body_html": "<p>{{ order_id }}</p>", "body_text": "Order {{ order_id }}"},
+        "sms": {"language": "en", "body_text": "SMS: order {{ order_id }}"},
+    }
+    for channel, version_payload in versions.items():
+        response = await client.post("/api/v1/templates/", json={
+            "key": "order_shipped", "name": "Order Shipped", "channel": channel, "tenant_id": "tenant-multi"
+        }, headers=admin_headers)
+        assert response.status_code == 200
+        template_id = response.json()["id"]
+        r = await client.post(f"/api/v1/templates/{template_id}/versions", json=version_payload, headers=admin_headers)
+        await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=admin_headers)
+
+    response = await client.post("/api/v1/render/channels", json={
+        "template_key": "order_shipped",
+        "channels": ["email", "sms", "push"],
+        "tenant_id": "tenant-multi",
+        "language": "en-GB",
+        "data": {"order_id": "A-1"}
+    }, headers=service_headers)
+    assert response.status_code == 200
+    results = {r["channel"]: r for r in response.json()["results"]}
+
+    assert results["email"]["status"] == 200
+    assert results["email"]["subject"] == "Order A-1"
+    assert results["email"]["language_used"] == "en"
+    assert results["sms"] == {"channel": "sms", "status": 200, "language_used": "en", "version": 1, "body_text": "SMS: order A-1"}
+    assert results["push"]["status"] == 404
+
+
+@pytest.mark.asyncio
+async def test_layout_extends_and_republish(client: AsyncClient):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+
+    async def create(key, version_payload):
+        r = await client.post("/api/v1/templates/", json={
+            "key": key, "name": key, "channel": "email", "tenant_id": "tenant-layout"
+        }, headers=admin_headers)
+        template_id = r.json()["id"]
+        return template_id, await add_and_publish(template_id, version_payload)
+
+    async def add_and_publish(template_id, version_payload):
+        r = await client.post(f"/api/v1/templates/{template_id}/versions", json=version_payload, headers=admin_headers)
+        return await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=admin_headers)
+
+    layout_id, r = await create("base_layout", {
+        "language": "en",
+        "body_html": "<main>{% block content %}{% endblock %}</main><footer>{% include 'footer' %}</footer>",
+    })
+    assert r.status_code == 400  # footer is not published yet
+
+    _, r = await create("footer", {"language": "en", "body_html": "(c) {{ company }}"})
+    assert r.status_code == 200
+    r = await add_and_publish(layout_id, {
+        "language": "en",
+        "body_html": "<main>{% block content %}{% endblock %}</main><footer>{% include 'footer' %}</footer>",
+    })
+    assert r.status_code == 200
+
+    _, r = await create("receipt", {
+        "language": "en",
+        "subject": "Receipt",
+        "body_html": "{% extends 'base_layout' %}{% block content %}Hi {{ name }}{% endblock %}",
+    })
+    assert r.status_code == 200
+
+    render_payload = {
+        "template_key": "receipt",
+        "channel": "email",
+        "tenant_id": "tenant-layout",
+        "language": "en-US",
+        "data": {"name": "Ann", "company": "Prepeet"}
+    }
+    response = await client.post("/api/v1/render/", json=render_payload, headers=service_headers)
+    assert response.status_code == 200
+    assert response.json()["body_html"] == "<main>Hi Ann</main><footer>(c) Prepeet</footer>"
+
+    # Publishing a new layout version is picked up by its dependents
+    r = await add_and_publish(layout_id, {
+        "language": "en",
+        "body_html": "<div>{% block content %}{% endblock %}</div>",
+    })
+    assert r.status_code == 200
+    response = await client.post("/api/v1/render/", json=render_payload, headers=service_headers)
+    assert response.json()["body_html"] == "<div>Hi Ann</div>"
+
+    # A layout that includes one of its dependents would recurse on every render
+    r = await add_and_publish(layout_id, {
+        "language": "en",
+        "body_html": "<div>{% block content %}{% endblock %}{% include 'receipt' %}</div>",
+    })
+    assert r.status_code == 422
+    assert r.json()["detail"]["cycle"] == ["base_layout", "receipt", "base_layout"]
+    response = await client.post("/api/v1/render/", json=render_payload, headers=service_headers)
+    assert response.json()["body_html"] == "<div>Hi Ann</div>"
+
+
+@pytest.mark.asyncio
+async def test_email_pipeline_on_publish(client: AsyncClient):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+
+    r = await client.post("/api/v1/templates/", json={
+        "key": "pipeline_sms", "name": "SMS", "channel": "sms", "email_pipeline": ["minify_html"]
+    }, headers=admin_headers)
+    assert r.status_code == 422
+
+    r = await client.post("/api/v1/templates/", json={
+        "key": "pipeline_welcome", "name": "Welcome", "channel": "email",
+        "tenant_id": "tenant-pipeline", "email_pipeline": ["minify_html"]
+    }, headers=admin_headers)
+    assert r.status_code == 200
+    assert r.json()["email_pipeline"] == ["minify_html"]
+    template_id = r.json()["id"]
+
+    source = "<div>\n  <!-- greeting -->\n  <p>Hello   {{ name }}</p>\n</div>\n"
+    r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+        "language": "en", "subject": "Hi", "body_html": source
+    }, headers=admin_headers)
+    version_id = r.json()["id"]
+    r = await client.post(f"/api/v1/templates/{template_id}/versions/{version_id}/publish", headers=admin_headers)
+    assert r.status_code == 200
+
+    versions = (await client.get(f"/api/v1/templates/{template_id}/versions", headers=admin_headers)).json()
+    assert versions[0]["body_html"] == source
+    assert versions[0]["body_html_compiled"] == "<div><p>Hello {{ name }}</p></div>"
+
+    response = await client.post("/api/v1/render/", json={
+        "template_key": "pipeline_welcome", "channel": "email", "tenant_id": "tenant-pipeline",
+        "language": "en", "data": {"name": "Ann"}
+    }, headers=service_headers)
+    assert response.status_code == 200
+    assert response.json()["body_html"] == "<div><p>Hello Ann</p></div>"
+
+
+@pytest.mark.asyncio
+async def test_publish_rejects_budget_exceeded(client: AsyncClient):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+
+    r = await client.post("/api/v1/templates/", json={
+        "key": "budget_digest", "name": "Digest", "channel": "sms", "tenant_id": "tenant-budget"
+    }, headers=admin_headers)
+    template_id = r.json()["id"]
+    versions = []
+    for body_text in ("Digest for {{ name }}", f"{{% for i in range({settings.RENDER_MAX_LOOP_ITERATIONS * 2}) %}}.{{% endfor %}}"):
+        r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+            "language": "en", "body_text": body_text
+        }, headers=admin_headers)
+        versions.append(r.json()["id"])
+
+    r = await client.post(f"/api/v1/templates/{template_id}/versions/{versions[0]}/publish", headers=admin_headers)
+    assert r.status_code == 200
+    r = await client.post(f"/api/v1/templates/{template_id}/versions/{versions[1]}/publish", headers=admin_headers)
+    assert r.status_code == 422
+    assert r.json()["detail"]["limit"] == "loop_iterations"
+
+    response = await client.post("/api/v1/render/", json={
+        "template_key": "budget_digest", "channel": "sms", "tenant_id": "tenant-budget",
+        "language": "en", "data": {"name": "Ann"}
+    }, headers=service_headers)
+    assert response.json()["body_text"] == "Digest for Ann"
+
+
+def _json_seq_records(body: bytes) -> list:
+    assert body.startswith(b"\x1e")
+    return [json.loads(record) for record in body.split(b"\x1e")[1:]]
+
+
+@pytest.mark.asyncio
+async def test_streaming_render(client: AsyncClient):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+
+    r = await client.post("/api/v1/templates/", json={
+        "key": "statement", "name": "Statement", "channel": "email", "tenant_id": "tenant-stream"
+    }, headers=admin_headers)
+    template_id = r.json()["id"]
+    r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+        "language": "en",
+        "subject": "Statement for {{ name }}",
+        "body_html": "<table>{% for row in rows %}<tr><td>{{ row }}</td></tr>{% endfor %}</table>",
+        "body_text": "{{ rows | length }} rows",
+    }, headers=admin_headers)
+    r = await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=admin_headers)
+    assert r.status_code == 200
+
+    rows = [f"line {i}" for i in range(5000)]
+    payload = {
+        "template_key": "statement", "channel": "email", "tenant_id": "tenant-stream",
+        "language": "en", "data": {"name": "Ann", "rows": rows}
+    }
+    response = await client.post("/api/v1/render/stream", json=payload, headers=service_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json-seq"
+
+    records = _json_seq_records(response.content)
+    assert records[0] == {
+        "template_key": "statement", "channel": "email", "language_used": "en", "version": 1,
+        "parts": ["subject", "body_html", "body_text"]
+    }
+    assert records[-1] == {"done": True}
+    body_records = [r["chunk"] for r in records[1:-1] if r["part"] == "body_html"]
+    assert len(body_records) > 1
+    assert "".join(body_records) == "<table>" + "".join(f"<tr><td>{row}</td></tr>" for row in rows) + "</table>"
+    assert [r["chunk"] for r in records[1:-1] if r["part"] == "body_text"] == ["5000 rows"]
+
+    # Data errors are reported before streaming starts
+    payload["data"] = {"rows": rows}
+    response = await client.post("/api/v1/render/stream", json=payload, headers=service_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"]["missing"] == ["name"]
+
+    # Failures while rendering end the stream with an error record
+    payload["data"] = {"name": "Ann", "rows": 5}
+    response = await client.post("/api/v1/render/stream", json=payload, headers=service_headers)
+    records = _json_seq_records(response.content)
+    assert records[-1]["error"]["status"] == 400
+
+    # Admission slots are held for the whole stream and then given back
+    from app.core.admission import render_admission
+    assert render_admission.active == 0
+
+
+@pytest.mark.asyncio
+async def test_msgpack_render(client: AsyncClient):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+
+    r = await client.post("/api/v1/templates/", json={
+        "key": "packed", "name": "Packed", "channel": "sms", "tenant_id": "tenant-msgpack"
+    }, headers=admin_headers)
+    template_id = r.json()["id"]
+    r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+        "language": "en", "body_text": "{{ order.id }}: {{ order.lines | length }} lines"
+    }, headers=admin_headers)
+    await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=admin_headers)
+
+    payload = {
+        "template_key": "packed", "channel": "sms", "tenant_id": "tenant-msgpack", "language": "en",
+        "data": {"order": {"id": "A-1", "lines": [{"sku": i} for i in range(3)]}}
+    }
+    headers = {**service_headers, "Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+    response = await client.post("/api/v1/render/", content=msgpack.packb(payload), headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == {
+        "template_key": "packed", "channel": "sms", "language_used": "en", "version": 1, "body_text": "A-1: 3 lines"
+    }
+
+    # msgpack in, JSON out
+    headers["Accept"] = "application/json"
+    response = await client.post("/api/v1/render/", content=msgpack.packb(payload), headers=headers)
+    assert response.json()["body_text"] == "A-1: 3 lines"
+
+    # JSON in, msgpack out, on the multi-channel endpoint
+    response = await client.post("/api/v1/render/channels", json={**payload, "channels": ["sms"]},
+                                 headers={**service_headers, "Accept": "application/msgpack"})
+    assert msgpack.unpackb(response.content)["results"][0]["body_text"] == "A-1: 3 lines"
+
+    # The envelope is still validated; data only has to be an object
+    response = await client.post("/api/v1/render/", content=msgpack.packb({**payload, "channel": "fax"}), headers=headers)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "channel"]
+    response = await client.post("/api/v1/render/", content=msgpack.packb({**payload, "data": [1]}), headers=headers)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "data"]
+    response = await client.post("/api/v1/render/", content=b"\xc1", headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_render_app(client: AsyncClient, db_session: AsyncSession):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    r = await client.post("/api/v1/templates/", json={
+        "key": "lean", "name": "Lean", "channel": "sms", "tenant_id": "tenant-lean"
+    }, headers=admin_headers)
+    template_id = r.json()["id"]
+    r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+        "language": "en", "body_text": "Hi {{ name }}"
+    }, headers=admin_headers)
+    await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=admin_headers)
+
+    async def override_get_db():
+        yield db_session
+
+    render_app = create_render_app()
+    render_app.dependency_overrides[get_db] = override_get_db
+    payload = {
+        "template_key": "lean", "channel": "sms", "tenant_id": "tenant-lean", "language": "en",
+        "data": {"name": "Ann"}
+    }
+    async with AsyncClient(transport=ASGITransport(app=render_app), base_url="http://render") as lean:
+        # Only the render and health routes are served, still behind the service token
+        assert (await lean.post("/api/v1/templates/", json={}, headers=admin_headers)).status_code == 404
+        assert (await lean.post("/api/v1/render/", json=payload)).status_code in (401, 403)
+
+        headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN, "X-Request-ID": "req-lean-1"}
+        response = await lean.post("/api/v1/render/", json=payload, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["body_text"] == "Hi Ann"
+        assert response.headers["x-request-id"] == "req-lean-1"
+
+        # Ids are passed through, never generated
+        response = await lean.post("/api/v1/render/", json=payload, headers={"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN})
+        assert "x-request-id" not in response.headers
+
+        metrics = (await lean.get("/metrics")).text
+        assert 'template_render_app_request_duration_seconds_count{route="/api/v1/render/",status="2xx"}' in metrics
+
+
+
+@pytest.mark.asyncio
+async def test_render_admission_sheds_with_retry_after(client: AsyncClient, monkeypatch):
+    from app.api.v1 import render
+    from app.core.admission import AdmissionController, TenantLimits
+
+    monkeypatch.setattr(render, "render_admission", AdmissionController(
+        max_concurrency=8, max_queue=8, queue_timeout=0.1, tenant_limits=TenantLimits(),
+        overrides={"tenant-burst": {"rate": 1, "burst": 1}}
+    ))
+    headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+    payload = {"template_key": "missing", "channel": "sms", "tenant_id": "tenant-burst", "language": "en", "data": {}}
+
+    assert (await client.post("/api/v1/render/", json=payload, headers=headers)).status_code == 404
+    response = await client.post("/api/v1/render/", json=payload, headers=headers)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+    # Other tenants are unaffected
+    response = await client.post("/api/v1/render/", json={**payload, "tenant_id": "tenant-calm"}, headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_render_metrics(client: AsyncClient, monkeypatch):
+    from prometheus_client import REGISTRY
+
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+    monkeypatch.setattr(settings, "METRICS_TENANTS", ["tenant-metrics"])
+    monkeypatch.setattr(settings, "METRICS_TEMPLATE_KEY_LABEL", True)
+
+    r = await client.post("/api/v1/templates/", json={
+        "key": "metered", "name": "Metered", "channel": "sms", "tenant_id": "tenant-metrics"
+    }, headers=admin_headers)
+    template_id = r.json()["id"]
+    r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+        "language": "en", "body_text": "Hi {{ name }}"
+    }, headers=admin_headers)
+    await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=admin_headers)
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, {"channel": "sms", "tenant": "tenant-metrics", **labels}) or 0
+
+    labels = {"language": "en", "part": "body_text", "template_key": "metered"}
+    renders = sample("template_render_duration_seconds_count", **labels)
+    output = sample("template_render_output_bytes_sum", **labels)
+    fallbacks = sample("template_resolutions_total", fallback="base_language", template_key="metered")
+    missing = sample("template_render_failures_total", language="en", reason="missing_variables", template_key="metered")
+
+    payload = {"template_key": "metered", "channel": "sms", "tenant_id": "tenant-metrics", "language": "en-GB",
+               "data": {"name": "Ann"}}
+    assert (await client.post("/api/v1/render/", json=payload, headers=service_headers)).status_code == 200
+    payload["data"] = {}
+    assert (await client.post("/api/v1/render/", json=payload, headers=service_headers)).status_code == 400
+
+    assert sample("template_render_duration_seconds_count", **labels) == renders + 1
+    assert sample("template_render_output_bytes_sum", **labels) == output + len("Hi Ann")
+    assert sample("template_resolutions_total", fallback="base_language", template_key="metered") == fallbacks + 2
+    assert sample("template_render_failures_total", language="en", reason="missing_variables",
+                  template_key="metered") == missing + 1
+
+
+@pytest.mark.asyncio
+async def test_render_spans(client: AsyncClient):
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    if trace.get_tracer_provider() is not provider:
+        pytest.skip("A tracer provider is already installed")
+
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    r = await client.post("/api/v1/templates/", json={
+        "key": "traced", "name": "Traced", "channel": "email", "tenant_id": "tenant-traced"
+    }, headers=admin_headers)
+    template_id = r.json()["id"]
+    r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+        "language": "en", "subject": "Hi", "body_html": "<p>Hi {{ name }}</p>", "body_text": "Hi {{ name }}"
+    }, headers=admin_headers)
+    await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=admin_headers)
+    exporter.clear()
+
+    r = await client.post("/api/v1/render/", json={
+        "template_key": "traced", "channel": "email", "tenant_id": "tenant-traced", "language": "en-GB",
+        "data": {"name": "Ann"}
+    }, headers={"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN})
+    assert r.status_code == 200
+
+    spans = exporter.get_finished_spans()
+    resolve = next(s for s in spans if s.name == "template.resolve")
+    assert resolve.attributes["template.language_used"] == "en"
+    attempts = [s for s in spans if s.name == "template.resolve_attempt"]
+    assert [(s.attributes["template.attempt"], s.attributes["template.matched"]) for s in attempts] == [
+        ("exact", False), ("base_language", True)
+    ]
+    assert all(s.parent.span_id == resolve.context.span_id for s in attempts)
+    assert {s.attributes["template.part"] for s in spans if s.name == "template.render_part"} == {
+        "subject", "body_html", "body_text"
+    }
+    assert any(s.name == "template.compile" for s in spans)
+
+
+@pytest.mark.asyncio
+async def test_slow_query_logging(monkeypatch):
+    from asgi_correlation_id import correlation_id
+    from loguru import logger
+    from prometheus_client import REGISTRY
+    from sqlalchemy import text
+    from app.infrastructure.db.instrumentation import instrument_engine
+
+    monkeypatch.setattr(settings, "DB_SLOW_QUERY_MS", 0)
+    engine = create_async_engine(settings.DATABASE_URL)
+    instrument_engine(engine, pool="test")
+    messages = []
+    sink = logger.add(lambda message: messages.append(message.record), level="WARNING")
+    token = correlation_id.set("req-slow-1")
+
+    def statements():
+        return REGISTRY.get_sample_value(
+            "template_db_statement_duration_seconds_count", {"pool": "test", "operation": "SELECT"}
+        ) or 0
+
+    try:
+        before = statements()
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT 42 AS answer"))).scalar() == 42
+    finally:
+        correlation_id.reset(token)
+        logger.remove(sink)
+        await engine.dispose()
+
+    assert statements() > before
+    slow = [r for r in messages if "SELECT 42" in r["message"]]
+    assert slow and slow[0]["extra"]["correlation_id"] == "req-slow-1"
+
+
+@pytest.mark.asyncio
+async def test_on_demand_profiling(client: AsyncClient):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+    payload = {"template_key": "missing-profiled", "channel": "sms", "language": "en", "data": {}}
+
+    # Without the admin key the header is ignored
+    r = await client.post("/api/v1/render/", json=payload, headers={**service_headers, "X-Profile": "cpu"})
+    assert r.status_code == 404
+    assert "x-profile-id" not in r.headers
+
+    r = await client.post("/api/v1/render/", json=payload,
+                          headers={**service_headers, **admin_headers, "X-Profile": "memory"})
+    assert r.status_code == 404
+    profile_id = r.headers["x-profile-id"]
+
+    assert (await client.get("/api/v1/profiles/")).status_code == 403
+    r = await client.get("/api/v1/profiles/", headers=admin_headers)
+    summary = next(p for p in r.json() if p["id"] == profile_id)
+    assert summary["path"] == "/api/v1/render/" and summary["status"] == 404 and summary["memory"]
+
+    r = await client.get(f"/api/v1/profiles/{profile_id}", params={"kind": "memory"}, headers=admin_headers)
+    assert r.status_code == 200
+    for line in r.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+    r = await client.get(f"/api/v1/profiles/{profile_id}", headers=admin_headers)
+    assert r.status_code == 200
+    assert (await client.get("/api/v1/profiles/unknown", headers=admin_headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_traffic_capture_and_replay(client: AsyncClient, monkeypatch, tmp_path):
+    from app.api.v1 import render
+    from app.core.capture import TrafficCapture
+    from benchmarks.replay_capture import read_capture, replay, report
+
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+    r = await client.post("/api/v1/templates/", json={
+        "key": "captured_code", "name": "Code", "channel": "sms", "tenant_id": "tenant-capture"
+    }, headers=admin_headers)
+    template_id = r.json()["id"]
+    r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+        "language": "en", "body_text": "Code {{ code }} for {{ email }}"
+    }, headers=admin_headers)
+    r = await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=admin_headers)
+    assert r.status_code == 200
+
+    capture = TrafficCapture(str(tmp_path), rate=1.0, max_bytes=1 << 20, keep=2)
+    monkeypatch.setattr(render, "traffic_capture", capture)
+    request = {"template_key": "captured_code", "channel": "sms", "tenant_id": "tenant-capture", "language": "en",
+               "options": {"strict": False}}
+    for data in ({"code": "123", "email": "alice@example.com"}, {"code": "456"}):
+        r = await client.post("/api/v1/render/", json={**request, "data": data}, headers=service_headers)
+        assert r.status_code == 200
+    r = await client.post("/api/v1/render/", json={**request, "template_key": "captured_missing"},
+                          headers=service_headers)
+    assert r.status_code == 404
+    capture.stop()
+
+    records = list(read_capture([str(tmp_path)]))
+    assert [(rec["status"], rec["redacted"]) for rec in records] == [(200, True), (200, False), (404, False)]
+    assert records[0]["request"]["data"] == {"code": "123", "email": "*" * 17}
+    assert records[1]["version"] == 1 and set(records[1]["output_sha256"]) == {"body_text"}
+    assert all("alice" not in open(path).read() for path in capture.files())
+
+    outcomes, wall = await replay(records, client, client, speed=0, concurrency=2)
+    assert [o.status for o in outcomes] == [200, 200, 404]
+    assert report(outcomes, wall, show_diffs=5)
+
+
+@pytest.mark.asyncio
+async def test_bulk_export_and_import(client: AsyncClient):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    service_headers = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+    for key, channel in (("bulk_welcome", "email"), ("bulk_code", "sms")):
+        r = await client.post("/api/v1/templates/", json={
+            "key": key, "name": key, "channel": channel, "tenant_id": "tenant-bulk-src", "category": "onboarding"
+        }, headers=admin_headers)
+        template_id = r.json()["id"]
+        for text in ("Old {{ name }}", "Hi {{ name }}"):
+            r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+                "language": "en", "subject": text if channel == "email" else None, "body_text": text
+            }, headers=admin_headers)
+        r = await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish",
+                              headers=admin_headers)
+        assert r.status_code == 200
+
+    r = await client.get("/api/v1/templates/export", params={"tenant_id": "tenant-bulk-src"}, headers=admin_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert sorted(line["key"] for line in lines) == ["bulk_code", "bulk_welcome"]
+    versions = lines[0]["versions"]
+    assert [(v["version"], v["status"], v["is_current"]) for v in versions] == [
+        (1, "draft", False), (2, "published", True)
+    ]
+    assert "placeholders" not in versions[1] and "cost_profile" not in versions[1]
+
+    # Into another tenant, twice: the second import appends versions.
+    # Derived data in the body is ignored; publishing computes it
+    welcome = next(line for line in lines if line["key"] == "bulk_welcome")
+    welcome["versions"][1].update({
+        "body_html": "<p>{{ name }}</p>", "body_html_compiled": "<p>{{ secret }}</p>",
+        "placeholders": {"body_text": []}, "cost_profile": {"sample": "empty", "render_ms": 0},
+    })
+    export = b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+    for _ in range(2):
+        r = await client.post("/api/v1/templates/import", params={"tenant_id": "tenant-bulk-dst"},
+                              content=export, headers=admin_headers)
+        assert r.status_code == 200
+    assert r.json() == {"templates_created": 0, "templates_updated": 2, "versions": 4}
+
+    r = await client.get("/api/v1/templates/", params={"tenant_id": "tenant-bulk-dst"}, headers=admin_headers)
+    imported = {t["key"]: t for t in r.json()}
+    assert set(imported) == {"bulk_welcome", "bulk_code"} and imported["bulk_code"]["category"] == "onboarding"
+    r = await client.get(f"/api/v1/templates/{imported['bulk_welcome']['id']}/versions", headers=admin_headers)
+    assert [(v["version"], v["is_current"]) for v in r.json()] == [(1, False), (2, False), (3, False), (4, True)]
+    current = r.json()[3]
+    assert current["body_html_compiled"] is None and current["placeholders"]["body_text"]
+
+    r = await client.post("/api/v1/render/", json={
+        "template_key": "bulk_welcome", "channel": "email", "tenant_id": "tenant-bulk-dst", "language": "en",
+        "data": {"name": "Alice"}
+    }, headers=service_headers)
+    assert r.status_code == 200
+    assert r.json()["version"] == 4 and r.json()["subject"] == "Hi Alice"
+    assert r.json()["body_html"] == "<p>Alice</p>"
+
+    # One bad source rejects the whole import
+    broken = json.loads(export.splitlines()[0])
+    broken["key"] = "bulk_broken"
+    broken["versions"][0]["body_text"] = "{% if %}"
+    body = export + json.dumps(broken).encode() + b"\nnot json\n"
+    r = await client.post("/api/v1/templates/import", params={"tenant_id": "tenant-bulk-bad"},
+                          content=body, headers=admin_headers)
+    assert r.status_code == 422
+    assert [error["line"] for error in r.json()["detail"]["errors"]] == [4, 3]
+    r = await client.get("/api/v1/templates/", params={"tenant_id": "tenant-bulk-bad"}, headers=admin_headers)
+    assert r.json() == []
+
+    # Current versions are published partials first, and must pass the publish checks
+    partial = {"key": "bulk_partial", "name": "p", "channel": "sms", "versions": [{
+        "language": "en", "version": 1, "body_text": "-- {{ team }}", "status": "published", "is_current": True
+    }]}
+    code = next(line for line in lines if line["key"] == "bulk_code")
+    code["versions"][1]["body_text"] = "Code {% include 'bulk_partial' %}"
+    body = b"".join(json.dumps(line).encode() + b"\n" for line in (code, partial))
+    r = await client.post("/api/v1/templates/import", params={"tenant_id": "tenant-bulk-order"},
+                          content=body, headers=admin_headers)
+    assert r.status_code == 200
+    r = await client.post("/api/v1/render/", json={
+        "template_key": "bulk_code", "channel": "sms", "tenant_id": "tenant-bulk-order", "language": "en",
+        "data": {"team": "Ops"}
+    }, headers=service_headers)
+    assert r.json()["body_text"] == "Code -- Ops"
+
+    partial["versions"][0]["body_text"] = "{% include 'bulk_code' %}"
+    body = b"".join(json.dumps(line).encode() + b"\n" for line in (code, partial))
+    r = await client.post("/api/v1/templates/import", params={"tenant_id": "tenant-bulk-bad"},
+                          content=body, headers=admin_headers)
+    assert r.status_code == 422
+    assert r.json()["detail"]["errors"][0]["line"] in (1, 2)
+    r = await client.get("/api/v1/templates/", params={"tenant_id": "tenant-bulk-bad"}, headers=admin_headers)
+    assert r.json() == []
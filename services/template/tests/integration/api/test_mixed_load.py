@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Tuple
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.main import app
+from app.core.config import settings
+
+# Render p99 under admin load may be at most this multiple of the p99
+# measured without it in the same run, plus a little slack for scheduling
+# noise; absolute latencies depend too much on the machine. Slower machines
+# can scale the slack like the renderer budgets, e.g. PERF_BUDGET_SCALE=2
+RENDER_P99_MAX_RATIO = 3.0
+RENDER_P99_SLACK_SECONDS = 0.01 * float(os.environ.get("PERF_BUDGET_SCALE", "1"))
+
+ADMIN_HEADERS = {"X-Admin-Key": settings.ADMIN_API_KEY}
+SERVICE_HEADERS = {"X-Service-Token": settings.INTERNAL_SERVICE_TOKEN}
+TENANT = "tenant-mixed-load"
+
+
+async def _create(client: AsyncClient, key: str, body_text: str, publish: bool) -> Tuple[str, str]:
+    r = await client.post("/api/v1/templates/", json={
+        "key": key, "name": key, "channel": "sms", "tenant_id": TENANT
+    }, headers=ADMIN_HEADERS)
+    template_id = r.json()["id"]
+    r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+        "language": "en", "body_text": body_text
+    }, headers=ADMIN_HEADERS)
+    version_id = r.json()["id"]
+    if publish:
+        r = await client.post(f"/api/v1/templates/{template_id}/versions/{version_id}/publish", headers=ADMIN_HEADERS)
+        assert r.status_code == 200
+    return template_id, version_id
+
+
+async def _cleanup(client: AsyncClient):
+    r = await client.get("/api/v1/templates/", params={"tenant_id": TENANT}, headers=ADMIN_HEADERS)
+    for template in r.json():
+        await client.delete(f"/api/v1/templates/{template['id']}", headers=ADMIN_HEADERS)
+
+
+@pytest.mark.asyncio
+async def test_render_latency_under_admin_load():
+    # Real pools and lanes: data is committed, so clean up before and after
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await _cleanup(client)
+        try:
+            await _create(client, "mixed-render", "Hi {{ name }}", publish=True)
+            preview_id, preview_version = await _create(
+                client, "mixed-preview", "{{ items | sort | first }}", publish=False
+            )
+            render_payload = {
+                "template_key": "mixed-render", "channel": "sms", "tenant_id": TENANT,
+                "language": "en", "data": {"name": "Ann"}
+            }
+            # Encoded once so the load generator itself stays cheap
+            preview_body = json.dumps({"items": list(range(20_000, 0, -1))})
+
+            stop = asyncio.Event()
+            admin_status = []
+
+            async def admin_user(n: int):
+                while not stop.is_set():
+                    if n % 2:
+                        r = await client.get("/api/v1/templates/", params={"tenant_id": TENANT}, headers=ADMIN_HEADERS)
+                    else:
+                        r = await client.post(
+                            f"/api/v1/templates/{preview_id}/versions/{preview_version}/preview",
+                            content=preview_body, headers={**ADMIN_HEADERS, "Content-Type": "application/json"}
+                        )
+                    admin_status.append(r.status_code)
+
+            async def render_latencies(count: int) -> list:
+                latencies = []
+                for _ in range(count):
+                    start = time.perf_counter()
+                    r = await client.post("/api/v1/render/", json=render_payload, headers=SERVICE_HEADERS)
+                    latencies.append(time.perf_counter() - start)
+                    assert r.status_code == 200
+                return latencies
+
+            await render_latencies(20)
+            baseline = statistics.quantiles(await render_latencies(200), n=100)[98]
+            admin = [asyncio.create_task(admin_user(n)) for n in range(3 * settings.ADMIN_LANE_CONCURRENCY)]
+            try:
+                await asyncio.sleep(0.2)
+                latencies = await render_latencies(200)
+            finally:
+                stop.set()
+                await asyncio.gather(*admin)
+
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            assert p99 < RENDER_P99_MAX_RATIO * baseline + RENDER_P99_SLACK_SECONDS, (
+                f"render p99 {p99 * 1000:.1f}ms under admin load, {baseline * 1000:.1f}ms without"
+            )
+            # Admin traffic kept flowing; anything beyond its lane is shed, not failed
+            assert 200 in admin_status
+            assert set(admin_status) <= {200, 503}
+        finally:
+            await _cleanup(client)
@@ -0,0 +1,148 @@
+"""
+Query plan regression tests at production scale. They run only when the
+database holds the synthetic data set from `python -m benchmarks.seed_scale`
+(1M+ template versions) and skip otherwise.
+
+Every statement a service call issues is captured and explained: reads with
+EXPLAIN ANALYZE, writes with a plain EXPLAIN so nothing runs twice. A plan
+must not scan templates or template_versions sequentially, must not read
+more rows than the call needs, and must finish within the budget.
+"""
+import json
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select, text
+
+from app.domain.templates.models import ChannelType, TemplateVersionCreate
+from app.domain.templates.services import TemplateService
+from app.infrastructure.db.models.templates import Template as DBTemplate
+from benchmarks.seed_scale import TENANT_PREFIX
+
+MIN_VERSION_ROWS = 1_000_000
+# Per statement, on a warm cache; the seeded plans take well under 1ms
+STATEMENT_BUDGET_MS = 25.0
+SCANNED_TABLES = {"templates", "template_versions"}
+
+
+@pytest_asyncio.fixture
+async def scale(db_session):
+    rows = (await db_session.execute(text(
+        "SELECT reltuples FROM pg_class WHERE relname = 'template_versions'"
+    ))).scalar()
+    if not rows or rows < MIN_VERSION_ROWS:
+        pytest.skip("needs the synthetic data set: python -m benchmarks.seed_scale")
+    template = (await db_session.execute(
+        select(DBTemplate)
+        .where(DBTemplate.tenant_id == f"{TENANT_PREFIX}00042", DBTemplate.channel == ChannelType.EMAIL)
+        .limit(1)
+    )).scalar_one_or_none()
+    if template is None:
+        pytest.skip("needs the synthetic data set: python -m benchmarks.seed_scale")
+    return template
+
+
+@contextmanager
+def captured(session) -> Iterator[List[Tuple[str, tuple, float]]]:
+    """
+    Records (statement, parameters, milliseconds) for every statement run
+    on the session's engine inside the block.
+    """
+    statements: List[Tuple[str, tuple, float]] = []
+    sync_engine = session.bind.engine.sync_engine
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["plan_test_start"] = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = (time.perf_counter() - conn.info.pop("plan_test_start")) * 1000
+        statements.append((statement, parameters, elapsed))
+
+    event.listen(sync_engine, "before_cursor_execute", before)
+    event.listen(sync_engine, "after_cursor_execute", after)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before)
+        event.remove(sync_engine, "after_cursor_execute", after)
+
+
+async def explain(session, statement: str, parameters: tuple) -> dict:
+    analyze = statement.lstrip().upper().startswith("SELECT")
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters)
+    plan = result.scalar()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+
+def nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from nodes(child)
+
+
+async def assert_plans(session, statements, max_rows: int) -> None:
+    assert statements, "no statements were captured"
+    for statement, parameters, elapsed in statements:
+        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "INSERT", "DELETE")):
+            continue
+        plan = await explain(session, statement, parameters)
+        for node in nodes(plan):
+            assert not (node["Node Type"] == "Seq Scan" and node.get("Relation Name") in SCANNED_TABLES), (
+                f"sequential scan on {node['Relation Name']}:\n{statement}"
+            )
+            rows = node.get("Actual Rows", 0) * node.get("Actual Loops", 1)
+            examined = rows + node.get("Rows Removed by Filter", 0)
+            assert examined <= max_rows, f"{node['Node Type']} read {examined} rows:\n{statement}"
+        assert elapsed < STATEMENT_BUDGET_MS, f"took {elapsed:.1f}ms:\n{statement}"
+
+
+@pytest.mark.asyncio
+async def test_resolve_template_version_plan(db_session, scale):
+    service = TemplateService(db_session)
+    with captured(db_session) as statements:
+        version = await service.resolve_template_version(scale.key, scale.channel, scale.tenant_id, "en-US")
+    assert version is not None and version.is_current
+
+    plan = await explain(db_session, *statements[0][:2])
+    assert "ix_template_versions_current" in {node.get("Index Name") for node in nodes(plan)}
+    await assert_plans(db_session, statements, max_rows=2)
+
+
+@pytest.mark.asyncio
+async def test_list_templates_plan(db_session, scale):
+    service = TemplateService(db_session)
+    with captured(db_session) as statements:
+        templates = await service.list_templates(tenant_id=scale.tenant_id, channel=ChannelType.EMAIL, limit=20)
+    assert templates
+
+    await assert_plans(db_session, statements, max_rows=200)
+
+
+@pytest.mark.asyncio
+async def test_create_version_plan(db_session, scale):
+    service = TemplateService(db_session)
+    with captured(db_session) as statements:
+        version = await service.create_version(scale.id, TemplateVersionCreate(
+            language="en", subject="Hi {{ name }}", body_text="Hello {{ name }}"
+        ))
+    assert version.version == 21
+
+    await assert_plans(db_session, statements, max_rows=100)
+
+
+@pytest.mark.asyncio
+async def test_publish_version_plan(db_session, scale):
+    service = TemplateService(db_session)
+    version = await service.create_version(scale.id, TemplateVersionCreate(
+        language="en", subject="Hi {{ name }}", body_text="Hello {{ name }}"
+    ))
+    with captured(db_session) as statements:
+        await service.publish_version(scale.id, version.id)
+    assert version.is_current
+
+    await assert_plans(db_session, statements, max_rows=100)
@@ -0,0 +1,104 @@
+from contextlib import asynccontextmanager
+
+import grpc
+import msgpack
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.rpc import render_pb2, render_pb2_grpc
+from app.rpc.server import create_server
+
+
+@pytest_asyncio.fixture
+async def stub(db_session):
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    server, port = create_server("127.0.0.1:0", session_factory)
+    await server.start()
+    async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+        yield render_pb2_grpc.RenderServiceStub(channel)
+    await server.stop(None)
+
+
+async def _publish(client: AsyncClient):
+    admin_headers = {"X-Admin-Key": settings.ADMIN_API_KEY}
+    r = await client.post("/api/v1/templates/", json={
+        "key": "rpc_receipt", "name": "Receipt", "channel": "email", "tenant_id": "tenant-rpc"
+    }, headers=admin_headers)
+    template_id = r.json()["id"]
+    r = await client.post(f"/api/v1/templates/{template_id}/versions", json={
+        "language": "en", "subject": "Receipt {{ order_id }}", "body_text": "Thanks {{ name }}"
+    }, headers=admin_headers)
+    r = await client.post(f"/api/v1/templates/{template_id}/versions/{r.json()['id']}/publish", headers=admin_headers)
+    assert r.status_code == 200
+
+
+def _request(request_id, **data):
+    return render_pb2.RenderRequest(
+        request_id=request_id, template_key="rpc_receipt", channel=render_pb2.CHANNEL_EMAIL,
+        tenant_id="tenant-rpc", language="en-US", data=msgpack.packb(data),
+    )
+
+
+METADATA = (("x-service-token", settings.INTERNAL_SERVICE_TOKEN),)
+
+
+@pytest.mark.asyncio
+async def test_unary_render(client: AsyncClient, stub):
+    await _publish(client)
+
+    result = await stub.Render(_request("r1", order_id="A-1", name="Ann"), metadata=METADATA)
+    assert result.code == 0
+    assert (result.language_used, result.version) == ("en", 1)
+    assert (result.subject, result.body_text) == ("Receipt A-1", "Thanks Ann")
+    assert result.HasField("body_html") and result.body_html == ""
+
+    request = _request("r2", order_id="A-1", name="Ann")
+    request.parts.append(render_pb2.PART_SUBJECT)
+    result = await stub.Render(request, metadata=METADATA)
+    assert result.subject == "Receipt A-1" and not result.HasField("body_text")
+
+    with pytest.raises(grpc.aio.AioRpcError) as excinfo:
+        await stub.Render(_request("r3", order_id="A-1"), metadata=METADATA)
+    assert excinfo.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+    request = _request("r4")
+    request.template_key = "missing"
+    with pytest.raises(grpc.aio.AioRpcError) as excinfo:
+        await stub.Render(request, metadata=METADATA)
+    assert excinfo.value.code() == grpc.StatusCode.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_batch_and_stream(client: AsyncClient, stub):
+    await _publish(client)
+    requests = [_request("ok", order_id="A-1", name="Ann"), _request("bad", order_id="A-2")]
+
+    response = await stub.RenderBatch(render_pb2.RenderBatchRequest(requests=requests), metadata=METADATA)
+    assert [r.request_id for r in response.results] == ["ok", "bad"]
+    assert response.results[0].body_text == "Thanks Ann"
+    assert response.results[1].code == grpc.StatusCode.INVALID_ARGUMENT.value[0]
+    assert list(response.results[1].missing_variables) == ["name"]
+
+    async def request_stream():
+        for request in requests:
+            yield request
+
+    results = [r async for r in stub.RenderStream(request_stream(), metadata=METADATA)]
+    assert [(r.request_id, r.code) for r in results] == [("ok", 0), ("bad", grpc.StatusCode.INVALID_ARGUMENT.value[0])]
+
+
+@pytest.mark.asyncio
+async def test_requires_service_token(stub):
+    with pytest.raises(grpc.aio.AioRpcError) as excinfo:
+        await stub.Render(_request("r1"), metadata=(("x-service-token", "wrong"),))
+    assert excinfo.value.code() == grpc.StatusCode.UNAUTHENTICATED
+
+    with pytest.raises(grpc.aio.AioRpcError) as excinfo:
+        async for _ in stub.RenderStream(iter([_request("r1")])):
+            pass
+    assert excinfo.value.code() == grpc.StatusCode.UNAUTHENTICATED
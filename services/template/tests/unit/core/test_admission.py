@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController, AdmissionRejected, TenantLimits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def controller(max_concurrency=10, queue=10, queue_timeout=1.0, clock=None, overrides=None, **limits):
+    return AdmissionController(
+        max_concurrency=max_concurrency,
+        max_queue=queue,
+        queue_timeout=queue_timeout,
+        tenant_limits=TenantLimits(**limits),
+        overrides=overrides,
+        clock=clock or FakeClock(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_sheds_with_retry_after():
+    clock = FakeClock()
+    admission = controller(clock=clock, rate=2, burst=2)
+    for _ in range(2):
+        (await admission.acquire("acme")).release()
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        await admission.acquire("acme")
+    assert (excinfo.value.status_code, excinfo.value.reason, excinfo.value.retry_after) == (429, "rate_limited", 1)
+
+    # Other tenants have their own bucket, and tokens refill over time
+    (await admission.acquire("globex")).release()
+    clock.now += 0.5
+    (await admission.acquire("acme")).release()
+
+
+@pytest.mark.asyncio
+async def test_tenant_cap_queues_without_blocking_other_tenants():
+    admission = controller(concurrency=1)
+    first = await admission.acquire("acme")
+    waiting = asyncio.create_task(admission.acquire("acme"))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    # Another tenant is admitted straight away despite acme's backlog
+    (await admission.acquire("globex")).release()
+
+    first.release()
+    second = await asyncio.wait_for(waiting, 1)
+    assert admission.active == 1
+    second.release()
+    assert admission.active == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_sheds_with_tenant_or_global_status():
+    admission = controller(max_concurrency=2, queue_timeout=0.01, concurrency=1)
+    acme = await admission.acquire("acme")
+    with pytest.raises(AdmissionRejected) as excinfo:
+        await admission.acquire("acme")
+    assert (excinfo.value.status_code, excinfo.value.reason) == (429, "deadline")
+
+    globex = await admission.acquire("globex")
+    with pytest.raises(AdmissionRejected) as excinfo:
+        await admission.acquire("initech")
+    assert (excinfo.value.status_code, excinfo.value.reason) == (503, "deadline")
+
+    acme.release()
+    globex.release()
+    assert not admission._waiters
+
+
+@pytest.mark.asyncio
+async def test_full_queues_shed_immediately():
+    admission = controller(max_concurrency=1, queue=2, concurrency=None, max_queue=1)
+    held = await admission.acquire("acme")
+    queued = asyncio.create_task(admission.acquire("acme"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        await admission.acquire("acme")
+    assert (excinfo.value.status_code, excinfo.value.reason) == (429, "tenant_queue_full")
+
+    other = asyncio.create_task(admission.acquire("globex"))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        await admission.acquire("initech")
+    assert (excinfo.value.status_code, excinfo.value.reason) == (503, "queue_full")
+
+    held.release()
+    (await queued).release()
+    (await other).release()
+    assert admission.active == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_back_its_place():
+    admission = controller(concurrency=1)
+    held = await admission.acquire("acme")
+    waiting = asyncio.create_task(admission.acquire("acme"))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    held.release()
+    held.release()  # released once only
+    assert admission.active == 0
+    assert not admission._waiters
+
+
+def test_overrides_are_checked():
+    with pytest.raises(ValueError):
+        controller(overrides={"acme": {"rps": 10}})
+    admission = controller(overrides={"acme": {"concurrency": 32}}, concurrency=4)
+    assert admission._tenant("acme").limits.concurrency == 32
+    assert admission._tenant("globex").limits.concurrency == 4
+
+
+@pytest.mark.asyncio
+async def test_idle_tenants_are_dropped(monkeypatch):
+    monkeypatch.setattr("app.core.admission.TENANT_SWEEP_THRESHOLD", 4)
+    clock = FakeClock()
+    admission = controller(clock=clock, rate=1, burst=1)
+    busy = await admission.acquire("acme")
+    for i in range(3):
+        (await admission.acquire(f"tenant-{i}")).release()
+
+    # Buckets still refilling keep their tenant, as does a render in flight
+    (await admission.acquire("globex")).release()
+    assert len(admission._tenants) == 5
+    clock.now += 1
+    for i in range(4):
+        (await admission.acquire(f"other-{i}")).release()
+    assert set(admission._tenants) == {"acme", "other-0", "other-1", "other-2", "other-3"}
+    busy.release()
+    assert admission._tenants["acme"].label == "other"
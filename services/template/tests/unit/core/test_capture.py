@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from app.core.capture import TrafficCapture, redact
+
+
+def test_redact_masks_named_keys_at_any_depth():
+    data = {
+        "Name": "Alice",
+        "order": {"id": "A-1", "total": 12.5, "address": {"city": "Springfield", "zip": 12345}},
+        "lines": [{"sku": "X", "email": "a@example.com"}],
+        "vip": True,
+    }
+
+    masked, redacted = redact(data, ["name", "address", "email"])
+
+    assert redacted
+    assert masked == {
+        "Name": "*****",
+        "order": {"id": "A-1", "total": 12.5, "address": {"city": "***********", "zip": 0}},
+        "lines": [{"sku": "X", "email": "*************"}],
+        "vip": True,
+    }
+    assert data["Name"] == "Alice"
+    assert redact({"sku": "X"}, ["name"]) == ({"sku": "X"}, False)
+
+
+def test_capture_rotates_files_and_keeps_the_newest(tmp_path):
+    capture = TrafficCapture(str(tmp_path), rate=1.0, max_bytes=200, keep=2)
+    for i in range(12):
+        capture.record({"i": i, "padding": "x" * 40})
+    capture.stop()
+
+    files = capture.files()
+    assert len(files) == 2
+    records = [json.loads(line) for path in files for line in open(path)]
+    assert [r["i"] for r in records] == list(range(12))[-len(records):]
+    assert records[-1]["i"] == 11
+
+
+def test_capture_skips_unserialisable_records(tmp_path):
+    capture = TrafficCapture(str(tmp_path), rate=1.0, max_bytes=10_000, keep=1)
+    capture.record({"i": 0, "data": {(1, 2): "tuple key"}})
+    capture.record({"i": 1})
+    capture.stop()
+
+    [path] = capture.files()
+    assert [json.loads(line)["i"] for line in open(path)] == [1]
+
+
+def test_capture_keeps_at_least_one_file(tmp_path):
+    with pytest.raises(ValueError):
+        TrafficCapture(str(tmp_path), rate=1.0, max_bytes=200, keep=0)
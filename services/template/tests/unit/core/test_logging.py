@@ -0,0 +1,88 @@
+import io
+import json
+import logging
+import threading
+
+import pytest
+from asgi_correlation_id import correlation_id
+from loguru import logger
+
+from app.core import logging as app_logging
+from app.core.config import settings
+
+
+@pytest.fixture
+def production_logs(monkeypatch):
+    monkeypatch.setattr(settings, "ENV", "production")
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 0.0)
+    stream = io.StringIO()
+    app_logging.setup_logging(stream)
+
+    def lines():
+        app_logging._stop_background_sink()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield lines
+    monkeypatch.undo()
+    app_logging.setup_logging()
+
+
+def test_production_logs_are_queued_json_and_sampled(production_logs):
+    access = logging.getLogger("uvicorn.access")
+    access.info('%s - "%s %s HTTP/%s" %d', "10.0.0.1:5000", "POST", "/api/v1/render/", "1.1", 200)
+    access.warning("Slow client")
+    token = correlation_id.set("req-log-1")
+    try:
+        logger.info("Rendered")
+    finally:
+        correlation_id.reset(token)
+
+    lines = production_logs()
+    # Same shape as loguru's serialize=True
+    assert [line["text"] for line in lines] == ["Slow client\n", "Rendered\n"]
+    records = [line["record"] for line in lines]
+    assert records[0]["name"] == "uvicorn.access" and records[0]["level"]["name"] == "WARNING"
+    assert records[0]["module"] == "test_logging" and records[0]["file"]["name"] == "test_logging.py"
+    assert records[1]["extra"]["correlation_id"] == "req-log-1"
+
+
+def test_production_tracebacks_skip_variable_values(production_logs):
+    secret = "s3cr3t-token"
+    try:
+        raise ValueError("bad template")
+    except ValueError:
+        logger.exception(f"Render failed for {len(secret)} char token")
+
+    [line] = production_logs()
+    assert "ValueError: bad template" in line["text"]
+    assert line["record"]["exception"] == {"type": "ValueError", "value": "bad template", "traceback": True}
+    assert secret not in json.dumps(line)
+
+
+def test_full_queue_drops_only_routine_records():
+    class StalledStream(io.StringIO):
+        def __init__(self):
+            super().__init__()
+            self.resume = threading.Event()
+
+        def write(self, text):
+            self.resume.wait()
+            return super().write(text)
+
+    stream = StalledStream()
+    sink = app_logging.BackgroundSink(stream, max_size=1, block_timeout=0.01)
+    handler = logger.add(sink, format="{message}")
+    try:
+        logger.info("written")
+        # The writer thread may not have taken the first record yet
+        for i in range(3):
+            logger.info(f"maybe dropped {i}")
+        threading.Timer(0.05, stream.resume.set).start()
+        logger.error("kept")
+    finally:
+        logger.remove(handler)
+        sink.stop()
+
+    messages = [json.loads(line)["record"]["message"] for line in stream.getvalue().splitlines()]
+    assert "written" in messages and "kept" in messages
+    assert len(messages) < 5
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import pytest
+from asgi_correlation_id import correlation_id
+from prometheus_client import REGISTRY
+
+from app.core.loop_monitor import LoopMonitor
+
+
+def lag_count():
+    return REGISTRY.get_sample_value("template_event_loop_lag_seconds_count") or 0
+
+
+def render_synchronously():
+    # Stands in for a template render holding the loop
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_detects_blocking_callback_with_correlation_id():
+    monitor = LoopMonitor(interval=0.02, detect_blocking=True, threshold=0.1)
+    before = lag_count()
+    monitor.start()
+
+    async def request():
+        correlation_id.set("req-blocking-1")
+        await asyncio.sleep(0.05)
+        render_synchronously()
+        await asyncio.sleep(0.1)
+
+    try:
+        await asyncio.create_task(request(), name="render-request")
+    finally:
+        await monitor.stop()
+
+    assert lag_count() > before
+    [block] = monitor.blocks
+    assert block.correlation_id == "req-blocking-1"
+    assert block.task == "render-request"
+    assert "render_synchronously" in block.stack
+    assert 200 <= block.duration_ms <= 400
+
+
+@pytest.mark.asyncio
+async def test_quiet_loop_records_no_blocks():
+    monitor = LoopMonitor(interval=0.02, detect_blocking=True, threshold=0.1)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.2)
+    finally:
+        await monitor.stop()
+    assert not monitor.blocks
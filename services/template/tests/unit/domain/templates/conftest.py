@@ -0,0 +1,19 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def make_version():
+    """
+    Builds stand-ins for stored template versions, with only the fields
+    the renderer reads.
+    """
+    def make(**kwargs):
+        fields = {"id": uuid.uuid4(), "updated_at": None, "language": "en", "subject": None,
+                  "body_html": None, "body_text": None, "placeholders_schema": None}
+        fields.update(kwargs)
+        return SimpleNamespace(**fields)
+
+    return make
@@ -0,0 +1,88 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.domain.templates.email_pipeline import _Protected, run_pipeline
+from app.domain.templates.renderer import TemplateRenderer
+
+
+class TestMinifyHtml:
+    def test_collapses_whitespace_and_drops_comments(self):
+        source = "<table>\n  <tr>\n    <td>Hi  <b>{{ name }}</b>\n there</td>\n  </tr>\n</table>\n<!-- note -->"
+        assert run_pipeline(source, ["minify_html"]) == "<table><tr><td>Hi <b>{{ name }}</b> there</td></tr></table>"
+
+    def test_keeps_template_tags_verbatim(self):
+        source = "<ul>\n{% for i in items %}\n  <li class=\"{% if i.hot %}hot{% endif %}\">{{ i.name  |  e }}</li>\n{% endfor %}\n</ul>{# c #}"
+        assert run_pipeline(source, ["minify_html"]) == (
+            "<ul>{% for i in items %}<li class=\"{% if i.hot %}hot{% endif %}\">{{ i.name  |  e }}</li>{% endfor %}</ul>{# c #}"
+        )
+
+    def test_keeps_pre_and_conditional_comments(self):
+        source = "<p>a</p>\n<pre>  x\n  y</pre>\n<!--[if mso]><p>o</p><![endif]-->"
+        assert run_pipeline(source, ["minify_html"]) == "<p>a</p><pre>  x\n  y</pre><!--[if mso]><p>o</p><![endif]-->"
+
+    def test_minifies_stylesheets(self):
+        source = "<style>\n  /* brand */\n  p { color: {{ color }}; margin: 0; }\n</style>"
+        assert run_pipeline(source, ["minify_html"]) == "<style>p{color: {{ color }};margin: 0}</style>"
+
+    def test_drops_author_comments_around_expressions(self):
+        source = "<p>Hi</p>\n<!--{{ internal_note }}-->"
+        assert run_pipeline(source, ["minify_html"]) == "<p>Hi</p>"
+
+    def test_unknown_step(self):
+        with pytest.raises(ValueError, match="Unknown email pipeline step"):
+            run_pipeline("<p></p>", ["shrink"])
+
+
+class TestProtectedMarkers:
+    def test_expressions_in_author_comments_stay_commented(self):
+        source = "<p>{{ name }}</p><!--{{ internal_note }}-->{% if x %}<b>x</b>{% endif %}"
+        protected = _Protected(source)
+        assert protected.restore(protected.html) == source
+        assert run_pipeline(source, []) == source
+
+
+class TestInlineCss:
+    @pytest.fixture(autouse=True)
+    def _css_inline(self):
+        pytest.importorskip("css_inline")
+
+    def test_inlines_fragment_around_template_logic(self):
+        source = (
+            "<style>td { color: red } .hot { font-weight: bold }</style>"
+            "<table>{% for r in rows %}<tr><td class=\"{% if r.hot %}hot{% endif %}\">{{ r.name }}</td></tr>{% endfor %}</table>"
+        )
+        assert run_pipeline(source, ["inline_css"]) == (
+            "<style>.hot { font-weight: bold; }</style>"
+            "<table>{% for r in rows %}<tr><td class=\"{% if r.hot %}hot{% endif %}\" style=\"color: red;\">"
+            "{{ r.name }}</td></tr>{% endfor %}</table>"
+        )
+
+    def test_expressions_in_stylesheet_are_carried_into_attributes(self):
+        source = "<style>a { color: {{ brand }} }</style><p><a href=\"{{ url }}\">Go</a></p>"
+        assert run_pipeline(source, ["inline_css"]) == "<p><a href=\"{{ url }}\" style=\"color: {{ brand }};\">Go</a></p>"
+
+    def test_statements_inside_stylesheet_are_rejected(self):
+        with pytest.raises(ValueError, match="inside <style>"):
+            run_pipeline("<style>{% if dark %}p { color: white }{% endif %}</style><p>x</p>", ["inline_css"])
+
+    def test_author_comments_around_expressions_stay_comments(self):
+        source = "<style>p { color: red }</style><p>Hi</p><!--{{ internal_note }}-->"
+        assert run_pipeline(source, ["inline_css"]) == "<p style=\"color: red;\">Hi</p><!--{{ internal_note }}-->"
+
+    def test_child_templates_are_left_alone(self):
+        source = "{% extends 'layout' %}{% block content %}<style>p{color:red}</style><p>x</p>{% endblock %}"
+        assert run_pipeline(source, ["inline_css"]) == source
+
+
+class TestRenderCompiledHtml:
+    def test_render_uses_compiled_body_and_keeps_source(self):
+        renderer = TemplateRenderer()
+        version = SimpleNamespace(
+            id=uuid.uuid4(), updated_at=None, language="en", subject=None, body_text=None,
+            placeholders_schema=None, body_html="<p>\n  Hi {{ name }}\n</p>",
+            body_html_compiled="<p>Hi {{ name }}</p>",
+        )
+        assert renderer.render_version(version, "body_html", {"name": "Ann"}) == "<p>Hi Ann</p>"
+        assert version.body_html == "<p>\n  Hi {{ name }}\n</p>"
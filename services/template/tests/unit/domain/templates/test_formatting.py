@@ -0,0 +1,59 @@
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from jinja2 import UndefinedError
+
+from app.domain.templates.formatting import formatter_for
+from app.domain.templates.renderer import TemplateRenderer
+
+
+class TestLocaleFilters:
+    def setup_method(self):
+        self.renderer = TemplateRenderer()
+
+    def _render(self, content, data, language="en-US", strict=True):
+        version = SimpleNamespace(
+            id=uuid.uuid4(), updated_at=None, language=language, subject=None,
+            body_html=None, body_text=content, placeholders_schema=None
+        )
+        return self.renderer.render_version(version, "body_text", data, strict=strict)
+
+    def test_date_and_datetime(self):
+        data = {"d": "2024-03-05", "t": "2024-03-05T14:30:00Z"}
+        assert self._render("{{ d | date }}", data) == "Mar 5, 2024"
+        assert self._render("{{ d | date('long') }}", data, language="de-DE") == "5. März 2024"
+        assert self._render("{{ d | date('yyyy/MM') }}", data) == "2024/03"
+        assert self._render("{{ t | datetime('short', tz='Europe/Berlin') }}", data, language="de") == "05.03.24, 15:30"
+
+    def test_number_and_currency(self):
+        data = {"n": 1234567.891, "price": "1234.5"}
+        assert self._render("{{ n | number }}", data) == "1,234,567.891"
+        assert self._render("{{ n | number }}", data, language="de-DE") == "1.234.567,891"
+        assert self._render("{{ price | currency('EUR') }}", data, language="fr-FR") == "1 234,50\xa0€"
+        assert self._render("{{ price | currency('USD') }}", data) == "$1,234.50"
+        assert self._render("{{ n | number('#,##0.0') }}", data) == "1,234,567.9"
+
+    def test_plural_uses_locale_categories(self):
+        template = "{{ n }} {{ n | plural(one='plik', few='pliki', many='plików', other='pliku') }}"
+        assert [self._render(template, {"n": n}, language="pl") for n in (1, 3, 5)] == ["1 plik", "3 pliki", "5 plików"]
+        assert self._render("{{ n | plural('item', 'items') }}", {"n": 1}) == "item"
+        assert self._render("{{ n | plural('item', 'items') }}", {"n": 2}) == "items"
+
+    def test_missing_values(self):
+        assert self._render("[{{ missing | date }}]", {}, strict=False) == "[]"
+        assert self._render("[{{ none | currency('USD') }}]", {"none": None}) == "[]"
+        with pytest.raises(UndefinedError):
+            self._render("{{ missing | number }}", {})
+
+    def test_unknown_language_falls_back(self):
+        assert self._render("{{ n | number }}", {"n": Decimal("1000.5")}, language="xx-YY") == "1,000.5"
+
+    def test_formatters_are_cached_per_locale(self):
+        assert formatter_for("de-DE") is formatter_for("de-DE")
+        formatter = formatter_for("de-DE")
+        formatter.number(1)
+        pattern = formatter._number_pattern("number", None)
+        formatter.number(2)
+        assert formatter._number_pattern("number", None) is pattern
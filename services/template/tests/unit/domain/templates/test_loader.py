@@ -0,0 +1,53 @@
+import pytest
+from jinja2 import TemplateNotFound
+
+from app.domain.templates.renderer import TemplateRenderer
+
+
+class TestVersionLoader:
+    def setup_method(self):
+        self.renderer = TemplateRenderer()
+
+    def test_extends_is_scoped_to_tenant(self, make_version):
+        self.renderer.register_dependency(("t1", "email"), "en", "layout", make_version(body_html="[{% block c %}{% endblock %}]"))
+        self.renderer.register_dependency(("t2", "email"), "en", "layout", make_version(body_html="<{% block c %}{% endblock %}>"))
+        child = make_version(body_html="{% extends 'layout' %}{% block c %}{{ x }}{% endblock %}")
+
+        assert self.renderer.render_version(child, "body_html", {"x": 1}, scope=("t1", "email")) == "[1]"
+        other = make_version(body_html=child.body_html)
+        assert self.renderer.render_version(other, "body_html", {"x": 1}, scope=("t2", "email")) == "<1>"
+
+    def test_layout_is_shared_and_recompiled_on_new_version(self, make_version):
+        scope = ("t1", "email")
+        self.renderer.register_dependency(scope, "en", "footer", make_version(body_text="v1"))
+        a = make_version(body_text="a {% include 'footer' %}")
+        b = make_version(body_text="b {% include 'footer' %}")
+
+        assert self.renderer.render_version(a, "body_text", {}, scope=scope) == "a v1"
+        assert self.renderer.render_version(b, "body_text", {}, scope=scope) == "b v1"
+        assert len(self.renderer.env_strict.cache) == 1
+
+        self.renderer.register_dependency(scope, "en", "footer", make_version(body_text="v2"))
+        assert self.renderer.render_version(a, "body_text", {}, scope=scope) == "a v2"
+
+    def test_unknown_include(self, make_version):
+        version = make_version(body_text="{% include 'missing' %}")
+        with pytest.raises(TemplateNotFound):
+            self.renderer.render_version(version, "body_text", {}, scope=("t1", "sms"))
+
+    def test_find_dependencies(self):
+        content = "{% extends 'layout' %}{% block a %}{% include 'footer' %}{% include name %}{% endblock %}"
+        assert self.renderer.find_dependencies(content) == ["layout", "footer", None]
+
+    def test_evicted_versions_release_their_names(self, make_version):
+        renderer = TemplateRenderer(cache_size=2)
+        scope = ("t1", "email")
+        renderer.register_dependency(scope, "en", "footer", make_version(body_text="f"))
+        versions = [make_version(body_text=f"{i} {{% include 'footer' %}}") for i in range(10)]
+
+        for version in versions:
+            assert renderer.render_version(version, "body_text", {}, scope=scope).endswith(" f")
+        names = [name for name in renderer.loader._refs if "/@" in name]
+        assert sorted(names) == sorted(f"t1/email/en/body_text/@{v.id}" for v in versions[-2:])
+        # Registered layouts are kept
+        assert "t1/email/en/body_text/footer" in renderer.loader._refs
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.domain.templates.exceptions import RenderCostRegression
+from app.domain.templates.profiling import CostProfiler, loop_depth, sample_from_schema
+from app.domain.templates.renderer import TemplateRenderer
+from app.domain.templates.sandbox import RenderBudget
+from app.domain.templates.services import TemplateService
+
+
+class TestCostProfiler:
+    def setup_method(self):
+        self.renderer = TemplateRenderer(sandboxed=True)
+
+    def test_sample_from_schema(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "plan": {"enum": ["pro", "free"]},
+                "items": {"type": "array", "maxItems": 3, "items": {"type": "object", "properties": {"qty": {"type": "integer", "minimum": 2}}}},
+            },
+        }
+        assert sample_from_schema(schema) == {"name": "xxxxxxxx", "plan": "pro", "items": [{"qty": 2}] * 3}
+
+    def test_loop_depth(self):
+        env = self.renderer.env_forgiving
+        assert loop_depth(env.parse("{{ a }}")) == 0
+        assert loop_depth(env.parse("{% for a in b %}{% for c in a %}{% endfor %}{% endfor %}{% for d in e %}{% endfor %}")) == 2
+
+    def test_profile_with_schema_sample(self, make_version):
+        version = make_version(
+            subject="Hi {{ name }}",
+            body_html="{% for row in rows %}<p>{{ row }}</p>{% endfor %}",
+            placeholders_schema={"type": "object", "properties": {
+                "name": {"type": "string"}, "rows": {"type": "array", "items": {"type": "string", "minLength": 1}}
+            }},
+        )
+        profile = CostProfiler(self.renderer, runs=3).profile(version)
+        assert profile["sample"] == "schema"
+        assert profile["loop_depth"] == 1
+        assert profile["parts"]["body_html"]["output_bytes"] == len("<p>x</p>") * 10
+        assert profile["output_bytes"] == len("Hi xxxxxxxx") + len("<p>x</p>") * 10
+        assert set(profile["parts"]) == {"subject", "body_html"}
+
+    def test_profile_records_budget_violation(self, make_version):
+        version = make_version(body_text="{% for i in range(100000) %}.{% endfor %}")
+        profile = CostProfiler(self.renderer, budget=RenderBudget(max_loop_iterations=100)).profile(version)
+        assert profile["errors"]["body_text"]["limit"] == "loop_iterations"
+        # The time spent until the abort still counts
+        assert profile["render_ms"] == profile["parts"]["body_text"]["render_ms"] > 0
+
+
+class TestCostRegression:
+    def test_regression_rejected(self, monkeypatch):
+        monkeypatch.setattr("app.domain.templates.services.settings.PUBLISH_MAX_COST_REGRESSION", 1.5)
+        previous = {"sample": "schema", "render_ms": 4.0}
+        TemplateService._check_cost_regression(previous, {"sample": "schema", "render_ms": 5.9})
+        TemplateService._check_cost_regression(previous, {"sample": "empty", "render_ms": 50.0})
+        with pytest.raises(RenderCostRegression):
+            TemplateService._check_cost_regression(previous, {"sample": "schema", "render_ms": 6.1})
+
+
+class TestHeavyVersions:
+    def test_profile_errors_are_heavy(self, monkeypatch):
+        monkeypatch.setattr("app.domain.templates.services.settings.RENDER_HEAVY_THRESHOLD_MS", 10.0)
+        assert not TemplateService.is_heavy(SimpleNamespace(cost_profile={"render_ms": 1.0}))
+        assert TemplateService.is_heavy(SimpleNamespace(cost_profile={"render_ms": 12.0}))
+        assert TemplateService.is_heavy(SimpleNamespace(cost_profile={
+            "render_ms": 0.5, "errors": {"body_text": {"type": "render_failed", "message": "boom"}}
+        }))
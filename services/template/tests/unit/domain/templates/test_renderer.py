@@ -38,3 +38,60 @@ class TestTemplateRenderer:
         error = self.renderer.validate_syntax("Hello {{ name")
         assert error is not None
         assert "Syntax error" in error
+
+    def test_find_placeholders(self):
+        content = "Hi {{ user.name }}, you have {{ items | length }} items"
+        placeholders = self.renderer.find_placeholders(content)
+        assert placeholders["variables"] == ["items", "user"]
+        assert placeholders["required"] == ["items", "user"]
+
+    def test_find_placeholders_conditional_not_required(self):
+        content = (
+            "{% if show_coupon %}{{ coupon }}{% endif %}"
+            "{% for item in items %}{{ item.name }} {{ currency }}{% endfor %}"
+            "{{ nickname | default('friend') }}{{ extra if extra is defined }}"
+            "{% set local = 1 %}{{ local }}"
+        )
+        placeholders = self.renderer.find_placeholders(content)
+        assert placeholders["variables"] == ["coupon", "currency", "extra", "items", "nickname", "show_coupon"]
+        assert placeholders["required"] == ["items", "show_coupon"]
+
+    def test_find_placeholders_assigned_in_branch_not_required(self):
+        content = (
+            "{% if x %}{% set name = 1 %}{% endif %}{{ name }}"
+            "{% with total = 2 %}{% endwith %}{{ total }}"
+            "{% for row in rows %}{% endfor %}{{ row }}"
+        )
+        placeholders = self.renderer.find_placeholders(content)
+        assert placeholders["variables"] == ["name", "row", "rows", "total", "x"]
+        assert placeholders["required"] == ["rows", "x"]
+        self.renderer.render(content, {"x": False, "name": "Ann", "total": 1, "row": 0, "rows": []}, strict=True)
+
+    def test_render_version_reuses_compiled_template(self, make_version):
+        version = make_version(subject="Hi {{ name }}")
+        assert self.renderer.render_version(version, "subject", {"name": "A"}) == "Hi A"
+        template = self.renderer.compiled(version).templates[("subject", True)]
+        assert self.renderer.render_version(version, "subject", {"name": "B"}) == "Hi B"
+        assert self.renderer.compiled(version).templates[("subject", True)] is template
+
+    def test_compiled_cache_is_bounded(self, make_version):
+        renderer = TemplateRenderer(cache_size=2)
+        versions = [make_version(subject="x") for _ in range(3)]
+        first = renderer.compiled(versions[0])
+        renderer.compiled(versions[1])
+        renderer.compiled(versions[2])
+        assert renderer.compiled(versions[0]) is not first
+
+    def test_validate_data(self, make_version):
+        version = make_version(placeholders_schema={
+            "type": "object",
+            "properties": {"user": {"type": "object", "properties": {"age": {"type": "integer"}}}},
+            "required": ["user"],
+        })
+        assert self.renderer.validate_data(version, {"user": {"age": 3}}) is None
+        errors = self.renderer.validate_data(version, {"user": {"age": "3"}})
+        assert errors == [{"path": "user.age", "message": "data.user.age must be integer", "rule": "type"}]
+
+    def test_validate_schema_invalid(self):
+        assert self.renderer.validate_schema({"type": "object"}) is None
+        assert self.renderer.validate_schema({"type": "nope"}) is not None
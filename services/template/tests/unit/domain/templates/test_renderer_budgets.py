@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from benchmarks.bench_renderer import build_cases, load_budgets, peak_allocation, time_per_call
+from app.domain.templates.renderer import TemplateRenderer
+
+# Slower machines can scale the time budgets, e.g. PERF_BUDGET_SCALE=2 on CI;
+# allocation budgets do not depend on the machine
+TIME_SCALE = float(os.environ.get("PERF_BUDGET_SCALE", "1"))
+
+BUDGETS = load_budgets()
+CASES = build_cases(TemplateRenderer())
+
+
+def test_every_case_has_a_budget():
+    assert set(CASES) == set(BUDGETS)
+
+
+@pytest.mark.parametrize("name", sorted(BUDGETS))
+def test_renderer_budget(name):
+    case, budget = CASES[name], BUDGETS[name]
+
+    allocated_kib = peak_allocation(case.run) / 1024
+    assert allocated_kib <= budget["max_alloc_kib"], (
+        f"{name} allocated {allocated_kib:.1f} KiB, budget {budget['max_alloc_kib']} KiB"
+    )
+
+    elapsed_us = time_per_call(case.run, rounds=3, min_round=0.01) * 1e6
+    assert elapsed_us <= budget["max_us"] * TIME_SCALE, (
+        f"{name} took {elapsed_us:.1f} us, budget {budget['max_us'] * TIME_SCALE:.1f} us"
+    )
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+from jinja2.exceptions import SecurityError
+
+from app.domain.templates.exceptions import RenderBudgetExceeded
+from app.domain.templates.renderer import TemplateRenderer
+from app.domain.templates.sandbox import BudgetPolicy, RenderBudget
+
+
+class TestSandboxedRendering:
+    def setup_method(self):
+        self.renderer = TemplateRenderer(sandboxed=True)
+
+    def test_renders_normally_within_budget(self):
+        content = "{% for i in items %}{{ i }},{% endfor %}"
+        assert self.renderer.render(content, {"items": [1, 2, 3]}) == "1,2,3,"
+
+    def test_loop_iterations_budget(self):
+        budget = RenderBudget(max_loop_iterations=100)
+        content = "{% for i in items %}{% for j in items %}.{% endfor %}{% endfor %}"
+        with pytest.raises(RenderBudgetExceeded) as excinfo:
+            self.renderer.render(content, {"items": list(range(11))}, budget=budget)
+        assert excinfo.value.limit == "loop_iterations"
+
+    def test_output_bytes_budget(self):
+        budget = RenderBudget(max_output_bytes=50)
+        with pytest.raises(RenderBudgetExceeded) as excinfo:
+            self.renderer.render("{% for i in items %}{{ i }}{% endfor %}", {"items": ["x" * 10] * 10}, budget=budget)
+        assert excinfo.value.limit == "output_bytes"
+
+    def test_string_repetition_budget(self):
+        budget = RenderBudget(max_output_bytes=1000)
+        with pytest.raises(RenderBudgetExceeded):
+            self.renderer.render("{{ 'a' * 100000000 }}", {}, budget=budget)
+
+    def test_timeout_budget(self):
+        budget = RenderBudget(max_loop_iterations=10 ** 9, timeout_seconds=0.01)
+        with pytest.raises(RenderBudgetExceeded) as excinfo:
+            self.renderer.render("{% for i in range(100000) %}{% for j in range(100000) %}{% endfor %}{% endfor %}", {}, budget=budget)
+        assert excinfo.value.limit == "timeout"
+
+    def test_power_budget(self):
+        with pytest.raises(RenderBudgetExceeded) as excinfo:
+            self.renderer.render("{{ (x ** y) % 7 }}", {"x": 3, "y": 10 ** 7})
+        assert excinfo.value.limit == "power"
+        assert self.renderer.render("{{ 2 ** 10 }} {{ 2.5 ** 2 }}", {}) == "1024 6.25"
+
+    def test_timeout_checked_in_lazy_filters(self):
+        budget = RenderBudget(timeout_seconds=0.01)
+        with pytest.raises(RenderBudgetExceeded) as excinfo:
+            self.renderer.render('{{ items|map("string")|join }}', {"items": list(range(3_000_000))}, budget=budget)
+        assert excinfo.value.limit == "timeout"
+        content = "{% filter upper %}{{ items|map('lower')|join(',') }}{% endfilter %} {{ 3 is odd }}"
+        assert self.renderer.render(content, {"items": ["A", "B"]}) == "A,B True"
+
+    def test_streamed_budget_ignores_consumer_time(self):
+        budget = RenderBudget(timeout_seconds=0.05)
+        template = self.renderer.env_strict.from_string("{% for i in items %}{{ i }}{% endfor %}")
+        chunks = self.renderer.generate_compiled(template, {"items": list(range(5))}, budget)
+        output = []
+        for chunk in chunks:
+            time.sleep(0.02)
+            output.append(chunk)
+        assert "".join(output) == "01234"
+
+    def test_streamed_output_budget(self):
+        budget = RenderBudget(max_output_bytes=50)
+        template = self.renderer.env_strict.from_string("{% for i in items %}{{ i }}{% endfor %}")
+        chunks = self.renderer.generate_compiled(template, {"items": ["x" * 10] * 10}, budget)
+        with pytest.raises(RenderBudgetExceeded):
+            list(chunks)
+
+    def test_unsafe_attribute_access(self):
+        with pytest.raises(SecurityError):
+            self.renderer.render("{{ x.__class__.__subclasses__() }}", {"x": 1})
+
+    def test_placeholders_ignore_budget_wrapper(self):
+        placeholders = self.renderer.find_placeholders("{% for i in items %}{{ i }}{% endfor %}")
+        assert placeholders == {"variables": ["items"], "required": ["items"]}
+
+
+class TestBudgetPolicy:
+    def test_overrides_by_specificity(self):
+        policy = BudgetPolicy(RenderBudget(), {
+            "*:sms": {"max_output_bytes": 2000},
+            "acme:*": {"max_output_bytes": 5000, "timeout_seconds": 2},
+            "acme:sms": {"max_loop_iterations": 10},
+        })
+        assert policy.for_scope("other", "email") == RenderBudget()
+        assert policy.for_scope("other", "sms").max_output_bytes == 2000
+        assert policy.for_scope("acme", "sms") == RenderBudget(
+            max_loop_iterations=10, max_output_bytes=5000, timeout_seconds=2
+        )
+
+    def test_unknown_limit(self):
+        with pytest.raises(ValueError):
+            BudgetPolicy(RenderBudget(), {"acme:*": {"max_cpu": 1}})
@@ -4,8 +4,8 @@ from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.templates.services import TemplateService
-from app.domain.templates.models import ChannelType, TemplateCreate
-from app.domain.templates.exceptions import DuplicateTemplateError
+from app.domain.templates.models import ChannelType, TemplateCreate, RenderPart
+from app.domain.templates.exceptions import DuplicateTemplateError, MissingTemplateVariables, InvalidTemplateData
 from app.infrastructure.db.models.templates import TemplateVersion
 
 # We need to update existing tests to match the new Service capabilities if needed.
@@ -34,4 +34,72 @@ class TestTemplateServiceLogic:
         )
         assert result == expected_version
 
+    async def test_render_strict_reports_all_missing_variables(self, mock_session):
+        service = TemplateService(mock_session)
+        version = TemplateVersion(
+            language="en",
+            subject="Hi {{ name }}",
+            body_text="{{ greeting }} {{ name }}",
+            placeholders={
+                "subject": {"variables": ["name"], "required": ["name"]},
+                "body_text": {"variables": ["greeting", "name"], "required": ["greeting", "name"]},
+            },
+        )
+        service.resolve_template_version = AsyncMock(return_value=version)
+
+        with pytest.raises(MissingTemplateVariables) as excinfo:
+            await service.resolve_and_render("k", ChannelType.EMAIL, None, "en", {}, strict=True)
+        assert excinfo.value.missing == ["greeting", "name"]
+
+    async def test_render_drops_unused_data(self, mock_session):
+        service = TemplateService(mock_session)
+        version = TemplateVersion(
+            language="en",
+            body_text="{{ name }}",
+            placeholders={"body_text": {"variables": ["name"], "required": ["name"]}},
+        )
+
+        assert service._prepare_data(version, {"name": "Al", "blob": [1] * 100}, strict=True) == {"name": "Al"}
+
+    async def test_render_rejects_data_not_matching_schema(self, mock_session):
+        service = TemplateService(mock_session)
+        version = TemplateVersion(
+            language="en",
+            body_text="{{ count }}",
+            placeholders_schema={"type": "object", "properties": {"count": {"type": "integer"}}},
+        )
+        service.resolve_template_version = AsyncMock(return_value=version)
+
+        with pytest.raises(InvalidTemplateData) as excinfo:
+            await service.resolve_and_render("k", ChannelType.SMS, None, "en", {"count": "x"}, strict=False)
+        assert excinfo.value.errors[0]["path"] == "count"
+
+    async def test_render_only_channel_parts(self, mock_session):
+        service = TemplateService(mock_session)
+        version = TemplateVersion(
+            language="en",
+            subject="{{ title }}",
+            body_html="<p>{{ html_only }}</p>",
+            body_text="{{ text }}",
+            placeholders={
+                "subject": {"variables": ["title"], "required": ["title"]},
+                "body_html": {"variables": ["html_only"], "required": ["html_only"]},
+                "body_text": {"variables": ["text"], "required": ["text"]},
+            },
+        )
+        service.resolve_template_version = AsyncMock(return_value=version)
+
+        # body_html is never rendered for SMS, so its variables are not required
+        result = await service.resolve_and_render("k", ChannelType.SMS, None, "en", {"text": "hi"})
+        assert result == {"version": version, "body_text": "hi"}
+
+        result = await service.resolve_and_render(
+            "k", ChannelType.EMAIL, None, "en", {"title": "T"}, parts=[RenderPart.SUBJECT]
+        )
+        assert result == {"version": version, "subject": "T"}
+
+    async def test_parts_for_respects_channel_policy(self, mock_session):
+        assert TemplateService.parts_for(ChannelType.PUSH) == ["subject", "body_text"]
+        assert TemplateService.parts_for(ChannelType.SMS, [RenderPart.SUBJECT, RenderPart.BODY_TEXT]) == ["body_text"]
+
     # Add more unit tests for new service methods if desired
@@ -36,3 +36,12 @@ class TestTemplateValidation:
                 body_text="Bad {{ y"
             )
         assert "body_text" in str(excinfo.value)
+
+    def test_invalid_placeholders_schema(self):
+        with pytest.raises(ValidationError) as excinfo:
+            TemplateVersionCreate(
+                language="en",
+                subject="Ok {{ x }}",
+                placeholders_schema={"type": "nope"}
+            )
+        assert "Invalid placeholders schema" in str(excinfo.value)